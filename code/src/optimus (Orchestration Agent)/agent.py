@@ -1,12 +1,27 @@
-from servicenow import fetch_unassigned_incidents, get_assignment_group
+import threading
+from functools import partial
+
+from servicenow import fetch_unassigned_incidents, mark_incidents_processed, assignment_groups, group_sys_id
+from servicenow import AssignmentGroupLookupError
 from mongo import get_agent_details
 from servicenow import move_incident_status
-import requests
+from dispatcher import DispatchEngine, format_summary
+from outbox import Outbox, idempotency_key
+from servicenow_batch import IncidentBatchWriter
+from settings import OUTBOX_BATCH_SIZE, OUTBOX_POLL_INTERVAL, ASSIGNMENT_GROUP_MAX_RETRIES
 
 
 
 from servicenow import assign_incident
 
+dispatcher = DispatchEngine()
+outbox = Outbox()
+incident_writer = IncidentBatchWriter()
+# Set when new deliveries are queued, so the worker sends them without waiting for its next poll
+deliveries_queued = threading.Event()
+# Cycles each incident version (by idempotency key) has been seen with an unresolved group
+unresolved_group_cycles = {}
+
 
 def markAssignment(incident_number,platformOwner):
     """
@@ -15,15 +30,21 @@ def markAssignment(incident_number,platformOwner):
     move_incident_status(incident_number,platformOwner)
     print(f"Incident {incident_number} moved to 'In Progress' state.")
 
-def send_to_agent(assignment_group, incident_number, priority, short_description, long_description, comments,status,sys_id):
+def send_to_agent(assignment_group, incident_number, priority, short_description, long_description, comments,status,sys_id,idempotency_key=None,assign=True):
     """
     Send incident details to the assigned agent.
+
+    The idempotency key goes in an Idempotency-Key header so the agent can
+    drop retried deliveries; assign=False skips assigning the incident in
+    ServiceNow, for callers that batch assignments. Returns True if the
+    agent accepted the incident.
     """
     agent_details = get_agent_details(assignment_group)
     agent_url = agent_details.get("restURL")
     agent_mail = agent_details.get("mailId")
     platformOwner=agent_details.get("platformOwner")
-    assign_incident(sys_id,platformOwner)
+    if assign:
+        assign_incident(sys_id,platformOwner)
 
     # Prepare the payload
     payload = {
@@ -37,10 +58,12 @@ def send_to_agent(assignment_group, incident_number, priority, short_description
     }
 
     # Send the POST request
-    response = requests.post(agent_url, json=payload)
+    headers = {"Idempotency-Key": idempotency_key} if idempotency_key else {}
+    response = dispatcher.post(agent_url, json=payload, headers=headers)
 
     # Check the response status
-    if response.status_code == 200 or response.status_code == 201:
+    delivered = response.status_code == 200 or response.status_code == 201
+    if delivered:
         print("Incident successfully sent to the API.")
     else:
         print(f"Failed to send incident. Status code: {response.status_code}, Response: {response.text}")
@@ -55,13 +78,37 @@ def send_to_agent(assignment_group, incident_number, priority, short_description
     print(f"Comments: {comments}")
     print(f"State: {status}")
     print(f"sys_id: {sys_id}")
+    return delivered
 
 
 def process_incidents():
     """
     Process unassigned incidents and send them to the appropriate agents.
+
+    Each new incident version is recorded in the outbox; the delivery
+    worker (start_delivery_worker) then sends it.
+    An incident whose group cannot be resolved is skipped, and the
+    watermark stops before it so it is fetched again next cycle; the
+    incidents after it are still recorded (the outbox ignores them when
+    they come back). After ASSIGNMENT_GROUP_MAX_RETRIES cycles it is given
+    up and logged, so one bad group cannot hold the watermark forever. If
+    the group lookup fails altogether the watermark stays put.
     """
     incidents = fetch_unassigned_incidents()
+
+    # Group names come dot-walked with the incidents; the rest are resolved in one batched query
+    for incident in incidents:
+        assignment_groups.remember(group_sys_id(incident.get("assignment_group")), incident.get("assignment_group.name"))
+    try:
+        group_names = assignment_groups.resolve_many(group_sys_id(incident.get("assignment_group")) for incident in incidents)
+    except AssignmentGroupLookupError as e:
+        print(f"{e}; retrying these incidents next cycle")
+        return
+
+    processed = []
+    # Set at the first incident left for a later cycle; the watermark does not move past it
+    blocked = False
+    still_unresolved = {}
     for incident in incidents:
         assignment_group_detail = incident.get("assignment_group", {})
         incident_number = incident.get("number", "")
@@ -72,7 +119,122 @@ def process_incidents():
         state=incident.get("state","")
         sys_id=incident.get("sys_id","")
         
-        if isinstance(assignment_group_detail, dict):
-            assignment_group_link = assignment_group_detail.get("link")
-            assignment_group = get_assignment_group(assignment_group_link)
-            send_to_agent(assignment_group, incident_number, priority, short_description, long_description, comments,state,sys_id)
\ No newline at end of file
+        # Incidents without a group are passed over; setting one updates sys_updated_on, which brings them back
+        if not group_sys_id(assignment_group_detail):
+            if not blocked:
+                processed.append(incident)
+            continue
+        assignment_group = group_names.get(group_sys_id(assignment_group_detail))
+        if not assignment_group:
+            key = idempotency_key(incident)
+            cycles = unresolved_group_cycles.get(key, 0) + 1
+            if cycles < ASSIGNMENT_GROUP_MAX_RETRIES:
+                print(f"Assignment group {group_sys_id(assignment_group_detail)} of incident {incident_number} not found; retrying it next cycle")
+                still_unresolved[key] = cycles
+                blocked = True
+            else:
+                if cycles == ASSIGNMENT_GROUP_MAX_RETRIES:
+                    print(f"Dead letter: assignment group {group_sys_id(assignment_group_detail)} of incident {incident_number} "
+                          f"(sys_id {sys_id}) not found in {cycles} cycles; giving up on this version of the incident")
+                # Kept while it is fetched again (behind an earlier incident), so it is only given up once
+                still_unresolved[key] = cycles
+                if not blocked:
+                    processed.append(incident)
+            continue
+        # Versions already queued or delivered are ignored, so unchanged incidents are not resent
+        outbox.enqueue(idempotency_key(incident), sys_id, incident_number, assignment_group, {
+            "assignment_group": assignment_group,
+            "incident_number": incident_number,
+            "priority": priority,
+            "short_description": short_description,
+            "long_description": long_description,
+            "comments": comments,
+            "status": state,
+            "sys_id": sys_id,
+        })
+        if not blocked:
+            processed.append(incident)
+
+    # Incidents no longer fetched (resolved, or left behind by the watermark) are forgotten
+    unresolved_group_cycles.clear()
+    unresolved_group_cycles.update(still_unresolved)
+
+    # The deliveries are durable now, so the watermark can move past the incidents before the first unresolved one
+    mark_incidents_processed(processed)
+    deliveries_queued.set()
+
+
+def deliver_pending():
+    """
+    Run the due outbox deliveries and record the outcomes.
+
+    Incidents not assigned yet are assigned in ServiceNow in batched
+    writes, and incidents not sent yet are sent to their agents
+    concurrently. A step that fails is retried with exponential backoff;
+    a step that succeeded is never repeated, so a state the agent has moved
+    the incident to is not reset.
+    """
+    deliveries = outbox.due(OUTBOX_BATCH_SIZE)
+    if not deliveries:
+        return
+
+    for delivery in deliveries:
+        if not delivery["assigned"]:
+            platform_owner = get_agent_details(delivery["assignment_group"]).get("platformOwner")
+            incident_writer.assign(delivery["sys_id"], platform_owner)
+    assignments = incident_writer.flush()
+
+    tasks = []
+    for delivery in deliveries:
+        if delivery["sent"]:
+            continue
+        key = delivery["idempotency_key"]
+        # Deliveries to the same agent share its concurrency limit
+        agent = get_agent_details(delivery["assignment_group"]).get("restURL") or delivery["assignment_group"]
+        tasks.append((agent, key, partial(send_to_agent, idempotency_key=key, assign=False, **delivery["payload"])))
+    summary = dispatcher.dispatch(tasks)
+
+    for delivery in deliveries:
+        key = delivery["idempotency_key"]
+        errors = []
+        assigned = bool(delivery["assigned"])
+        if not assigned:
+            result = assignments.get(delivery["sys_id"], {"ok": False, "status_code": 0, "error": "not sent"})
+            assigned = result["ok"]
+            if not assigned:
+                print(f"Failed to assign incident {delivery['incident_number']}. Status code: {result['status_code']}, Error: {result['error']}")
+                errors.append(f"assignment failed ({result['status_code']}): {result['error']}")
+        sent = bool(delivery["sent"]) or summary["results"].get(key, False)
+        if not sent:
+            errors.append(summary["errors"].get(key, "rejected by the agent"))
+        outbox.record_attempt(key, assigned=assigned, sent=sent, error="; ".join(errors))
+    if tasks:
+        print(format_summary(summary))
+    outbox.purge()
+
+
+def run_delivery_worker(should_stop=None):
+    """
+    Deliver from the outbox until should_stop() returns True.
+
+    Runs whenever process_incidents queues deliveries, and at least every
+    OUTBOX_POLL_INTERVAL seconds for the retries that come due.
+    """
+    should_stop = should_stop or (lambda: False)
+    while not should_stop():
+        deliveries_queued.wait(OUTBOX_POLL_INTERVAL)
+        deliveries_queued.clear()
+        try:
+            deliver_pending()
+        except Exception as e:
+            # The outbox keeps the deliveries, so the next run picks them up
+            print(f"Delivery worker error: {e}")
+
+
+def start_delivery_worker():
+    """
+    Start run_delivery_worker on a daemon thread.
+    """
+    worker = threading.Thread(target=run_delivery_worker, name="outbox-delivery", daemon=True)
+    worker.start()
+    return worker
@@ -0,0 +1,136 @@
+"""
+Concurrent delivery of incidents to the vertical agents.
+"""
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from settings import DISPATCH_WORKERS, DISPATCH_PER_AGENT, AGENT_CONNECT_TIMEOUT, AGENT_READ_TIMEOUT
+
+
+def percentile(values, pct):
+    """
+    Return the pct percentile of values (nearest rank), 0 when there are none.
+    """
+    if not values:
+        return 0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[rank]
+
+
+class DispatchEngine:
+    """
+    Runs incident deliveries on a bounded thread pool.
+
+    At most max_workers deliveries run at once, and at most per_agent of
+    them against the same agent: the others wait in a per-agent queue
+    rather than in a worker, so a slow agent holds at most per_agent
+    workers while the other agents keep going. Each worker thread keeps its own keep-alive
+    requests.Session, and every request has connect and read timeouts.
+    """
+
+    def __init__(self, max_workers=DISPATCH_WORKERS, per_agent=DISPATCH_PER_AGENT,
+                 connect_timeout=AGENT_CONNECT_TIMEOUT, read_timeout=AGENT_READ_TIMEOUT):
+        self.max_workers = max_workers
+        self.per_agent = per_agent
+        self.timeout = (connect_timeout, read_timeout)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="dispatch")
+        self._local = threading.local()
+
+    def session(self):
+        """
+        Return the keep-alive session of the calling thread.
+        """
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=self.max_workers, pool_maxsize=self.per_agent)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            self._local.session = session
+        return session
+
+    def post(self, url, **kwargs):
+        """
+        POST on the thread's session with the engine timeouts.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session().post(url, **kwargs)
+
+    def _run(self, agent, label, send):
+        started = time.monotonic()
+        error = None
+        try:
+            delivered = send()
+        except Exception as e:
+            print(f"Dispatch of {label} to {agent} failed: {e}")
+            delivered, error = False, str(e)
+        return delivered, time.monotonic() - started, error
+
+    def dispatch(self, tasks):
+        """
+        Run deliveries concurrently and wait for all of them.
+
+        Args:
+            tasks: (agent, label, send) tuples; agent keys the per-agent
+                limit, label names the task in messages and send() returns
+                True once delivered
+
+        Returns:
+            dict: dispatched, failed, p50_ms, p95_ms, elapsed_ms, the
+            per-label results and the errors raised per label
+        """
+        started = time.monotonic()
+        queues = OrderedDict()
+        for agent, label, send in tasks:
+            queues.setdefault(agent, deque()).append((label, send))
+
+        running = {}
+
+        def submit(agent):
+            label, send = queues[agent].popleft()
+            running[self._executor.submit(self._run, agent, label, send)] = (agent, label)
+
+        for agent, queue in queues.items():
+            for _ in range(min(self.per_agent, len(queue))):
+                submit(agent)
+
+        results = {}
+        errors = {}
+        latencies = []
+        dispatched = 0
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                agent, label = running.pop(future)
+                delivered, latency, error = future.result()
+                results[label] = delivered
+                if error:
+                    errors[label] = error
+                latencies.append(latency * 1000)
+                dispatched += 1 if delivered else 0
+                # The agent's slot is free for its next delivery
+                if queues[agent]:
+                    submit(agent)
+        return {
+            "dispatched": dispatched,
+            "failed": len(latencies) - dispatched,
+            "p50_ms": round(percentile(latencies, 50), 1),
+            "p95_ms": round(percentile(latencies, 95), 1),
+            "elapsed_ms": round((time.monotonic() - started) * 1000, 1),
+            "results": results,
+            "errors": errors,
+        }
+
+
+def format_summary(summary):
+    """
+    One line describing a dispatch cycle.
+    """
+    return (f"Dispatch cycle: {summary['dispatched']} dispatched, {summary['failed']} failed, "
+            f"p50 {summary['p50_ms']}ms, p95 {summary['p95_ms']}ms, took {summary['elapsed_ms']}ms")
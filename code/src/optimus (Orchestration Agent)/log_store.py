@@ -0,0 +1,159 @@
+"""
+Time-window queries and histograms over the platformManager.logs collection.
+
+Every function takes an optional collection, so it can run against a
+mongomock collection or a local mongod instead of the configured server.
+"""
+from datetime import timedelta
+
+from pymongo import ASCENDING
+
+from mongo import get_client
+from settings import MONGO_DB_NAME, LOG_QUERY_BATCH_SIZE
+
+# Fields returned by default; message bodies are the bulk of a document
+LOG_FIELDS = ("timestamp", "level", "source", "message")
+
+# Units accepted by $dateTrunc
+HISTOGRAM_UNITS = ("second", "minute", "hour", "day", "week", "month")
+
+# Equality fields first, then the time range, so every filter is one index range scan
+LOG_INDEXES = (
+    ([("timestamp", ASCENDING)], "timestamp_1"),
+    ([("source", ASCENDING), ("timestamp", ASCENDING)], "source_1_timestamp_1"),
+    ([("level", ASCENDING), ("timestamp", ASCENDING)], "level_1_timestamp_1"),
+)
+
+_indexed = set()
+
+
+def get_logs_collection():
+    """
+    Return the logs collection on the shared client, creating its indexes on first use.
+    """
+    collection = get_client()[MONGO_DB_NAME]["logs"]
+    if collection.full_name not in _indexed:
+        ensure_log_indexes(collection)
+    return collection
+
+
+def ensure_log_indexes(collection):
+    """
+    Create the time-window indexes if they are missing (a no-op when they exist).
+    """
+    for keys, name in LOG_INDEXES:
+        collection.create_index(keys, name=name)
+    _indexed.add(collection.full_name)
+
+
+def build_filter(start, end, source=None, level=None):
+    """
+    Build the query for logs with start <= timestamp <= end.
+
+    source and level take a single value or a list of values.
+    """
+    query = {"timestamp": {"$gte": start, "$lte": end}}
+    for field, value in (("source", source), ("level", level)):
+        if isinstance(value, (list, tuple, set)):
+            query[field] = {"$in": list(value)}
+        elif value:
+            query[field] = value
+    return query
+
+
+def iter_logs(start, end, source=None, level=None, fields=LOG_FIELDS, limit=0,
+              batch_size=LOG_QUERY_BATCH_SIZE, newest_first=False, collection=None):
+    """
+    Yield the logs of a time window in timestamp order.
+
+    Only the requested fields are returned and the cursor fetches
+    batch_size documents per round trip, so memory stays flat however
+    many logs the window holds. Pass fields=None for whole documents.
+    """
+    collection = collection if collection is not None else get_logs_collection()
+    projection = None
+    if fields is not None:
+        projection = {field: 1 for field in fields}
+        if "_id" not in fields:
+            projection["_id"] = 0
+    cursor = (
+        collection.find(build_filter(start, end, source, level), projection)
+        .sort("timestamp", -1 if newest_first else 1)
+        .batch_size(batch_size)
+    )
+    if limit:
+        cursor = cursor.limit(limit)
+    try:
+        for document in cursor:
+            yield document
+    finally:
+        cursor.close()
+
+
+def count_logs(start, end, source=None, level=None, collection=None):
+    """
+    Count the logs of a time window on the server.
+    """
+    collection = collection if collection is not None else get_logs_collection()
+    return collection.count_documents(build_filter(start, end, source, level))
+
+
+def log_histogram(start, end, unit="minute", bin_size=1, group_by=None, source=None, level=None, collection=None):
+    """
+    Count logs per time bucket with a server-side $group on $dateTrunc (MongoDB 5.0+).
+
+    Returns one dict per bucket, oldest first: {"bucket", "count"} plus
+    "by" (counts per level or source) when group_by is "level" or "source".
+    Only the counts leave the server.
+    """
+    if unit not in HISTOGRAM_UNITS:
+        raise ValueError(f"unit must be one of {', '.join(HISTOGRAM_UNITS)}")
+    if group_by not in (None, "level", "source"):
+        raise ValueError("group_by must be level or source")
+
+    collection = collection if collection is not None else get_logs_collection()
+    group_id = {"bucket": {"$dateTrunc": {"date": "$timestamp", "unit": unit, "binSize": bin_size}}}
+    if group_by:
+        group_id["key"] = f"${group_by}"
+    pipeline = [
+        {"$match": build_filter(start, end, source, level)},
+        {"$group": {"_id": group_id, "count": {"$sum": 1}}},
+        {"$sort": {"_id.bucket": 1}},
+    ]
+
+    buckets = {}
+    for row in collection.aggregate(pipeline, allowDiskUse=True):
+        bucket = buckets.setdefault(row["_id"]["bucket"], {"bucket": row["_id"]["bucket"], "count": 0})
+        bucket["count"] += row["count"]
+        if group_by:
+            bucket.setdefault("by", {})[row["_id"].get("key")] = row["count"]
+    return [buckets[key] for key in sorted(buckets)]
+
+
+def incident_window(opened_at, minutes_before=30, minutes_after=10, source=None, sample_size=50, collection=None):
+    """
+    Summarize the logs around an incident for a datasource or agent prompt.
+
+    Returns the window, counts per level, a per-minute histogram and the
+    newest error/critical logs (at most sample_size), without pulling the
+    other documents of the window into Python.
+    """
+    start = opened_at - timedelta(minutes=minutes_before)
+    end = opened_at + timedelta(minutes=minutes_after)
+    histogram = log_histogram(start, end, unit="minute", group_by="level", source=source, collection=collection)
+    levels = {}
+    for bucket in histogram:
+        for level, count in bucket.get("by", {}).items():
+            levels[level] = levels.get(level, 0) + count
+    errors = list(iter_logs(
+        start, end, source=source, level=["error", "critical"],
+        limit=sample_size, newest_first=True, collection=collection,
+    ))
+    return {
+        "start": start,
+        "end": end,
+        "total": sum(levels.values()),
+        "levels": levels,
+        "histogram": histogram,
+        "errors": errors,
+    }
@@ -1,44 +1,132 @@
+import threading
+import time
+
 from pymongo import MongoClient
-from settings import MONGO_URI
-from datetime import datetime
+from pymongo.errors import OperationFailure, PyMongoError
+from settings import MONGO_URI, MONGO_DB_NAME, MONGO_MAX_POOL_SIZE, MONGO_SERVER_SELECTION_TIMEOUT_MS
+from settings import ASSIGNMENT_MAPPING_WATCH, ASSIGNMENT_MAPPING_TTL
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """
+    Return the process-wide MongoClient.
+
+    MongoClient keeps its own connection pool and is thread-safe, so one
+    instance is shared instead of connecting again on every call.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = MongoClient(
+                    MONGO_URI,
+                    maxPoolSize=MONGO_MAX_POOL_SIZE,
+                    serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+                )
+    return _client
+
+
+class AssignmentMappingCache:
+    """
+    In-memory copy of the assignment_mapping document.
+
+    The first lookup loads the document and, if watch is set, starts a
+    daemon thread following it with a change stream. Servers without change
+    streams (standalone mongod) fall back to reloading the document once
+    the copy is older than ttl seconds. Either way a lookup is a dict access.
+    """
+
+    def __init__(self, ttl=ASSIGNMENT_MAPPING_TTL, watch=ASSIGNMENT_MAPPING_WATCH, collection=None):
+        self.ttl = ttl
+        self.watch = watch
+        self._collection = collection
+        self._mappings = None
+        self._expires = 0.0
+        self._watching = False
+        self._watcher = None
+        self._lock = threading.Lock()
+
+    @property
+    def collection(self):
+        if self._collection is None:
+            self._collection = get_client()[MONGO_DB_NAME]["assignmentGroup"]
+        return self._collection
+
+    def reload(self):
+        """
+        Read the mapping document again.
+        """
+        assignment_doc = self.collection.find_one({"_id": "assignment_mapping"})
+        self._set(assignment_doc)
+
+    def _set(self, assignment_doc):
+        self._mappings = (assignment_doc or {}).get("mappings") or {}
+        self._expires = time.monotonic() + self.ttl
+
+    def mappings(self):
+        """
+        Return the assignment group -> agent details mapping.
+        """
+        if self._mappings is None or (not self._watching and time.monotonic() >= self._expires):
+            with self._lock:
+                if self._mappings is None or (not self._watching and time.monotonic() >= self._expires):
+                    self.reload()
+                    if self.watch and self._watcher is None:
+                        self._watcher = threading.Thread(target=self._follow, name="assignment-mapping-watch", daemon=True)
+                        self._watcher.start()
+        return self._mappings
+
+    def get(self, assignment_group):
+        return self.mappings().get(assignment_group, {})
+
+    def _follow(self):
+        """
+        Keep the copy current from a change stream on the mapping document.
+        """
+        pipeline = [{"$match": {"documentKey._id": "assignment_mapping"}}]
+        while True:
+            try:
+                with self.collection.watch(pipeline, full_document="updateLookup") as stream:
+                    # Reload once the stream is open so no change falls in between
+                    self.reload()
+                    self._watching = True
+                    for change in stream:
+                        if change["operationType"] == "delete":
+                            self._set(None)
+                        elif "fullDocument" in change:
+                            self._set(change["fullDocument"])
+            except OperationFailure as e:
+                print(f"Change streams unavailable ({e}), reloading the assignment mapping every {self.ttl}s")
+                self._watching = False
+                return
+            except PyMongoError as e:
+                print(f"Assignment mapping change stream failed ({e}), retrying in {self.ttl}s")
+            self._watching = False
+            time.sleep(self.ttl)
+
+
+assignment_mapping = AssignmentMappingCache()
+
 
 def get_agent_details(assignment_group):
     """
     Retrieve agent details for a given assignment group from MongoDB.
     """
-    client = MongoClient(MONGO_URI)
-    db = client["platformManager"]
-    collection = db["assignmentGroup"]
-    assignment_doc = collection.find_one({"_id": "assignment_mapping"})
-    if assignment_doc:
-        return assignment_doc["mappings"].get(assignment_group, {})
-    return {}
+    return assignment_mapping.get(assignment_group)
 
 
 def getLogs(startTime,endTime):
     """
-    Retrieve logs from MongoDB within a given time range.
+    Retrieve logs from MongoDB within a given time range (see log_store.iter_logs).
     """
-    client = MongoClient(MONGO_URI)
-    db = client["platformManager"]
-    collection = db["logs"]
-    return collection.find({"timestamp": {"$gte": startTime, "$lte": endTime}})
+    from log_store import iter_logs
+    return iter_logs(startTime, endTime)
+
 def getPlatformOwner(assignment_group):
     """
     Retrieve platformOwner for a given assignment group from MongoDB.
     """
-    client = MongoClient(MONGO_URI)
-    db = client["platformManager"]
-    collection = db["assignmentGroup"]
-    assignment_doc = collection.find_one({"_id": "assignment_mapping"})
-    if assignment_doc:
-        return assignment_doc["mappings"].get(assignment_group, {})
-    return {}
-
-start_time = datetime(2024, 3, 1, 0, 0, 0)  # March 1, 2025, 00:00:00
-end_time = datetime(2025, 4, 23, 23, 59, 59)  # March 23, 2025, 23:59:59
-
-logs=getLogs(start_time,end_time)
-
-for log in logs:
-    print(log)
+    return assignment_mapping.get(assignment_group)
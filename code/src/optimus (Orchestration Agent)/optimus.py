@@ -3,11 +3,14 @@ from django.conf import settings
 from django_cron import CronJobBase, Schedule
 import requests
 import time
-from agent import process_incidents
+from agent import process_incidents, start_delivery_worker
 from pymongo import MongoClient
 import json
 
 
+# Deliveries and their retries run on their own thread, apart from polling
+start_delivery_worker()
+
 while True:
     process_incidents()  # Run the function
     time.sleep(10)  # Wait 10 seconds before running again
@@ -0,0 +1,157 @@
+"""
+Durable outbox of incident deliveries to the vertical agents.
+"""
+import json
+import random
+import sqlite3
+import threading
+import time
+
+from settings import OUTBOX_PATH, OUTBOX_MAX_ATTEMPTS, OUTBOX_RETRY_BASE, OUTBOX_RETRY_MAX, OUTBOX_KEEP_DAYS
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS deliveries (
+    idempotency_key TEXT PRIMARY KEY,
+    sys_id TEXT NOT NULL,
+    incident_number TEXT NOT NULL,
+    assignment_group TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    assigned INTEGER NOT NULL DEFAULT 0,
+    sent INTEGER NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    last_error TEXT NOT NULL DEFAULT '',
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS deliveries_due ON deliveries (status, next_attempt_at);
+"""
+
+
+def idempotency_key(incident):
+    """
+    Key of one version of an incident: its sys_id and sys_updated_on.
+    """
+    return f"{incident.get('sys_id', '')}:{incident.get('sys_updated_on', '')}"
+
+
+class Outbox:
+    """
+    SQLite table of the deliveries Optimus owes the agents.
+
+    A delivery is recorded before anything is sent, keyed by idempotency
+    key, so an incident version is queued once however many cycles see it.
+    It has two steps, assigning the incident in ServiceNow and sending it
+    to the agent, each flagged once done. A delivery with a step left
+    (ServiceNow or agent down, timeout) stays pending and only that step
+    is retried, with exponential backoff, until both succeed ("delivered")
+    or the attempts run out ("dead").
+    """
+
+    def __init__(self, path=OUTBOX_PATH, max_attempts=OUTBOX_MAX_ATTEMPTS, retry_base=OUTBOX_RETRY_BASE,
+                 retry_max=OUTBOX_RETRY_MAX):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self._connection = None
+        self._lock = threading.Lock()
+
+    @property
+    def connection(self):
+        if self._connection is None:
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            self._connection.row_factory = sqlite3.Row
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.executescript(SCHEMA)
+            # Outbox files created before the steps were tracked
+            columns = {row["name"] for row in self._connection.execute("PRAGMA table_info(deliveries)")}
+            for column in ("assigned", "sent"):
+                if column not in columns:
+                    self._connection.execute(f"ALTER TABLE deliveries ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0")
+        return self._connection
+
+    def enqueue(self, key, sys_id, incident_number, assignment_group, payload):
+        """
+        Record a delivery unless its key is already queued or delivered.
+
+        Returns True if the delivery is new.
+        """
+        now = time.time()
+        with self._lock, self.connection as connection:
+            cursor = connection.execute(
+                "INSERT OR IGNORE INTO deliveries (idempotency_key, sys_id, incident_number, assignment_group, payload,"
+                " next_attempt_at, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, sys_id, incident_number, assignment_group, json.dumps(payload), now, now, now),
+            )
+            return cursor.rowcount == 1
+
+    def due(self, limit=100):
+        """
+        Return the pending deliveries whose next attempt is due, oldest first.
+        """
+        with self._lock:
+            rows = self.connection.execute(
+                "SELECT * FROM deliveries WHERE status = 'pending' AND next_attempt_at <= ?"
+                " ORDER BY next_attempt_at LIMIT ?",
+                (time.time(), limit),
+            ).fetchall()
+        deliveries = []
+        for row in rows:
+            delivery = dict(row)
+            delivery["payload"] = json.loads(delivery["payload"])
+            deliveries.append(delivery)
+        return deliveries
+
+    def record_attempt(self, key, assigned=False, sent=False, error=""):
+        """
+        Save the outcome of an attempt at a delivery.
+
+        assigned and sent flag the steps that succeeded in this attempt;
+        steps done in earlier attempts stay done. Once both are done the
+        delivery is delivered. Otherwise the next attempt is scheduled after
+        a delay that doubles with every attempt, from retry_base up to
+        retry_max seconds, with jitter so a service coming back is not hit
+        by every retry at once, and after max_attempts it is marked dead.
+        """
+        now = time.time()
+        with self._lock, self.connection as connection:
+            row = connection.execute(
+                "SELECT attempts, assigned, sent FROM deliveries WHERE idempotency_key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return
+            attempts = row["attempts"] + 1
+            assigned = bool(row["assigned"] or assigned)
+            sent = bool(row["sent"] or sent)
+            if assigned and sent:
+                status, next_attempt_at, error = "delivered", now, ""
+            else:
+                delay = min(self.retry_max, self.retry_base * 2 ** (attempts - 1)) * random.uniform(0.5, 1.0)
+                status = "dead" if attempts >= self.max_attempts else "pending"
+                next_attempt_at = now + delay
+            connection.execute(
+                "UPDATE deliveries SET status = ?, assigned = ?, sent = ?, attempts = ?, next_attempt_at = ?,"
+                " last_error = ?, updated_at = ? WHERE idempotency_key = ?",
+                (status, int(assigned), int(sent), attempts, next_attempt_at, str(error)[:1000], now, key),
+            )
+
+    def purge(self, keep_days=OUTBOX_KEEP_DAYS):
+        """
+        Delete delivered and dead deliveries older than keep_days.
+        """
+        with self._lock, self.connection as connection:
+            cursor = connection.execute(
+                "DELETE FROM deliveries WHERE status IN ('delivered', 'dead') AND updated_at < ?",
+                (time.time() - keep_days * 86400,),
+            )
+            return cursor.rowcount
+
+    def stats(self):
+        """
+        Number of deliveries per status.
+        """
+        with self._lock:
+            rows = self.connection.execute("SELECT status, COUNT(*) FROM deliveries GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
@@ -1,17 +1,149 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
 import requests
 from settings import SERVICENOW_INSTANCE, SERVICENOW_USERNAME, SERVICENOW_PASSWORD
+from settings import SERVICENOW_INCREMENTAL, SERVICENOW_STATE_FILE, SERVICENOW_PAGE_SIZE, SERVICENOW_MAX_PAGES, SERVICENOW_TIMEOUT
+from settings import ASSIGNMENT_GROUP_CACHE_TTL, ASSIGNMENT_GROUP_CACHE_SIZE
+
+# Incident fields agent.process_incidents reads, plus the watermark field
+INCIDENT_FIELDS = [
+    "sys_id", "number", "priority", "short_description", "description",
+    "comments", "state", "assignment_group", "sys_updated_on",
+    # Dot-walked, so the group name comes with the incident
+    "assignment_group.name",
+]
+
 
 def fetch_unassigned_incidents():
     """
     Fetch unassigned incidents from the ServiceNow API.
+
+    In incremental mode (the default) only incidents updated since the saved
+    watermark are requested, page by page; call mark_incidents_processed once
+    they are handled to move the watermark.
+    """
+    if not SERVICENOW_INCREMENTAL:
+        url = f"https://{SERVICENOW_INSTANCE}/api/now/table/incident"
+        params = {"sysparm_query": "assigned_toISEMPTY", "sysparm_fields": ",".join(INCIDENT_FIELDS)}
+        headers = {"Accept": "application/json"}
+        response = requests.get(url, auth=(SERVICENOW_USERNAME, SERVICENOW_PASSWORD), headers=headers, params=params, timeout=SERVICENOW_TIMEOUT)
+        if response.status_code == 200:
+            return response.json().get("result", [])
+        return []
+    return fetch_updated_incidents(load_watermark())
+
+
+def fetch_updated_incidents(watermark):
+    """
+    Fetch unassigned incidents updated at or after the watermark, oldest update first.
+
+    Only INCIDENT_FIELDS are returned, reference fields come back as plain
+    sys_ids, and results are paged by keyset on (sys_updated_on, sys_id)
+    rather than by offset: incidents assigned while a cycle pages through
+    the result leave it, which would shift later offsets and skip records.
+    A cycle downloads only what changed. Incidents at the watermark second
+    that were already processed are left out.
     """
     url = f"https://{SERVICENOW_INSTANCE}/api/now/table/incident"
-    params = {"sysparm_query": "assigned_toISEMPTY"}
-    headers = {"Accept": "application/json"}
-    response = requests.get(url, auth=(SERVICENOW_USERNAME, SERVICENOW_PASSWORD), headers=headers, params=params)
-    if response.status_code == 200:
-        return response.json().get("result", [])
-    return []
+    seen = set(watermark.get("sys_ids", []))
+    # sys_id breaks ties so pages do not overlap or skip records updated in the same second
+    order = "^ORDERBYsys_updated_on^ORDERBYsys_id"
+
+    incidents = []
+    # (sys_updated_on, sys_id) of the last record read
+    last = None
+    with requests.Session() as session:
+        session.auth = (SERVICENOW_USERNAME, SERVICENOW_PASSWORD)
+        session.headers["Accept"] = "application/json"
+        for _ in range(SERVICENOW_MAX_PAGES):
+            query = "assigned_toISEMPTY"
+            if last is not None:
+                # Records after the last one: a later second, or the rest of its second (^NQ is OR)
+                query += (f"^sys_updated_on>{last[0]}"
+                          f"^NQassigned_toISEMPTY^sys_updated_on={last[0]}^sys_id>{last[1]}")
+            elif watermark.get("sys_updated_on"):
+                query += f"^sys_updated_on>={watermark['sys_updated_on']}"
+            params = {
+                "sysparm_query": query + order,
+                "sysparm_fields": ",".join(INCIDENT_FIELDS),
+                "sysparm_exclude_reference_link": "true",
+                "sysparm_limit": SERVICENOW_PAGE_SIZE,
+            }
+            response = session.get(url, params=params, timeout=SERVICENOW_TIMEOUT)
+            if response.status_code != 200:
+                print(f"Failed to fetch incidents. Status code: {response.status_code}, Response: {response.text}")
+                break
+            results = response.json().get("result", [])
+            incidents.extend(
+                incident for incident in results
+                if not (incident.get("sys_updated_on") == watermark.get("sys_updated_on") and incident.get("sys_id") in seen)
+            )
+            if len(results) < SERVICENOW_PAGE_SIZE:
+                break
+            last = (results[-1].get("sys_updated_on", ""), results[-1].get("sys_id", ""))
+    return incidents
+
+
+def load_watermark():
+    """
+    Read the saved sys_updated_on watermark ({} before the first cycle).
+    """
+    try:
+        with open(SERVICENOW_STATE_FILE) as state_file:
+            return json.load(state_file)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        print(f"Ignoring unreadable ServiceNow state file {SERVICENOW_STATE_FILE}: {e}")
+        return {}
+
+
+def mark_incidents_processed(incidents):
+    """
+    Move the watermark to the newest sys_updated_on of processed incidents.
+
+    The sys_ids at that exact second are kept too, since the next query
+    includes it (>=) to catch other incidents updated in the same second.
+    """
+    if not SERVICENOW_INCREMENTAL or not incidents:
+        return
+    watermark = load_watermark()
+    newest = max(incident.get("sys_updated_on", "") for incident in incidents)
+    if newest < watermark.get("sys_updated_on", ""):
+        return
+    sys_ids = set(watermark.get("sys_ids", [])) if newest == watermark.get("sys_updated_on") else set()
+    sys_ids.update(incident.get("sys_id") for incident in incidents if incident.get("sys_updated_on") == newest)
+
+    # Written to a temporary file and renamed, so a crash never leaves a half-written state
+    temporary = f"{SERVICENOW_STATE_FILE}.tmp"
+    with open(temporary, "w") as state_file:
+        json.dump({"sys_updated_on": newest, "sys_ids": sorted(sys_ids)}, state_file)
+    os.replace(temporary, SERVICENOW_STATE_FILE)
+
+
+def group_link(group_sys_id):
+    """
+    Build the Table API URL of an assignment group from its sys_id.
+    """
+    return f"https://{SERVICENOW_INSTANCE}/api/now/table/sys_user_group/{group_sys_id}"
+
+_local = threading.local()
+
+
+def servicenow_session():
+    """
+    Return the calling thread's keep-alive ServiceNow session.
+    """
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = _local.session = requests.Session()
+        session.auth = (SERVICENOW_USERNAME, SERVICENOW_PASSWORD)
+    return session
+
 
 def assign_incident(incident_sys_id, assigned_to):
     """
@@ -20,7 +152,7 @@ def assign_incident(incident_sys_id, assigned_to):
     url = f"https://{SERVICENOW_INSTANCE}/api/now/table/incident/{incident_sys_id}"
     payload = {"assigned_to": assigned_to, "state": 2}  # 2 -> Assigned
     headers = {"Content-Type": "application/json"}
-    requests.patch(url, auth=(SERVICENOW_USERNAME, SERVICENOW_PASSWORD), json=payload, headers=headers)
+    servicenow_session().patch(url, json=payload, headers=headers, timeout=SERVICENOW_TIMEOUT)
 
 
 def move_incident_status(incident_sys_id,state):
@@ -31,7 +163,7 @@ def move_incident_status(incident_sys_id,state):
     payload = {"state": state}  # 2 -> In Progress
     headers = {"Content-Type": "application/json"}
 
-    response = requests.patch(url, auth=(SERVICENOW_USERNAME, SERVICENOW_PASSWORD), json=payload, headers=headers)
+    response = servicenow_session().patch(url, json=payload, headers=headers, timeout=SERVICENOW_TIMEOUT)
     return response.json()  
 
 def get_assignment_group(url):
@@ -41,4 +173,108 @@ def get_assignment_group(url):
     response = requests.get(url, auth=(SERVICENOW_USERNAME, SERVICENOW_PASSWORD), headers={"Accept": "application/json"})
     if response.status_code == 200:
         return response.json().get("result", {}).get("name", "")
-    return ""
\ No newline at end of file
+    return ""
+
+
+class AssignmentGroupLookupError(Exception):
+    """Raised when assignment group names cannot be fetched from ServiceNow."""
+
+
+class AssignmentGroupResolver:
+    """
+    Resolves assignment group sys_ids to names with a TTL + LRU cache.
+
+    Names already known (e.g. dot-walked assignment_group.name fields) are
+    fed in with remember(); the misses of a whole polling cycle are fetched
+    with one sys_idIN query, so a cycle makes at most one group request
+    however many incidents it handles.
+    """
+
+    def __init__(self, ttl=ASSIGNMENT_GROUP_CACHE_TTL, max_size=ASSIGNMENT_GROUP_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._names = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "requests": 0}
+
+    def remember(self, sys_id, name):
+        """
+        Cache the name of a group.
+        """
+        if not sys_id or not name:
+            return
+        with self._lock:
+            self._names[sys_id] = (name, time.monotonic() + self.ttl)
+            self._names.move_to_end(sys_id)
+            while len(self._names) > self.max_size:
+                self._names.popitem(last=False)
+
+    def _cached(self, sys_id):
+        with self._lock:
+            entry = self._names.get(sys_id)
+            if entry is None or entry[1] < time.monotonic():
+                self._names.pop(sys_id, None)
+                self.stats["misses"] += 1
+                return None
+            self._names.move_to_end(sys_id)
+            self.stats["hits"] += 1
+            return entry[0]
+
+    def resolve_many(self, sys_ids):
+        """
+        Return {sys_id: name} for the given groups, fetching the uncached ones in one query.
+
+        Raises AssignmentGroupLookupError if the query fails, rather than
+        returning a partial map. Groups ServiceNow does not know are left out.
+        """
+        names = {}
+        missing = []
+        for sys_id in set(filter(None, sys_ids)):
+            name = self._cached(sys_id)
+            if name is None:
+                missing.append(sys_id)
+            else:
+                names[sys_id] = name
+
+        # A sys_idIN query per chunk keeps the URL short
+        for start in range(0, len(missing), SERVICENOW_PAGE_SIZE):
+            chunk = missing[start:start + SERVICENOW_PAGE_SIZE]
+            url = f"https://{SERVICENOW_INSTANCE}/api/now/table/sys_user_group"
+            params = {
+                "sysparm_query": "sys_idIN" + ",".join(chunk),
+                "sysparm_fields": "sys_id,name",
+                "sysparm_limit": len(chunk),
+            }
+            self.stats["requests"] += 1
+            try:
+                response = requests.get(url, auth=(SERVICENOW_USERNAME, SERVICENOW_PASSWORD), headers={"Accept": "application/json"},
+                                        params=params, timeout=SERVICENOW_TIMEOUT)
+                groups = response.json().get("result", []) if response.status_code == 200 else None
+            except (requests.RequestException, ValueError) as e:
+                raise AssignmentGroupLookupError(f"Failed to resolve assignment groups: {e}")
+            if groups is None:
+                raise AssignmentGroupLookupError(
+                    f"Failed to resolve assignment groups. Status code: {response.status_code}, Response: {response.text}"
+                )
+            for group in groups:
+                self.remember(group.get("sys_id"), group.get("name"))
+                names[group.get("sys_id")] = group.get("name")
+        return names
+
+    def resolve(self, sys_id):
+        """
+        Return the name of one group ("" if unknown; raises AssignmentGroupLookupError like resolve_many).
+        """
+        return self.resolve_many([sys_id]).get(sys_id, "")
+
+
+assignment_groups = AssignmentGroupResolver()
+
+
+def group_sys_id(assignment_group_detail):
+    """
+    Return the sys_id of an incident's assignment_group field, with or without reference links.
+    """
+    if isinstance(assignment_group_detail, dict):
+        return assignment_group_detail.get("value", "")
+    return assignment_group_detail or ""
@@ -0,0 +1,171 @@
+"""
+Batched incident updates through the ServiceNow Batch API.
+"""
+import base64
+import json
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from servicenow import servicenow_session
+from settings import SERVICENOW_INSTANCE, SERVICENOW_TIMEOUT
+from settings import SERVICENOW_BATCH_API, SERVICENOW_BATCH_SIZE, SERVICENOW_WRITE_WORKERS
+
+BATCH_PATH = "/api/now/v1/batch"
+INCIDENT_PATH = "/api/now/table/incident/{sys_id}"
+
+# Answers meaning the instance has no Batch API for this user, rather than a failed batch;
+# any other error (a 400 for one malformed batch, a 5xx) only sends that batch one by one
+BATCH_UNAVAILABLE = (403, 404, 405)
+
+
+def _result(status_code, body=None, error=""):
+    """
+    Outcome of one incident update.
+    """
+    result = body.get("result") if isinstance(body, dict) else None
+    return {"ok": 200 <= status_code < 300, "status_code": status_code, "result": result, "error": error}
+
+
+class IncidentBatchWriter:
+    """
+    Collects incident updates and sends them in as few requests as possible.
+
+    Updates of the same incident are merged, and flush() sends them as
+    PATCH requests wrapped in /api/now/v1/batch calls of batch_size items.
+    Requests the instance does not service, and every update if the Batch
+    API is unavailable, are sent as individual PATCHes over concurrent
+    keep-alive sessions instead. flush() returns the outcome per sys_id.
+    """
+
+    def __init__(self, use_batch_api=SERVICENOW_BATCH_API, batch_size=SERVICENOW_BATCH_SIZE,
+                 workers=SERVICENOW_WRITE_WORKERS, instance=SERVICENOW_INSTANCE, scheme="https"):
+        self.use_batch_api = use_batch_api
+        self.batch_size = batch_size
+        self.workers = workers
+        self.base_url = f"{scheme}://{instance}"
+        self._pending = OrderedDict()
+        self._lock = threading.Lock()
+
+    def update(self, sys_id, fields):
+        """
+        Queue field updates for an incident, merged with any already queued.
+        """
+        with self._lock:
+            self._pending.setdefault(sys_id, {}).update(fields)
+
+    def assign(self, sys_id, assigned_to):
+        """
+        Queue the assignment of an incident (see servicenow.assign_incident).
+        """
+        self.update(sys_id, {"assigned_to": assigned_to, "state": 2})  # 2 -> Assigned
+
+    def move_status(self, sys_id, state):
+        """
+        Queue a state change of an incident (see servicenow.move_incident_status).
+        """
+        self.update(sys_id, {"state": state})
+
+    def flush(self):
+        """
+        Send the queued updates.
+
+        Returns:
+            dict: sys_id -> {"ok", "status_code", "result", "error"}
+        """
+        with self._lock:
+            updates = list(self._pending.items())
+            self._pending.clear()
+        results = {}
+        remaining = updates
+        if self.use_batch_api and updates:
+            remaining = []
+            for start in range(0, len(updates), self.batch_size):
+                serviced, unserviced = self._send_batch(updates[start:start + self.batch_size])
+                results.update(serviced)
+                remaining.extend(unserviced)
+                if not self.use_batch_api:
+                    # The endpoint is missing, so the other batches go one by one too
+                    remaining.extend(updates[start + self.batch_size:])
+                    break
+        if remaining:
+            results.update(self._send_concurrently(remaining))
+        return results
+
+    def _send_batch(self, chunk):
+        """
+        Send one Batch API request; returns (results, updates left unserviced).
+        """
+        requests_by_id = {}
+        rest_requests = []
+        for index, (sys_id, fields) in enumerate(chunk):
+            request_id = str(index)
+            requests_by_id[request_id] = (sys_id, fields)
+            rest_requests.append({
+                "id": request_id,
+                "method": "PATCH",
+                "url": INCIDENT_PATH.format(sys_id=sys_id),
+                "headers": [
+                    {"name": "Content-Type", "value": "application/json"},
+                    {"name": "Accept", "value": "application/json"},
+                ],
+                "body": base64.b64encode(json.dumps(fields).encode()).decode(),
+                "exclude_response_headers": True,
+            })
+        payload = {"batch_request_id": uuid.uuid4().hex, "rest_requests": rest_requests}
+
+        try:
+            response = servicenow_session().post(
+                self.base_url + BATCH_PATH, json=payload, headers={"Accept": "application/json"},
+                timeout=SERVICENOW_TIMEOUT,
+            )
+        except Exception as e:
+            print(f"ServiceNow batch request failed ({e}), sending the updates one by one")
+            return {}, chunk
+        if response.status_code in BATCH_UNAVAILABLE:
+            print(f"ServiceNow Batch API unavailable (status {response.status_code}), sending updates one by one")
+            self.use_batch_api = False
+            return {}, chunk
+        if response.status_code != 200:
+            print(f"ServiceNow batch request failed. Status code: {response.status_code}, Response: {response.text}")
+            return {}, chunk
+
+        try:
+            serviced_requests = response.json().get("serviced_requests", [])
+        except ValueError:
+            return {}, chunk
+        results = {}
+        for serviced in serviced_requests:
+            if serviced.get("id") not in requests_by_id:
+                continue
+            sys_id, _ = requests_by_id.pop(serviced["id"])
+            body = None
+            if serviced.get("body"):
+                try:
+                    body = json.loads(base64.b64decode(serviced["body"]))
+                except ValueError:
+                    body = None
+            results[sys_id] = _result(serviced.get("status_code", 0), body, serviced.get("error_message", ""))
+        # Whatever the instance did not service (unserviced_requests or missing) is sent again alone
+        return results, list(requests_by_id.values())
+
+    def _patch(self, sys_id, fields):
+        try:
+            response = servicenow_session().patch(
+                self.base_url + INCIDENT_PATH.format(sys_id=sys_id), json=fields,
+                headers={"Content-Type": "application/json", "Accept": "application/json"},
+                timeout=SERVICENOW_TIMEOUT,
+            )
+        except Exception as e:
+            return sys_id, _result(0, error=str(e))
+        try:
+            body = response.json()
+        except ValueError:
+            body = None
+        return sys_id, _result(response.status_code, body, "" if response.ok else response.text[:500])
+
+    def _send_concurrently(self, updates):
+        workers = max(1, min(self.workers, len(updates)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="servicenow-write") as executor:
+            return dict(executor.map(lambda update: self._patch(*update), updates))
@@ -5,8 +5,51 @@ from dotenv import load_dotenv
 load_dotenv()
 # MongoDB URI
 MONGO_URI = os.getenv("MONGO_URI")
+MONGO_DB_NAME = os.getenv("MONGO_DB_NAME", "platformManager")
+# Connections kept by the shared MongoClient and how long to wait for a server
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "20"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+# Assignment mapping kept in memory: followed with a change stream when the server has them, else reloaded every TTL seconds
+ASSIGNMENT_MAPPING_WATCH = os.getenv("ASSIGNMENT_MAPPING_WATCH", "true").lower() == "true"
+ASSIGNMENT_MAPPING_TTL = int(os.getenv("ASSIGNMENT_MAPPING_TTL", "60"))  # seconds
+
+# Documents fetched per round trip when iterating logs
+LOG_QUERY_BATCH_SIZE = int(os.getenv("LOG_QUERY_BATCH_SIZE", "1000"))
 
 # ServiceNow credentials
 SERVICENOW_INSTANCE = os.getenv("SERVICENOW_INSTANCE")
 SERVICENOW_USERNAME = os.getenv("SERVICENOW_USERNAME")
-SERVICENOW_PASSWORD = os.getenv("SERVICENOW_PASSWORD")
\ No newline at end of file
+SERVICENOW_PASSWORD = os.getenv("SERVICENOW_PASSWORD")
+
+# Incremental incident polling: only incidents updated since the saved watermark are fetched
+SERVICENOW_INCREMENTAL = os.getenv("SERVICENOW_INCREMENTAL", "true").lower() == "true"
+SERVICENOW_STATE_FILE = os.getenv("SERVICENOW_STATE_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "servicenow_state.json"))
+SERVICENOW_PAGE_SIZE = int(os.getenv("SERVICENOW_PAGE_SIZE", "100"))  # records per Table API request
+SERVICENOW_MAX_PAGES = int(os.getenv("SERVICENOW_MAX_PAGES", "50"))  # pages per cycle; the rest are fetched next cycle
+SERVICENOW_TIMEOUT = float(os.getenv("SERVICENOW_TIMEOUT", "30"))  # seconds
+
+# Incident updates sent through the Batch API, or concurrently when it is unavailable
+SERVICENOW_BATCH_API = os.getenv("SERVICENOW_BATCH_API", "true").lower() == "true"
+SERVICENOW_BATCH_SIZE = int(os.getenv("SERVICENOW_BATCH_SIZE", "50"))  # updates per batch request
+SERVICENOW_WRITE_WORKERS = int(os.getenv("SERVICENOW_WRITE_WORKERS", "8"))  # concurrent PATCHes without the Batch API
+
+# Assignment group names cached by sys_id
+ASSIGNMENT_GROUP_CACHE_TTL = int(os.getenv("ASSIGNMENT_GROUP_CACHE_TTL", "3600"))  # seconds
+ASSIGNMENT_GROUP_CACHE_SIZE = int(os.getenv("ASSIGNMENT_GROUP_CACHE_SIZE", "1000"))
+# Cycles an incident whose group cannot be resolved holds the watermark back before it is given up
+ASSIGNMENT_GROUP_MAX_RETRIES = int(os.getenv("ASSIGNMENT_GROUP_MAX_RETRIES", "5"))
+
+# Incident dispatch to the vertical agents
+DISPATCH_WORKERS = int(os.getenv("DISPATCH_WORKERS", "8"))  # deliveries running at once
+DISPATCH_PER_AGENT = int(os.getenv("DISPATCH_PER_AGENT", "2"))  # deliveries running at once against one agent
+AGENT_CONNECT_TIMEOUT = float(os.getenv("AGENT_CONNECT_TIMEOUT", "3.05"))  # seconds
+AGENT_READ_TIMEOUT = float(os.getenv("AGENT_READ_TIMEOUT", "30"))  # seconds
+
+# Outbox of deliveries to the agents, retried with exponential backoff
+OUTBOX_PATH = os.getenv("OUTBOX_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "outbox.sqlite3"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "10"))  # then the delivery is marked dead
+OUTBOX_RETRY_BASE = float(os.getenv("OUTBOX_RETRY_BASE", "10"))  # seconds before the first retry, doubled each attempt
+OUTBOX_RETRY_MAX = float(os.getenv("OUTBOX_RETRY_MAX", "1800"))  # longest wait between attempts, in seconds
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "200"))  # deliveries attempted per worker run
+OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", "5"))  # seconds between worker runs when nothing is queued
+OUTBOX_KEEP_DAYS = int(os.getenv("OUTBOX_KEEP_DAYS", "7"))  # delivered and dead rows kept this long
@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Document, Conversation, Message, Automation, Incident, DataSource, Dashboard, Log, KnowledgeBase
+from .utils.log_search import search_logs
+from .models import Document, Conversation, Message, Automation, Incident, DataSource, Dashboard, Log, LogTemplate, LogAnomaly, KnowledgeBase
 
 @admin.register(DataSource)
 class DataSourceAdmin(admin.ModelAdmin):
@@ -18,6 +19,27 @@ class LogAdmin(admin.ModelAdmin):
     list_display = ('level', 'source', 'message', 'timestamp')
     search_fields = ('message', 'source')
     list_filter = ('level', 'timestamp')
+    
+    def get_search_results(self, request, queryset, search_term):
+        # Search messages through the full-text index instead of LIKE '%term%'
+        if not search_term.strip():
+            return queryset, False
+        try:
+            return search_logs(queryset, search_term) | queryset.filter(source=search_term.strip()), False
+        except ValueError:
+            return super().get_search_results(request, queryset, search_term)
+
+@admin.register(LogTemplate)
+class LogTemplateAdmin(admin.ModelAdmin):
+    list_display = ('template', 'count', 'first_seen', 'last_seen')
+    search_fields = ('template',)
+    list_filter = ('last_seen',)
+
+@admin.register(LogAnomaly)
+class LogAnomalyAdmin(admin.ModelAdmin):
+    list_display = ('source', 'level', 'bucket_start', 'observed', 'expected', 'z_score', 'incident', 'detected_at')
+    list_filter = ('level', 'source', 'detected_at')
+    raw_id_fields = ('template', 'incident')
 
 @admin.register(Document)
 class DocumentAdmin(admin.ModelAdmin):
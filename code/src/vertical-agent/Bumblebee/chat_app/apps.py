@@ -1,6 +1,27 @@
 from django.apps import AppConfig
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_migrate
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """Let SQLite readers and the writer work concurrently (WAL) when serving many chat turns."""
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode=WAL;')
+            cursor.execute('PRAGMA synchronous=NORMAL;')
+
+
+def repair_log_search_index(sender, using, **kwargs):
+    """Reinstall the log full-text triggers if a migration rebuilt the log table."""
+    from .utils.log_search import ensure_fulltext_index
+    ensure_fulltext_index(connections[using])
 
 
 class ChatAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'chat_app'
+
+    def ready(self):
+        connection_created.connect(configure_sqlite)
+        post_migrate.connect(repair_log_search_index, sender=self)
@@ -0,0 +1,103 @@
+"""
+Benchmark the log template miner on synthetic telemetry.
+"""
+import itertools
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from chat_app.utils.log_templates import DrainMiner
+
+# Shapes of typical service logs; {} placeholders are filled with varying values
+MESSAGE_SHAPES = [
+    "GET /api/v1/orders/{id} returned {status} in {ms}ms",
+    "POST /api/v1/payments/{id}/capture returned {status} in {ms}ms",
+    "Connection to {host}:{port} timed out after {ms}ms",
+    "Connection reset by peer {host}",
+    "User {user} logged in from {ip}",
+    "User {user} logged out",
+    "Retrying request {id} attempt {n} of 5",
+    "Cache miss for key session:{id}",
+    "Cache hit for key session:{id}",
+    "Worker {n} picked up job {id} from queue {queue}",
+    "Job {id} completed in {ms}ms with {n} items",
+    "Job {id} failed: database is locked",
+    "Disk usage on {host} at {n}%",
+    "Health check passed for {host}",
+    "Slow query took {ms}ms: SELECT * FROM orders WHERE id = {id}",
+    "Incident {incident} assigned to group {queue}",
+    "Kafka consumer lag on partition {n} is {lag} messages",
+    "TLS handshake with {host} failed: certificate expired",
+    "Scaled deployment {queue} from {n} to {lag} replicas",
+    "Received SIGTERM, shutting down worker {n}",
+]
+
+USERS = ['alice', 'bob', 'carol', 'dave', 'erin', 'frank', 'svc-batch', 'svc-api']
+QUEUES = ['default', 'payments', 'emails', 'reports', 'network-ops', 'db-admins']
+SERVICES = ['billing', 'search', 'auth', 'orders', 'catalog', 'shipping', 'ledger', 'notify', 'profile', 'gateway']
+ROLES = ['api', 'worker', 'scheduler', 'consumer', 'proxy', 'cron', 'sync', 'admin', 'edge', 'batch']
+
+
+def synthetic_lines(count, shapes, seed=7):
+    """
+    Generate log messages from a set of shapes with random parameters.
+
+    Args:
+        count: Number of messages
+        shapes: Message shapes with {} placeholders
+        seed: Random seed, so runs are comparable
+
+    Returns:
+        list: Messages
+    """
+    rng = random.Random(seed)
+    lines = []
+    for _ in range(count):
+        shape = rng.choice(shapes)
+        lines.append(shape.format(
+            id=rng.randrange(10 ** 8),
+            status=rng.choice((200, 201, 404, 500, 503)),
+            ms=rng.randrange(1, 30000),
+            host=f"app-{rng.randrange(100):02d}.prod.internal",
+            port=rng.choice((5432, 6379, 9092, 443)),
+            user=rng.choice(USERS),
+            ip=f"10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(256)}",
+            n=rng.randrange(1, 64),
+            queue=rng.choice(QUEUES),
+            incident=f"INC{rng.randrange(10 ** 7):07d}",
+            lag=rng.randrange(100000)
+        ))
+    return lines
+
+
+class Command(BaseCommand):
+    help = 'Measure how many log lines per second the template miner processes on one core.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lines', type=int, default=200000, help='Number of synthetic log lines.')
+        parser.add_argument('--shapes', type=int, default=2000,
+                            help='Number of distinct message shapes, up to 2000.')
+        parser.add_argument('--min-rate', type=float, default=50000,
+                            help='Fail if fewer lines per second are processed.')
+
+    def handle(self, *args, **options):
+        # Prefix the built-in shapes with component names to get realistic template counts
+        components = [f"{service}-{role}" for service, role in itertools.product(SERVICES, ROLES)]
+        shapes = [f"[{component}] {shape}" for component in components for shape in MESSAGE_SHAPES][:options['shapes']]
+        lines = synthetic_lines(options['lines'], shapes)
+
+        miner = DrainMiner()
+        started = time.perf_counter()
+        for line in lines:
+            miner.add(line)
+        elapsed = time.perf_counter() - started
+
+        rate = len(lines) / elapsed if elapsed else float('inf')
+        self.stdout.write(
+            f"{len(lines)} lines, {len(shapes)} shapes -> {len(miner.clusters)} templates "
+            f"in {elapsed:.2f}s ({rate:,.0f} lines/s)"
+        )
+        if rate < options['min_rate']:
+            raise CommandError(f"Template mining ran at {rate:,.0f} lines/s, below the {options['min_rate']:,.0f} lines/s target")
+        self.stdout.write(self.style.SUCCESS(f"Above the {options['min_rate']:,.0f} lines/s target"))
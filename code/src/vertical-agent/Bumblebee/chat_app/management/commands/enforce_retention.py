@@ -0,0 +1,61 @@
+"""
+Archive and delete logs and conversations past their retention.
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from chat_app.utils.retention import enforce_retention
+
+
+class Command(BaseCommand):
+    help = (
+        'Archive logs and conversations older than LOG_RETENTION_DAYS / LOG_SOURCE_RETENTION_DAYS / '
+        'CONVERSATION_RETENTION_DAYS to gzipped NDJSON, then delete them in small batches.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only count the expired rows.')
+        parser.add_argument('--no-archive', action='store_true', help='Delete without writing archive files.')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.RETENTION_BATCH_SIZE,
+            help='Rows deleted per transaction.'
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=settings.RETENTION_BATCH_PAUSE,
+            help='Seconds to sleep between batches.'
+        )
+        parser.add_argument(
+            '--loop',
+            type=int,
+            default=0,
+            help='Keep running as a background job, enforcing retention every N seconds.'
+        )
+
+    def handle(self, *args, **options):
+        archive_dir = None if options['no_archive'] else settings.RETENTION_ARCHIVE_DIR or None
+        while True:
+            result = enforce_retention(
+                settings.LOG_RETENTION_DAYS,
+                settings.LOG_SOURCE_RETENTION_DAYS,
+                settings.CONVERSATION_RETENTION_DAYS,
+                batch_size=options['batch_size'],
+                pause=options['pause'],
+                archive_dir=archive_dir,
+                dry_run=options['dry_run']
+            )
+            verb = "Would delete" if options['dry_run'] else "Deleted"
+            for name, count in result["purged"].items():
+                self.stdout.write(f"{verb} {count} {name}")
+            for path in result["archives"]:
+                self.stdout.write(f"Archived to {path}")
+            self.stdout.write(self.style.SUCCESS("Retention enforced"))
+
+            if not options['loop']:
+                break
+            time.sleep(options['loop'])
@@ -0,0 +1,131 @@
+"""
+Print the database query plans of the queries behind the API endpoints.
+"""
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count, Max, Sum
+from django.db.models.functions import Substr
+from django.utils import timezone
+
+from chat_app.models import Conversation, Document, Incident, KnowledgeBase, Log, LogRollup, Message
+from chat_app.utils.log_search import search_logs
+
+
+def hot_queries():
+    """
+    Build the querysets the API endpoints run on every request.
+
+    Placeholder values stand in for request parameters; only the plans matter.
+
+    Returns:
+        list: (name, queryset) pairs
+    """
+    some_id = uuid.uuid4()
+    now = timezone.now()
+    return [
+        ('conversations: list page', Conversation.objects.order_by('-updated_at', '-id')[:51]),
+        ('conversations: next list page', Conversation.objects.filter(updated_at__lte=now).order_by('-updated_at', '-id')[:51]),
+        ('conversation_detail: messages', Message.objects.filter(conversation_id=some_id).order_by('created_at')),
+        ('conversation_detail: etag', Conversation.objects.filter(pk=some_id).annotate(
+            message_count=Count('messages'), last_message_at=Max('messages__created_at')
+        ).values_list('title', 'updated_at', 'message_count', 'last_message_at')),
+        ('messages: history window', Message.objects.filter(conversation_id=some_id).order_by('-created_at')[:5]),
+        ('messages: since', Message.objects.filter(conversation_id=some_id, created_at__gt=now).order_by('created_at')),
+        ('documents: list page', Document.objects.only('id', 'title', 'file', 'file_type', 'uploaded_at').order_by('-uploaded_at', '-id')[:51]),
+        ('incidents: list page', Incident.objects.defer('long_description', 'comments').order_by('-created_at', '-id')[:51]),
+        ('incidents: by number', Incident.objects.filter(incident_number='INC0000000')),
+        ('incidents: by state', Incident.objects.filter(state=1).order_by('-created_at')[:51]),
+        ('incidents: by priority', Incident.objects.filter(priority=1).order_by('-created_at')[:51]),
+        ('logs: latest', Log.objects.order_by('-timestamp', '-id')[:101]),
+        ('logs: next page', Log.objects.filter(timestamp__lte=now).exclude(timestamp=now, id__gte=some_id).order_by('-timestamp', '-id')[:101]),
+        ('logs: by level', Log.objects.filter(level='error').order_by('-timestamp', '-id')[:101]),
+        ('logs: by source', Log.objects.filter(source='api').order_by('-timestamp', '-id')[:101]),
+        ('logs: time window', Log.objects.filter(timestamp__gte=now, timestamp__lt=now).order_by('-timestamp', '-id')[:101]),
+        ('logs: by template', Log.objects.filter(template_id=some_id).order_by('-timestamp', '-id')[:101]),
+        ('logs: full-text search', search_logs(Log.objects.all(), '"connection reset" timeou*').order_by('-timestamp', '-id')[:101]),
+        ('logs: export', Log.objects.filter(level='error', timestamp__gte=now).order_by('timestamp', 'id').values_list('id', 'timestamp', 'level', 'source', 'message')),
+        ('logs: histogram', LogRollup.objects.filter(granularity='minute', bucket__gte=now, bucket__lt=now).values(
+            'bucket', 'level'
+        ).annotate(total=Sum('count')).order_by('bucket', 'level')),
+        ('knowledge_base: list page', KnowledgeBase.objects.defer('content').annotate(
+            preview=Substr('content', 1, 100)
+        ).order_by('-updated_at', '-id')[:51]),
+    ]
+
+
+def plan_problems(vendor, plan):
+    """
+    Find plan steps that read a whole table or sort it.
+
+    Args:
+        vendor: Database vendor, 'sqlite' or 'postgresql'
+        plan: Output of QuerySet.explain()
+
+    Returns:
+        list: Offending plan lines
+    """
+    problems = []
+    # Full-text matches come out of the FTS index unordered; sorting just the matches is expected
+    sorts_matches_only = 'VIRTUAL TABLE' in plan
+    for line in plan.splitlines():
+        step = line.strip(' |-`')
+        if vendor == 'sqlite':
+            if step.startswith('SCAN ') and 'INDEX' not in step:
+                problems.append(step)
+            elif 'USE TEMP B-TREE' in step and not sorts_matches_only:
+                problems.append(step)
+        elif vendor == 'postgresql':
+            if 'Seq Scan' in step:
+                problems.append(step)
+    return problems
+
+
+class Command(BaseCommand):
+    help = 'Print the SQLite/Postgres query plans of the API endpoint queries so missing indexes are visible.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Exit with an error if a plan scans or sorts a whole table instead of using an index.'
+        )
+        parser.add_argument(
+            '--sql',
+            action='store_true',
+            help='Also print the SQL of each query.'
+        )
+
+    def handle(self, *args, **options):
+        vendor = connection.vendor
+        if vendor not in ('sqlite', 'postgresql'):
+            raise CommandError(f"Query plans are only supported for SQLite and PostgreSQL, not {vendor}")
+
+        if vendor == 'postgresql' and options['check']:
+            # Small tables make a sequential scan the cheapest plan; disable it so
+            # a remaining Seq Scan really means no usable index
+            with connection.cursor() as cursor:
+                cursor.execute('SET enable_seqscan = off')
+
+        failures = []
+        for name, queryset in hot_queries():
+            plan = queryset.explain()
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            if options['sql']:
+                self.stdout.write(str(queryset.query))
+            self.stdout.write(plan)
+            self.stdout.write('')
+
+            problems = plan_problems(vendor, plan)
+            if problems:
+                failures.append((name, problems))
+
+        if not failures:
+            self.stdout.write(self.style.SUCCESS(f"All {len(hot_queries())} hot queries use indexes ({vendor})"))
+            return
+
+        for name, problems in failures:
+            self.stdout.write(self.style.WARNING(f"{name}: {'; '.join(problems)}"))
+        if options['check']:
+            raise CommandError(f"{len(failures)} hot queries scan or sort a whole table")
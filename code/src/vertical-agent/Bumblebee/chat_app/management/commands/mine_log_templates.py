@@ -0,0 +1,36 @@
+"""
+Assign templates to logs saved before template mining was enabled.
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from chat_app.models import Log
+from chat_app.views import log_template_miner
+
+
+class Command(BaseCommand):
+    help = 'Mine templates for logs that do not have one yet, oldest first, in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000, help='Logs mined and updated per transaction.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        total = 0
+        last = None
+        while True:
+            queryset = Log.objects.filter(template__isnull=True).only('id', 'message', 'timestamp').order_by('timestamp', 'id')
+            if last is not None:
+                queryset = queryset.filter(timestamp__gte=last.timestamp).exclude(timestamp=last.timestamp, id__lte=last.id)
+            batch = list(queryset[:batch_size])
+            if not batch:
+                break
+
+            with transaction.atomic():
+                log_template_miner.enrich(batch)
+                Log.objects.bulk_update(batch, ['template', 'params'], batch_size=500)
+            total += len(batch)
+            last = batch[-1]
+            self.stdout.write(f"Mined {total} logs")
+
+        self.stdout.write(self.style.SUCCESS(f"Assigned templates to {total} logs"))
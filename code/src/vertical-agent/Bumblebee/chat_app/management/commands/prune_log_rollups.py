@@ -0,0 +1,33 @@
+"""
+Downsample log rollups by deleting buckets past their retention.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from chat_app.utils.log_rollups import prune_rollups, rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Delete minute/hour/day log rollups older than LOG_ROLLUP_RETENTION_DAYS; optionally rebuild recent ones from the logs first.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild-days',
+            type=int,
+            default=0,
+            help='Recompute the rollups of the last N days from the Log table (backfill or repair).'
+        )
+
+    def handle(self, *args, **options):
+        if options['rebuild_days']:
+            start = timezone.now() - timedelta(days=options['rebuild_days'])
+            written = rebuild_rollups(start)
+            self.stdout.write(f"Rebuilt {written} rollup rows for the last {options['rebuild_days']} days")
+
+        deleted = prune_rollups(settings.LOG_ROLLUP_RETENTION_DAYS)
+        for granularity, count in deleted.items():
+            self.stdout.write(f"Deleted {count} {granularity} rollups older than {settings.LOG_ROLLUP_RETENTION_DAYS[granularity]} days")
+        self.stdout.write(self.style.SUCCESS("Log rollups pruned"))
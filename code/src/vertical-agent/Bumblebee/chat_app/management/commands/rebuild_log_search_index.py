@@ -0,0 +1,25 @@
+"""
+Rebuild the full-text index over log messages.
+"""
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from chat_app.utils.log_search import ensure_fulltext_index, install_fulltext_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the log full-text index, e.g. after a SQLite VACUUM renumbered the log rowids.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database',
+            default=DEFAULT_DB_ALIAS,
+            help='Database to rebuild the index in.'
+        )
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if not ensure_fulltext_index(connection, rebuild=True):
+            # Not installed yet, or PostgreSQL, where the index cannot drift
+            install_fulltext_index(connection)
+        self.stdout.write(self.style.SUCCESS(f"Log full-text index rebuilt ({connection.vendor})"))
@@ -0,0 +1,39 @@
+"""
+Copy new logs from the MongoDB logs collection into the Log table.
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from chat_app.utils.log_sync import MongoLogSync, LogSyncError
+from chat_app.views import log_ingestor
+
+
+class Command(BaseCommand):
+    help = 'Sync logs added to MongoDB since the last run (LOG_SYNC_* settings); --follow keeps running.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--follow', action='store_true', help='Keep syncing, from a change stream if available, else by polling.')
+        parser.add_argument('--poll', action='store_true', help='With --follow, poll instead of trying a change stream.')
+        parser.add_argument('--batch-size', type=int, default=settings.LOG_SYNC_BATCH_SIZE, help='Documents read and saved per batch.')
+        parser.add_argument('--name', default='mongo-logs', help='Name of the watermark, to run several syncs side by side.')
+
+    def handle(self, *args, **options):
+        sync = MongoLogSync(
+            log_ingestor,
+            settings.LOG_SYNC_MONGO_URI,
+            database=settings.LOG_SYNC_MONGO_DB,
+            collection=settings.LOG_SYNC_MONGO_COLLECTION,
+            name=options['name'],
+            batch_size=options['batch_size'],
+            default_source=settings.LOG_SYNC_DEFAULT_SOURCE
+        )
+        try:
+            if options['follow']:
+                sync.follow(poll_interval=settings.LOG_SYNC_POLL_INTERVAL, use_change_stream=not options['poll'])
+                return
+            result = sync.sync()
+        except LogSyncError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(f"Synced {result['synced']} logs in {result['batches']} batches")
+        self.stdout.write(self.style.SUCCESS(f"Watermark: {result['last_timestamp']} {result['last_id']}"))
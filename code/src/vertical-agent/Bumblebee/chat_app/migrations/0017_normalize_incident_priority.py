@@ -0,0 +1,43 @@
+# Normalises Incident.priority to "1".."5" before it becomes an IntegerField
+
+import re
+
+from django.db import migrations
+
+PRIORITY_NAMES = {
+    "critical": 1,
+    "high": 2,
+    "medium": 3,
+    "moderate": 3,
+    "low": 4,
+    "very low": 5,
+    "planning": 5,
+}
+
+
+def priority_number(value):
+    """Map a stored priority such as "2", "2 - High" or "High" to 1..5."""
+    text = str(value or "").strip().lower()
+    match = re.match(r"\d+", text)
+    if match:
+        return min(max(int(match.group()), 1), 5)
+    return PRIORITY_NAMES.get(text, 5)
+
+
+def normalize_priority(apps, schema_editor):
+    Incident = apps.get_model("chat_app", "Incident")
+    for incident in Incident.objects.only("id", "priority").iterator():
+        normalized = str(priority_number(incident.priority))
+        if incident.priority != normalized:
+            Incident.objects.filter(pk=incident.pk).update(priority=normalized)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat_app", "0016_message_conv_created_idx"),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_priority, migrations.RunPython.noop),
+    ]
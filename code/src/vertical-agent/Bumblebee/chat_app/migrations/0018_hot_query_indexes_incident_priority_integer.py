@@ -0,0 +1,86 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat_app", "0017_normalize_incident_priority"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="incident",
+            name="incident_number",
+            field=models.CharField(db_index=True, max_length=50),
+        ),
+        migrations.AlterField(
+            model_name="incident",
+            name="priority",
+            field=models.IntegerField(
+                choices=[
+                    (1, "Critical"),
+                    (2, "High"),
+                    (3, "Medium"),
+                    (4, "Low"),
+                    (5, "Very Low"),
+                ],
+                default=5,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="conversation",
+            index=models.Index(
+                fields=["-updated_at", "-id"], name="conversation_updated_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="document",
+            index=models.Index(
+                fields=["-uploaded_at", "-id"], name="document_uploaded_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="incident",
+            index=models.Index(
+                fields=["-created_at", "-id"], name="incident_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="incident",
+            index=models.Index(
+                fields=["state", "-created_at"], name="incident_state_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="incident",
+            index=models.Index(
+                fields=["priority", "-created_at"], name="incident_priority_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="knowledgebase",
+            index=models.Index(
+                fields=["-updated_at", "-id"], name="knowledgebase_updated_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="log",
+            index=models.Index(
+                fields=["-timestamp"], name="log_timestamp_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="log",
+            index=models.Index(
+                fields=["level", "-timestamp"], name="log_level_timestamp_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="log",
+            index=models.Index(
+                fields=["source", "-timestamp"], name="log_source_timestamp_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:25
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat_app", "0018_hot_query_indexes_incident_priority_integer"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="log",
+            name="timestamp",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
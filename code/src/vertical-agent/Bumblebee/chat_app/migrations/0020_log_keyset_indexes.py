@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat_app", "0019_log_timestamp_default"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="log",
+            name="log_timestamp_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="log",
+            name="log_level_timestamp_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="log",
+            name="log_source_timestamp_idx",
+        ),
+        migrations.AddIndex(
+            model_name="log",
+            index=models.Index(
+                fields=["-timestamp", "-id"], name="log_timestamp_id_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="log",
+            index=models.Index(
+                fields=["level", "-timestamp", "-id"], name="log_level_timestamp_id_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="log",
+            index=models.Index(
+                fields=["source", "-timestamp", "-id"],
+                name="log_source_timestamp_id_idx",
+            ),
+        ),
+    ]
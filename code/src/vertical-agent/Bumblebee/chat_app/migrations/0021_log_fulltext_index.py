@@ -0,0 +1,68 @@
+# Full-text index over Log.message: an FTS5 table kept in sync by triggers on
+# SQLite, a GIN index on to_tsvector('simple', message) on PostgreSQL.
+# chat_app.utils.log_search reinstalls the SQLite triggers after table rebuilds.
+
+from django.db import migrations
+
+SQLITE_INSTALL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS chat_app_log_fts"
+    " USING fts5(message, content='chat_app_log', tokenize='unicode61')",
+    """CREATE TRIGGER IF NOT EXISTS chat_app_log_fts_ai AFTER INSERT ON chat_app_log BEGIN
+        INSERT INTO chat_app_log_fts(rowid, message) VALUES (new.rowid, new.message);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS chat_app_log_fts_ad AFTER DELETE ON chat_app_log BEGIN
+        INSERT INTO chat_app_log_fts(chat_app_log_fts, rowid, message)
+        VALUES ('delete', old.rowid, old.message);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS chat_app_log_fts_au AFTER UPDATE OF message ON chat_app_log BEGIN
+        INSERT INTO chat_app_log_fts(chat_app_log_fts, rowid, message)
+        VALUES ('delete', old.rowid, old.message);
+        INSERT INTO chat_app_log_fts(rowid, message) VALUES (new.rowid, new.message);
+    END""",
+    "INSERT INTO chat_app_log_fts(chat_app_log_fts) VALUES ('rebuild')",
+]
+
+SQLITE_UNINSTALL = [
+    "DROP TRIGGER IF EXISTS chat_app_log_fts_ai",
+    "DROP TRIGGER IF EXISTS chat_app_log_fts_ad",
+    "DROP TRIGGER IF EXISTS chat_app_log_fts_au",
+    "DROP TABLE IF EXISTS chat_app_log_fts",
+]
+
+POSTGRES_INSTALL = [
+    "CREATE INDEX IF NOT EXISTS log_message_fts_idx"
+    " ON chat_app_log USING GIN (to_tsvector('simple', message))",
+]
+
+POSTGRES_UNINSTALL = [
+    "DROP INDEX IF EXISTS log_message_fts_idx",
+]
+
+
+def run_for_vendor(schema_editor, statements_by_vendor):
+    statements = statements_by_vendor.get(schema_editor.connection.vendor, [])
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def install_fulltext_index(apps, schema_editor):
+    run_for_vendor(
+        schema_editor, {"sqlite": SQLITE_INSTALL, "postgresql": POSTGRES_INSTALL}
+    )
+
+
+def uninstall_fulltext_index(apps, schema_editor):
+    run_for_vendor(
+        schema_editor, {"sqlite": SQLITE_UNINSTALL, "postgresql": POSTGRES_UNINSTALL}
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat_app", "0020_log_keyset_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(install_fulltext_index, uninstall_fulltext_index),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:33
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat_app", "0021_log_fulltext_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="log",
+            name="params",
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name="LogTemplate",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("template", models.TextField()),
+                ("token_count", models.PositiveIntegerField()),
+                ("count", models.BigIntegerField(default=0)),
+                (
+                    "first_seen",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                (
+                    "last_seen",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["-count"], name="logtemplate_count_idx"),
+                    models.Index(
+                        fields=["-last_seen"], name="logtemplate_last_seen_idx"
+                    ),
+                ],
+            },
+        ),
+        migrations.AddField(
+            model_name="log",
+            name="template",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="logs",
+                to="chat_app.logtemplate",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="log",
+            index=models.Index(
+                fields=["template", "-timestamp", "-id"],
+                name="log_template_timestamp_id_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat_app", "0022_log_templates"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LogRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "granularity",
+                    models.CharField(
+                        choices=[
+                            ("minute", "Minute"),
+                            ("hour", "Hour"),
+                            ("day", "Day"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("bucket", models.DateTimeField()),
+                ("level", models.CharField(max_length=20)),
+                ("source", models.CharField(max_length=100)),
+                ("count", models.BigIntegerField(default=0)),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("granularity", "bucket", "level", "source"),
+                        name="logrollup_bucket_unique",
+                    )
+                ],
+            },
+        ),
+    ]
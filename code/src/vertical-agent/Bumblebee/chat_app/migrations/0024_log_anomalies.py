@@ -0,0 +1,71 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:40
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat_app", "0023_log_rollups"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LogAnomaly",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("source", models.CharField(max_length=100)),
+                ("level", models.CharField(max_length=20)),
+                ("bucket_start", models.DateTimeField()),
+                ("observed", models.BigIntegerField()),
+                ("expected", models.FloatField()),
+                ("z_score", models.FloatField()),
+                (
+                    "detected_at",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                (
+                    "incident",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="log_anomalies",
+                        to="chat_app.incident",
+                    ),
+                ),
+                (
+                    "template",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="anomalies",
+                        to="chat_app.logtemplate",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["-detected_at", "-id"], name="loganomaly_detected_idx"
+                    ),
+                    models.Index(
+                        fields=["source", "level", "-detected_at"],
+                        name="loganomaly_key_detected_idx",
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat_app", "0024_log_anomalies"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LogSyncState",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=100, unique=True)),
+                ("last_timestamp", models.DateTimeField(blank=True, null=True)),
+                ("last_id", models.CharField(blank=True, default="", max_length=64)),
+                ("synced", models.BigIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="log",
+            name="external_id",
+            field=models.CharField(blank=True, max_length=64, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat_app", "0025_log_sync"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="incident",
+            name="idempotency_key",
+            field=models.CharField(
+                blank=True, max_length=100, null=True, unique=True
+            ),
+        ),
+    ]
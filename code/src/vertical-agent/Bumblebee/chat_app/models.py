@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 import os
 import uuid
 
@@ -32,6 +33,11 @@ class Document(models.Model):
     vector_id = models.CharField(max_length=100, blank=True, null=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['-uploaded_at', '-id'], name='document_uploaded_idx'),
+        ]
+
     def __str__(self):
         return self.title
 
@@ -73,6 +79,12 @@ class Conversation(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Conversation list, newest first, paginated by (updated_at, id)
+            models.Index(fields=['-updated_at', '-id'], name='conversation_updated_idx'),
+        ]
+
     def __str__(self):
         return self.title
 
@@ -91,6 +103,10 @@ class Message(models.Model):
 
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            # Serves the recent-history window: newest messages of one conversation
+            models.Index(fields=['conversation', 'created_at'], name='message_conv_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.role}: {self.content[:50]}..."
@@ -132,16 +148,27 @@ class Incident(models.Model):
     ]
     
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    incident_number = models.CharField(max_length=50)
+    # Looked up by number when incidents are synced from ServiceNow
+    incident_number = models.CharField(max_length=50, db_index=True)
     sys_id = models.CharField(max_length=50, blank=True, null=True)
-    priority = models.CharField(choices=PRIORITY_CHOICES, default=5, max_length=20)
+    priority = models.IntegerField(choices=PRIORITY_CHOICES, default=5)
     short_description = models.CharField(max_length=255)
     long_description = models.TextField()
     state = models.IntegerField(choices=STATE_CHOICES, default=1)
     comments = models.TextField(blank=True, null=True)
+    # Idempotency-Key of the delivery that created the incident, so retried deliveries are not duplicated
+    idempotency_key = models.CharField(max_length=100, unique=True, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Incident list, newest first, paginated by (created_at, id)
+            models.Index(fields=['-created_at', '-id'], name='incident_created_idx'),
+            models.Index(fields=['state', '-created_at'], name='incident_state_created_idx'),
+            models.Index(fields=['priority', '-created_at'], name='incident_priority_created_idx'),
+        ]
+
     def __str__(self):
         return f"{self.incident_number} - {self.short_description}"
         
@@ -157,17 +184,110 @@ class Dashboard(models.Model):
     def __str__(self):
         return self.name
         
+class LogTemplate(models.Model):
+    """Model for message templates mined from logs, with variable parts replaced by <*>."""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    template = models.TextField()
+    token_count = models.PositiveIntegerField()
+    count = models.BigIntegerField(default=0)  # logs assigned to the template
+    first_seen = models.DateTimeField(default=timezone.now)
+    last_seen = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['-count'], name='logtemplate_count_idx'),
+            models.Index(fields=['-last_seen'], name='logtemplate_last_seen_idx'),
+        ]
+    
+    def __str__(self):
+        return self.template[:80]
+
 class Log(models.Model):
     """Model for storing system logs."""
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     message = models.TextField()
     level = models.CharField(max_length=20)  # info, warning, error
     source = models.CharField(max_length=100)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Set when the record is created, not when it is saved, so buffered bulk writes keep the event time
+    timestamp = models.DateTimeField(default=timezone.now)
+    # Mined at ingestion: the template's <*> tokens filled with params give the message.
+    # A template generalized later has more <*> tokens than the params of its older logs.
+    template = models.ForeignKey(LogTemplate, on_delete=models.SET_NULL, null=True, blank=True, related_name='logs')
+    params = models.JSONField(null=True, blank=True)
+    # ID of the record in an external store the log was synced from (e.g. a MongoDB _id)
+    external_id = models.CharField(max_length=64, unique=True, null=True, blank=True)
+    
+    class Meta:
+        indexes = [
+            # Log list and export, keyset-paginated on (timestamp, id), optionally filtered by level or source
+            models.Index(fields=['-timestamp', '-id'], name='log_timestamp_id_idx'),
+            models.Index(fields=['level', '-timestamp', '-id'], name='log_level_timestamp_id_idx'),
+            models.Index(fields=['source', '-timestamp', '-id'], name='log_source_timestamp_id_idx'),
+            # Logs of one template in a time window
+            models.Index(fields=['template', '-timestamp', '-id'], name='log_template_timestamp_id_idx'),
+        ]
     
     def __str__(self):
         return f"{self.level}: {self.message[:50]}..."
 
+class LogRollup(models.Model):
+    """Model for log counts per time bucket, level and source, kept current as logs are written."""
+    GRANULARITY_CHOICES = [
+        ('minute', 'Minute'),
+        ('hour', 'Hour'),
+        ('day', 'Day'),
+    ]
+    
+    granularity = models.CharField(max_length=10, choices=GRANULARITY_CHOICES)
+    bucket = models.DateTimeField()  # start of the bucket, UTC
+    level = models.CharField(max_length=20)
+    source = models.CharField(max_length=100)
+    count = models.BigIntegerField(default=0)
+    
+    class Meta:
+        constraints = [
+            # Also serves histogram range reads on (granularity, bucket)
+            models.UniqueConstraint(fields=['granularity', 'bucket', 'level', 'source'], name='logrollup_bucket_unique'),
+        ]
+    
+    def __str__(self):
+        return f"{self.granularity} {self.bucket:%Y-%m-%d %H:%M} {self.level}/{self.source}: {self.count}"
+
+class LogSyncState(models.Model):
+    """Model for the high-water mark of an incremental log sync from an external store."""
+    name = models.CharField(max_length=100, unique=True)
+    # Position of the last synced record in (timestamp, id) order
+    last_timestamp = models.DateTimeField(null=True, blank=True)
+    last_id = models.CharField(max_length=64, blank=True, default='')
+    synced = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name}: {self.synced} synced up to {self.last_timestamp}"
+
+class LogAnomaly(models.Model):
+    """Model for log rate spikes found by online anomaly detection."""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    source = models.CharField(max_length=100)
+    level = models.CharField(max_length=20)
+    template = models.ForeignKey(LogTemplate, on_delete=models.SET_NULL, null=True, blank=True, related_name='anomalies')
+    bucket_start = models.DateTimeField()
+    observed = models.BigIntegerField()  # logs in the bucket when it was flagged
+    expected = models.FloatField()  # average logs per bucket before it
+    z_score = models.FloatField()
+    incident = models.ForeignKey(Incident, on_delete=models.SET_NULL, null=True, blank=True, related_name='log_anomalies')
+    detected_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-detected_at', '-id'], name='loganomaly_detected_idx'),
+            # Incident cooldown lookups per key
+            models.Index(fields=['source', 'level', '-detected_at'], name='loganomaly_key_detected_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.level}/{self.source} {self.bucket_start:%Y-%m-%d %H:%M}: {self.observed} (expected {self.expected:.1f}, z={self.z_score:.1f})"
+
 class KnowledgeBase(models.Model):
     """Model for knowledge base entries that are processed into the vector store."""
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -179,6 +299,11 @@ class KnowledgeBase(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['-updated_at', '-id'], name='knowledgebase_updated_idx'),
+        ]
+    
     def __str__(self):
         return self.title
     
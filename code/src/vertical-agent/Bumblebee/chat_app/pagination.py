@@ -0,0 +1,45 @@
+"""
+Cursor pagination for the list API endpoints.
+"""
+from rest_framework.pagination import CursorPagination
+
+
+class ListCursorPagination(CursorPagination):
+    """
+    Cursor pagination for list endpoints.
+
+    Each page is read with a LIMIT from the position encoded in the cursor,
+    so a page costs the same however many rows the table holds.
+    Responses have the shape {"next": url, "previous": url, "results": [...]}.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+    def __init__(self, ordering):
+        """
+        Initialize the paginator.
+
+        Args:
+            ordering: Field (or fields) the list is ordered by, e.g. '-created_at'
+        """
+        self.ordering = ordering
+
+
+def paginated_response(request, queryset, serializer_class, ordering):
+    """
+    Serialize one cursor page of a queryset.
+
+    Args:
+        request: DRF request carrying the cursor and page_size query parameters
+        queryset: Queryset to paginate, without an ordering of its own
+        serializer_class: Serializer for the items on the page
+        ordering: Field (or fields) to order and paginate by
+
+    Returns:
+        Response: Paginated response with next/previous links and results
+    """
+    paginator = ListCursorPagination(ordering)
+    page = paginator.paginate_queryset(queryset, request)
+    serializer = serializer_class(page, many=True)
+    return paginator.get_paginated_response(serializer.data)
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Document, Conversation, Message, Automation, Incident, DataSource, Dashboard, Log, KnowledgeBase
+from .models import Document, Conversation, Message, Automation, Incident, DataSource, Dashboard, Log, LogTemplate, LogAnomaly, KnowledgeBase
 
 class DataSourceSerializer(serializers.ModelSerializer):
     class Meta:
@@ -16,8 +16,21 @@ class DashboardSerializer(serializers.ModelSerializer):
 class LogSerializer(serializers.ModelSerializer):
     class Meta:
         model = Log
-        fields = ['id', 'message', 'level', 'source', 'timestamp']
-        read_only_fields = ['id', 'timestamp']
+        fields = ['id', 'message', 'level', 'source', 'timestamp', 'template', 'params']
+        read_only_fields = ['id', 'timestamp', 'template', 'params']
+
+class LogTemplateSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = LogTemplate
+        fields = ['id', 'template', 'token_count', 'count', 'first_seen', 'last_seen']
+
+class LogAnomalySerializer(serializers.ModelSerializer):
+    template_text = serializers.CharField(source='template.template', read_only=True, default=None)
+
+    class Meta:
+        model = LogAnomaly
+        fields = ['id', 'source', 'level', 'template', 'template_text', 'bucket_start', 'observed', 'expected', 'z_score', 'incident', 'detected_at']
+        read_only_fields = fields
 
 class DocumentSerializer(serializers.ModelSerializer):
     class Meta:
@@ -38,6 +51,13 @@ class ConversationSerializer(serializers.ModelSerializer):
         fields = ['id', 'title', 'created_at', 'updated_at', 'messages']
         read_only_fields = ['id', 'created_at', 'updated_at']
 
+class ConversationListSerializer(serializers.ModelSerializer):
+    """Conversation without its messages, for the conversation list."""
+    class Meta:
+        model = Conversation
+        fields = ['id', 'title', 'created_at', 'updated_at']
+        read_only_fields = fields
+
 class AutomationSerializer(serializers.ModelSerializer):
     class Meta:
         model = Automation
@@ -45,14 +65,34 @@ class AutomationSerializer(serializers.ModelSerializer):
 
 class IncidentSerializer(serializers.ModelSerializer):
     state_display = serializers.CharField(source='get_state_display', read_only=True)
+    priority_display = serializers.CharField(source='get_priority_display', read_only=True)
     
     class Meta:
         model = Incident
-        fields = ['id', 'incident_number', 'sys_id', 'priority', 'short_description', 'long_description', 'state', 'state_display', 'comments', 'created_at', 'updated_at']
+        fields = ['id', 'incident_number', 'sys_id', 'priority', 'priority_display', 'short_description', 'long_description', 'state', 'state_display', 'comments', 'created_at', 'updated_at']
         read_only_fields = ['id', 'created_at', 'updated_at']
 
+class IncidentListSerializer(serializers.ModelSerializer):
+    """Incident without the long description and comments, for the incident list."""
+    state_display = serializers.CharField(source='get_state_display', read_only=True)
+    priority_display = serializers.CharField(source='get_priority_display', read_only=True)
+    
+    class Meta:
+        model = Incident
+        fields = ['id', 'incident_number', 'sys_id', 'priority', 'priority_display', 'short_description', 'state', 'state_display', 'created_at', 'updated_at']
+        read_only_fields = fields
+
 class KnowledgeBaseSerializer(serializers.ModelSerializer):
     class Meta:
         model = KnowledgeBase
         fields = ['id', 'title', 'content', 'category', 'tags', 'created_at', 'updated_at']
         read_only_fields = ['id', 'created_at', 'updated_at']
+
+class KnowledgeBaseListSerializer(serializers.ModelSerializer):
+    """Knowledge base entry with a short preview instead of the content body, for the entry list."""
+    preview = serializers.CharField(read_only=True)
+    
+    class Meta:
+        model = KnowledgeBase
+        fields = ['id', 'title', 'preview', 'category', 'tags', 'created_at', 'updated_at']
+        read_only_fields = fields
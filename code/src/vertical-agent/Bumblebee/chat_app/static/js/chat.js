@@ -3,6 +3,8 @@
 // Global state
 let currentIncidentId = null;
 let currentConversationId = null;
+// ID of the newest message shown for the current conversation, used to fetch only newer messages
+let lastMessageId = null;
 
 // Helper function to get CSRF token
 function getCSRFToken() {
@@ -40,43 +42,90 @@ function showNotification(message, type = 'info') {
     }, 3000);
 }
 
-// Function to load conversations
-async function loadConversations() {
+// Helper function to fetch one page of a cursor-paginated list endpoint ({next, previous, results})
+async function fetchPage(url) {
+    const response = await fetch(url);
+    if (!response.ok) {
+        throw new Error(`Network response was not ok: ${response.status} ${response.statusText}`);
+    }
+    return response.json();
+}
+
+// Helper function to add a button under a paged list that loads its next page
+function appendLoadMoreButton(container, label, loadNextPage) {
+    const button = document.createElement('button');
+    button.className = 'load-more';
+    button.textContent = label;
+    button.addEventListener('click', (e) => {
+        e.stopPropagation();
+        button.disabled = true;
+        loadNextPage();
+    });
+    container.appendChild(button);
+}
+
+// Function to render conversation list items
+function renderConversationItems(conversations) {
+    let html = '';
+    conversations.forEach(conv => {
+        html += `
+            <div class="conversation-item${conv.id === currentConversationId ? ' active' : ''}" data-id="${conv.id}">
+                <div class="conversation-title">${conv.title}</div>
+                <div class="conversation-date">${new Date(conv.updated_at).toLocaleString()}</div>
+            </div>
+        `;
+    });
+    return html;
+}
+
+// Function to load conversations, one page at a time (pass the next page URL to append older ones)
+async function loadConversations(pageUrl = null) {
     try {
-        const response = await fetch('/api/conversations/');
+        const response = await fetch(pageUrl || '/api/conversations/');
         if (!response.ok) {
             throw new Error('Failed to load conversations');
         }
 
-        const conversations = await response.json();
+        const page = await response.json();
+        const conversations = page.results;
         const conversationsList = document.getElementById('conversations-list');
         if (!conversationsList) return;
 
-        if (conversations.length === 0) {
+        const existingLoadMore = conversationsList.querySelector('.load-more-conversations');
+        if (existingLoadMore) {
+            existingLoadMore.remove();
+        }
+
+        if (!pageUrl && conversations.length === 0) {
             conversationsList.innerHTML = '<div class="empty-state">No conversations yet</div>';
             return;
         }
 
-        let html = '';
-        conversations.forEach(conv => {
-            html += `
-                <div class="conversation-item" data-id="${conv.id}">
-                    <div class="conversation-title">${conv.title}</div>
-                    <div class="conversation-date">${new Date(conv.updated_at).toLocaleString()}</div>
-                </div>
-            `;
-        });
+        let html = renderConversationItems(conversations);
+        if (page.next) {
+            html += '<button class="load-more-conversations">Load older conversations</button>';
+        }
 
-        conversationsList.innerHTML = html;
+        if (pageUrl) {
+            conversationsList.insertAdjacentHTML('beforeend', html);
+        } else {
+            conversationsList.innerHTML = html;
+        }
 
         // Add click event listeners
-        document.querySelectorAll('.conversation-item').forEach(item => {
+        conversationsList.querySelectorAll('.conversation-item:not([data-bound])').forEach(item => {
+            item.dataset.bound = 'true';
             item.addEventListener('click', function() {
                 const conversationId = this.dataset.id;
                 switchConversation(conversationId);
             });
         });
 
+        const loadMoreButton = conversationsList.querySelector('.load-more-conversations');
+        if (loadMoreButton) {
+            loadMoreButton.addEventListener('click', () => loadConversations(page.next));
+        }
+
         // Select the first conversation by default if none is selected
         if (!currentConversationId && conversations.length > 0) {
             switchConversation(conversations[0].id);
@@ -144,10 +193,47 @@ function displayMessages(messages) {
     if (!chatMessages) return;
 
     if (!messages || messages.length === 0) {
+        lastMessageId = null;
         chatMessages.innerHTML = '<div class="empty-state">No messages yet. Start the conversation!</div>';
         return;
     }
 
+    chatMessages.innerHTML = renderMessagesHtml(messages);
+    lastMessageId = messages[messages.length - 1].id;
+}
+
+// Function to append new messages below the ones already shown
+function appendMessages(messages) {
+    const chatMessages = document.getElementById('chat-messages');
+    if (!chatMessages || !messages || messages.length === 0) return;
+
+    if (chatMessages.querySelector('.empty-state')) {
+        chatMessages.innerHTML = '';
+    }
+
+    chatMessages.insertAdjacentHTML('beforeend', renderMessagesHtml(messages));
+    lastMessageId = messages[messages.length - 1].id;
+}
+
+// Function to fetch the messages added to the current conversation since the newest one shown
+async function fetchNewMessages() {
+    if (!lastMessageId) {
+        const response = await fetch(`/api/conversations/${currentConversationId}/messages/`);
+        if (!response.ok) {
+            throw new Error('Failed to get conversation updates');
+        }
+        return response.json();
+    }
+
+    const response = await fetch(`/api/conversations/${currentConversationId}/messages/?since=${lastMessageId}`);
+    if (!response.ok) {
+        throw new Error('Failed to get conversation updates');
+    }
+    return response.json();
+}
+
+// Function to render messages as HTML
+function renderMessagesHtml(messages) {
     let html = '';
     messages.forEach(msg => {
         // Define message class based on role
@@ -179,7 +265,7 @@ function displayMessages(messages) {
         `;
     });
 
-    chatMessages.innerHTML = html;
+    return html;
 }
 
 // Function to create a new chat
@@ -326,9 +412,9 @@ async function handleChatSubmit(event) {
         return;
     }
 
-    // Add user message
+    // Add user message (replaced by the saved message once the server answers)
     const userMessageHtml = `
-        <div class="message user">
+        <div class="message user pending">
             <div class="message-content">${userMessage}</div>
         </div>
     `;
@@ -339,6 +425,7 @@ async function handleChatSubmit(event) {
     }
 
     chatMessages.insertAdjacentHTML('beforeend', userMessageHtml);
+    const pendingUserElement = chatMessages.lastElementChild;
     chatMessages.scrollTop = chatMessages.scrollHeight;
 
     // Add loading indicator (typing animation)
@@ -384,17 +471,11 @@ async function handleChatSubmit(event) {
                 loadingElement.remove();
             }
 
-            // Display messages directly from the response
-            if (responseData.messages) {
-                displayMessages(responseData.messages);
-            } else {
-                // Fetch updated conversation to display messages
-                const conversationResponse = await fetch(`/api/conversations/${currentConversationId}/`);
-                if (conversationResponse.ok) {
-                    const updatedConversation = await conversationResponse.json();
-                    displayMessages(updatedConversation.messages);
-                }
+            // Display the new messages directly from the response
+            if (pendingUserElement) {
+                pendingUserElement.remove();
             }
+            appendMessages(responseData.messages || await fetchNewMessages());
             chatMessages.scrollTop = chatMessages.scrollHeight;
             
             // Show datasource logs in modal
@@ -419,17 +500,11 @@ async function handleChatSubmit(event) {
                 loadingElement.remove();
             }
 
-            // Display messages directly from the response
-            if (responseData.messages) {
-                displayMessages(responseData.messages);
-            } else {
-                // Fetch updated conversation to display messages
-                const conversationResponse = await fetch(`/api/conversations/${currentConversationId}/`);
-                if (conversationResponse.ok) {
-                    const updatedConversation = await conversationResponse.json();
-                    displayMessages(updatedConversation.messages);
-                }
+            // Display the new messages directly from the response
+            if (pendingUserElement) {
+                pendingUserElement.remove();
             }
+            appendMessages(responseData.messages || await fetchNewMessages());
             chatMessages.scrollTop = chatMessages.scrollHeight;
             
             // Show automation logs in modal
@@ -445,21 +520,19 @@ async function handleChatSubmit(event) {
             return;
         }
 
-        // Regular response - fetch updated conversation
-        const conversationResponse = await fetch(`/api/conversations/${currentConversationId}/`);
-        if (!conversationResponse.ok) {
-            throw new Error('Failed to get conversation updates');
-        }
-
-        const updatedConversation = await conversationResponse.json();
+        // Regular response - the saved user and assistant messages are in the response
+        const newMessages = Array.isArray(responseData) ? responseData : await fetchNewMessages();
 
-        // Remove loading indicator
+        // Remove loading indicator and the unsaved copy of the user message
         if (loadingElement) {
             loadingElement.remove();
         }
+        if (pendingUserElement) {
+            pendingUserElement.remove();
+        }
 
-        // Display all messages
-        displayMessages(updatedConversation.messages);
+        // Display only the new messages
+        appendMessages(newMessages);
         chatMessages.scrollTop = chatMessages.scrollHeight;
 
     } catch (error) {
@@ -481,21 +554,29 @@ async function handleChatSubmit(event) {
     }
 }
 
-// Function to load documents
-async function loadDocuments() {
+// Documents loaded so far, one page at a time
+let loadedDocuments = [];
+
+// Function to load documents, one page at a time (pass the next page URL to append more)
+async function loadDocuments(pageUrl = null) {
     const documentsList = document.getElementById('documents-list');
     if (!documentsList) return;
 
     try {
-        const response = await fetch('/api/documents/');
-        if (!response.ok) {
-            throw new Error('Network response was not ok');
+        const page = await fetchPage(pageUrl || '/api/documents/');
+        loadedDocuments = pageUrl ? loadedDocuments.concat(page.results) : page.results;
+        renderDocumentsList(loadedDocuments);
+        if (page.next) {
+            appendLoadMoreButton(documentsList, 'Load more documents', () => loadDocuments(page.next));
         }
-
-        const documents = await response.json();
-        renderDocumentsList(documents);
     } catch (error) {
         console.error('Error loading documents:', error);
+        if (pageUrl) {
+            showNotification('Failed to load more documents. Please try again.', 'error');
+            renderDocumentsList(loadedDocuments);
+            appendLoadMoreButton(documentsList, 'Load more documents', () => loadDocuments(pageUrl));
+            return;
+        }
         documentsList.innerHTML = '<div class="loading-error">Failed to load documents. Please try again.</div>';
     }
 }
@@ -642,6 +723,9 @@ function renderIncidentsList(incidents) {
     });
 
     incidentsList.innerHTML = html;
+    if (incidentsNextUrl) {
+        appendLoadMoreButton(incidentsList, 'Load more incidents', () => loadIncidents(incidentsNextUrl));
+    }
 
     // Add click event listeners
     document.querySelectorAll('.incident-item').forEach(item => {
@@ -679,7 +763,7 @@ function showIncidentDetails(incident) {
         <h3>${incident.incident_number}: ${incident.short_description}</h3>
         <div class="incident-detail-row">
             <span class="detail-label">Priority:</span>
-            <span class="detail-value ${incident.priority}">${incident.priority}</span>
+            <span class="detail-value ${incident.priority_display || incident.priority}">${incident.priority_display || incident.priority}</span>
         </div>
         <div class="incident-detail-row">
             <span class="detail-label">State:</span>
@@ -902,8 +986,10 @@ function updateIncidentStatus(incidentId, newState, comments = '') {
                 }
             }, 3000);
 
-            // Reload the incidents list to reflect the updates
-            loadIncidents();
+            // The live feed pushes the update; only reload the list without it
+            if (!liveFeed) {
+                loadIncidents();
+            }
             
             // Resolve the promise with the updated incident
             resolve(updatedIncident);
@@ -953,10 +1039,10 @@ function updateIncidentInList(updatedIncident) {
         if (priorityElement) {
             // Update the priority class and text if it changed
             const oldPriorityClass = priorityElement.className.split(' ')[1];
-            if (oldPriorityClass !== updatedIncident.priority) {
-                priorityElement.classList.remove(oldPriorityClass);
-                priorityElement.classList.add(updatedIncident.priority);
-                priorityElement.textContent = updatedIncident.priority;
+            const priorityName = updatedIncident.priority_display || updatedIncident.priority;
+            if (oldPriorityClass !== priorityName) {
+                priorityElement.className = `incident-severity ${priorityName}`;
+                priorityElement.textContent = priorityName;
             }
         }
     }
@@ -1002,8 +1088,74 @@ function updateIncidentsSummary(incidents) {
     summaryContainer.innerHTML = summaryHTML;
 }
 
-// Function to load incidents
-function loadIncidents() {
+// Incidents and logs currently shown, updated in place by the live feed
+let incidentsCache = [];
+// URL of the next page of incidents, null once every page is loaded
+let incidentsNextUrl = null;
+let renderedLogs = [];
+const LIVE_LOGS_LIMIT = 100;
+let liveFeed = null;
+let liveDirty = { logs: false, incidents: false };
+let liveRenderPending = false;
+
+// Function to re-render the changed panels once per frame however many events arrive
+function scheduleLiveRender(panel) {
+    liveDirty[panel] = true;
+    if (liveRenderPending) return;
+    liveRenderPending = true;
+    requestAnimationFrame(() => {
+        liveRenderPending = false;
+        if (liveDirty.logs) {
+            renderLogsList(renderedLogs);
+        }
+        if (liveDirty.incidents) {
+            renderIncidentsList(incidentsCache);
+            if (document.getElementById('incident-summary')) {
+                updateIncidentsSummary(incidentsCache);
+            }
+        }
+        liveDirty = { logs: false, incidents: false };
+    });
+}
+
+// Function to subscribe to new logs and incident changes pushed by the server (Server-Sent Events)
+function startLiveFeed() {
+    if (!window.EventSource || liveFeed) return;
+
+    // EventSource reconnects by itself and resumes from the last event ID it received
+    liveFeed = new EventSource('/api/events/stream/?types=log,incident');
+
+    liveFeed.addEventListener('log', event => {
+        renderedLogs.unshift(JSON.parse(event.data));
+        if (renderedLogs.length > LIVE_LOGS_LIMIT) {
+            renderedLogs.length = LIVE_LOGS_LIMIT;
+        }
+        scheduleLiveRender('logs');
+    });
+
+    liveFeed.addEventListener('incident', event => {
+        const change = JSON.parse(event.data);
+        const index = incidentsCache.findIndex(incident => incident.id === change.incident.id);
+        if (change.action === 'deleted') {
+            if (index !== -1) incidentsCache.splice(index, 1);
+        } else if (index !== -1) {
+            incidentsCache[index] = change.incident;
+        } else {
+            // The list is newest first, so a new incident goes at the top
+            incidentsCache.unshift(change.incident);
+        }
+        scheduleLiveRender('incidents');
+    });
+
+    // Events were missed (server restarted or the client was away too long): reload once
+    liveFeed.addEventListener('reset', () => {
+        loadIncidents();
+        loadLogs();
+    });
+}
+
+// Function to load incidents, one page at a time (pass the next page URL to append more)
+function loadIncidents(pageUrl = null) {
     const incidentsList = document.getElementById('incidents-list');
     if (!incidentsList) {
         console.warn('Incidents list element not found in the DOM');
@@ -1011,23 +1163,28 @@ function loadIncidents() {
     }
 
     // Show loading indicator
-    incidentsList.innerHTML = '<div class="loading-incidents">Loading incidents...</div>';
-
-    fetch('/api/incidents')
-        .then(response => {
-            if (!response.ok) {
-                throw new Error(`Network response was not ok: ${response.status} ${response.statusText}`);
-            }
-            return response.json();
-        })
-        .then(incidents => {
-            if (Array.isArray(incidents)) {
-                renderIncidentsList(incidents);
+    if (!pageUrl) {
+        incidentsList.innerHTML = '<div class="loading-incidents">Loading incidents...</div>';
+    }
+
+    fetchPage(pageUrl || '/api/incidents')
+        .then(page => {
+            if (Array.isArray(page.results)) {
+                // Kept so live updates can re-render without fetching the list again;
+                // incidents the live feed already added are not listed twice
+                if (pageUrl) {
+                    const known = new Set(incidentsCache.map(incident => incident.id));
+                    incidentsCache = incidentsCache.concat(page.results.filter(incident => !known.has(incident.id)));
+                } else {
+                    incidentsCache = page.results;
+                }
+                incidentsNextUrl = page.next;
+                renderIncidentsList(incidentsCache);
 
                 // Only update summary if the container exists
                 const summaryContainer = document.getElementById('incident-summary');
                 if (summaryContainer) {
-                    updateIncidentsSummary(incidents);
+                    updateIncidentsSummary(incidentsCache);
                 }
             } else {
                 throw new Error('Invalid incidents data format');
@@ -1035,6 +1192,11 @@ function loadIncidents() {
         })
         .catch(error => {
             console.error('Error loading incidents:', error);
+            if (pageUrl) {
+                showNotification('Failed to load more incidents. Please try again.', 'error');
+                renderIncidentsList(incidentsCache);
+                return;
+            }
             incidentsList.innerHTML = '<div class="loading-incidents error">Failed to load incidents. Please refresh the page or try again later.</div>';
 
             // Only update summary if the container exists
@@ -1424,8 +1586,10 @@ function createLogEntry(level, source, message) {
         return response.json();
     })
     .then(() => {
-        // Refresh logs
-        loadLogs();
+        // The live feed pushes the new entry; only reload without it
+        if (!liveFeed) {
+            loadLogs();
+        }
     })
     .catch(error => {
         console.error('Error creating log entry:', error);
@@ -1518,8 +1682,9 @@ function loadLogs() {
             }
             return response.json();
         })
-        .then(logs => {
-            renderLogsList(logs);
+        .then(page => {
+            renderedLogs = page.results;
+            renderLogsList(renderedLogs);
         })
         .catch(error => {
             console.error('Error loading logs:', error);
@@ -1759,11 +1924,15 @@ async function clearAllDocuments() {
     }
 }
 
+// Knowledge base entries loaded so far, one page at a time
+let knowledgeBaseEntries = [];
+
 // Function to load knowledge base entries
-async function loadKnowledgeBase() {
+async function loadKnowledgeBase(pageUrl = null) {
     try {
-        const response = await fetch('/api/knowledge-base/');
-        const entries = await response.json();
+        const page = await fetchPage(pageUrl || '/api/knowledge-base/');
+        knowledgeBaseEntries = pageUrl ? knowledgeBaseEntries.concat(page.results) : page.results;
+        const entries = knowledgeBaseEntries;
 
         const kbList = document.getElementById('knowledge-base-list');
         kbList.innerHTML = '';
@@ -1800,7 +1969,7 @@ async function loadKnowledgeBase() {
                             </button>
                         </div>
                     </div>
-                    <div class="kb-entry-preview">${entry.content.substring(0, 100)}...</div>
+                    <div class="kb-entry-preview">${entry.preview}...</div>
                 `;
 
                 entryElement.addEventListener('click', (e) => {
@@ -1813,6 +1982,10 @@ async function loadKnowledgeBase() {
             });
         });
 
+        if (page.next) {
+            appendLoadMoreButton(kbList, 'Load more entries', () => loadKnowledgeBase(page.next));
+        }
+
         feather.replace();
     } catch (error) {
         console.error('Error loading knowledge base:', error);
@@ -2285,10 +2458,11 @@ async function clearAllDocuments() {
 }
 
 // Function to load knowledge base entries
-async function loadKnowledgeBase() {
+async function loadKnowledgeBase(pageUrl = null) {
     try {
-        const response = await fetch('/api/knowledge-base/');
-        const entries = await response.json();
+        const page = await fetchPage(pageUrl || '/api/knowledge-base/');
+        knowledgeBaseEntries = pageUrl ? knowledgeBaseEntries.concat(page.results) : page.results;
+        const entries = knowledgeBaseEntries;
 
         const kbList = document.getElementById('knowledge-base-list');
         kbList.innerHTML = '';
@@ -2325,7 +2499,7 @@ async function loadKnowledgeBase() {
                             </button>
                         </div>
                     </div>
-                    <div class="kb-entry-preview">${entry.content.substring(0, 100)}...</div>
+                    <div class="kb-entry-preview">${entry.preview}...</div>
                 `;
 
                 entryElement.addEventListener('click', (e) => {
@@ -2338,6 +2512,10 @@ async function loadKnowledgeBase() {
             });
         });
 
+        if (page.next) {
+            appendLoadMoreButton(kbList, 'Load more entries', () => loadKnowledgeBase(page.next));
+        }
+
         feather.replace();
     } catch (error) {
         console.error('Error loading knowledge base:', error);
@@ -2810,10 +2988,11 @@ async function clearAllDocuments() {
 }
 
 // Function to load knowledge base entries
-async function loadKnowledgeBase() {
+async function loadKnowledgeBase(pageUrl = null) {
     try {
-        const response = await fetch('/api/knowledge-base/');
-        const entries = await response.json();
+        const page = await fetchPage(pageUrl || '/api/knowledge-base/');
+        knowledgeBaseEntries = pageUrl ? knowledgeBaseEntries.concat(page.results) : page.results;
+        const entries = knowledgeBaseEntries;
 
         const kbList = document.getElementById('knowledge-base-list');
         kbList.innerHTML = '';
@@ -2850,7 +3029,7 @@ async function loadKnowledgeBase() {
                             </button>
                         </div>
                     </div>
-                    <div class="kb-entry-preview">${entry.content.substring(0, 100)}...</div>
+                    <div class="kb-entry-preview">${entry.preview}...</div>
                 `;
 
                 entryElement.addEventListener('click', (e) => {
@@ -2863,6 +3042,10 @@ async function loadKnowledgeBase() {
             });
         });
 
+        if (page.next) {
+            appendLoadMoreButton(kbList, 'Load more entries', () => loadKnowledgeBase(page.next));
+        }
+
         feather.replace();
     } catch (error) {
         console.error('Error loading knowledge base:', error);
@@ -3170,6 +3353,7 @@ document.addEventListener('DOMContentLoaded', function() {
     loadDashboards();
     loadLogs();
     loadKnowledgeBase();
+    startLiveFeed();
 
     // Set up chat form submission handler
     const chatForm = document.getElementById('chat-form');
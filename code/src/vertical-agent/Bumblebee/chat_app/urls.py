@@ -9,6 +9,7 @@ urlpatterns = [
     path('api/conversations/', views.conversations, name='conversations'),
     path('api/conversations/<uuid:conversation_id>/', views.conversation_detail, name='conversation_detail'),
     path('api/conversations/<uuid:conversation_id>/messages/', views.messages, name='messages'),
+    path('api/conversations/<uuid:conversation_id>/messages/async/', views.messages_async, name='messages_async'),
     path('api/conversations/clear/', views.clear_conversations, name='clear_conversations'),
     path('api/documents/', views.documents, name='documents'),
     path('api/documents/upload/', views.upload_document, name='upload_document'),
@@ -21,6 +22,7 @@ urlpatterns = [
     
     # Debug endpoints
     path('api/debug/vector-store/', views.debug_vector_store, name='debug_vector_store'),
+    path('api/debug/response-cache/', views.debug_response_cache, name='debug_response_cache'),
     
     # Incident endpoints
     path('api/incidents', views.incidents, name='incidents'),
@@ -32,6 +34,15 @@ urlpatterns = [
     
     # Log endpoints
     path('api/logs/', views.logs, name='logs'),
+    path('api/logs/ingest/', views.logs_ingest, name='logs_ingest'),
+    path('api/logs/export/', views.logs_export, name='logs_export'),
+    path('api/logs/search/', views.logs_search, name='logs_search'),
+    path('api/logs/templates/', views.log_templates, name='log_templates'),
+    path('api/logs/histogram/', views.log_histogram, name='log_histogram'),
+    path('api/logs/anomalies/', views.log_anomalies, name='log_anomalies'),
+
+    # Live feed of new logs and incident changes (Server-Sent Events)
+    path('api/events/stream/', views.events_stream, name='events_stream'),
     
     # Knowledge base endpoints
     path('api/knowledge-base/', views.knowledge_base_entries, name='knowledge_base_entries'),
@@ -9,6 +9,7 @@ import uuid
 from datetime import datetime
 from django.conf import settings
 from ..models import Automation
+from .log_writer import get_log_writer
 
 # Setup logging
 logger = logging.getLogger(__name__)
@@ -256,8 +257,7 @@ class AutomationService:
         }
         
         # Create a log entry in the database
-        from ..models import Log
-        Log.objects.create(
+        get_log_writer().log(
             message=f"Automation execution: {automation.name} - {execution_result.get('message', 'No details')}",
             level="info" if execution_result.get('status', '') == 'success' else "error",
             source="automation_service"
@@ -0,0 +1,243 @@
+"""
+Per-turn chat pipeline that runs independent stages concurrently.
+"""
+import asyncio
+import functools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from django.db import transaction
+
+from ..models import Message
+from .response_cache import normalize_question
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+COMMAND_PREFIXES = ('@automation', '@datasource')
+
+
+def is_command(user_message):
+    """
+    Check whether a chat message is an @automation or @datasource command.
+
+    Args:
+        user_message: Raw user message
+
+    Returns:
+        bool: True if the message should be handled as a command
+    """
+    text = (user_message or '').lower()
+    return any(prefix in text for prefix in COMMAND_PREFIXES)
+
+
+class TurnTimings:
+    """
+    Wall-clock duration of each stage of a chat turn.
+
+    Stages that run concurrently are timed independently, so the durations
+    can add up to more than the total.
+    """
+
+    def __init__(self):
+        """Initialize an empty set of timings and start the turn clock."""
+        self._lock = threading.Lock()
+        self._stages = {}
+        self._started = time.monotonic()
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Time the body of a with-block as a stage.
+
+        Args:
+            name: Stage name
+        """
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.add(name, time.monotonic() - started)
+
+    def add(self, name, seconds):
+        """
+        Record a stage duration, adding to it if the stage ran before.
+
+        Args:
+            name: Stage name
+            seconds: Duration in seconds
+        """
+        with self._lock:
+            self._stages[name] = self._stages.get(name, 0.0) + seconds
+
+    def as_dict(self):
+        """
+        Report stage durations in milliseconds.
+
+        Returns:
+            dict: Stage name to duration, plus the total turn duration
+        """
+        with self._lock:
+            timings = {name: round(seconds * 1000, 1) for name, seconds in self._stages.items()}
+        timings['total'] = round((time.monotonic() - self._started) * 1000, 1)
+        return timings
+
+    def server_timing_header(self):
+        """
+        Format the timings as a Server-Timing header value.
+
+        Returns:
+            str: Header value, e.g. "prepare;dur=12.5, llm;dur=830.1, total;dur=851.0"
+        """
+        return ', '.join(f"{name};dur={duration}" for name, duration in self.as_dict().items())
+
+
+class ChatTurnPipeline:
+    """
+    Runs the stages of a normal (non-command) chat turn.
+
+    Retrieval fans out over the vector store collections on a thread pool
+    while the conversation history is loaded, and the user message, the
+    assistant message and the conversation timestamp are written in one
+    transaction once the response is known.
+    """
+
+    def __init__(self, vector_store, executor, history_window, search_flight=None, async_search_flight=None,
+                 collections=None, top_k=3):
+        """
+        Initialize the pipeline.
+
+        Args:
+            vector_store: Vector store to retrieve chunks from
+            executor: Thread pool that runs the collection searches
+            history_window: HistoryWindow that loads the recent conversation history
+            search_flight: Optional SingleFlight coalescing identical searches
+            async_search_flight: Optional AsyncSingleFlight for the async path
+            collections: Vector store collections to search, all of them by default
+            top_k: Number of chunks to keep after merging the collections
+        """
+        self.vector_store = vector_store
+        self.executor = executor
+        self.history_window = history_window
+        self.search_flight = search_flight
+        self.async_search_flight = async_search_flight
+        self.collections = tuple(collections or vector_store.SEARCH_COLLECTIONS)
+        self.top_k = top_k
+
+    def _search_collection(self, query, collection, timings):
+        """Search one collection and record how long it took."""
+        started = time.monotonic()
+        try:
+            if self.search_flight is None:
+                return self.vector_store.search(query, top_k=self.top_k, collection=collection)
+            results, _ = self.search_flight.do(
+                (normalize_question(query), collection, self.top_k),
+                self.vector_store.search, query, top_k=self.top_k, collection=collection
+            )
+            return results
+        finally:
+            timings.add(f"retrieval_{collection}", time.monotonic() - started)
+
+    def _merge(self, results_per_collection):
+        """Merge per-collection results into the overall top_k by relevance score."""
+        merged = [doc for results in results_per_collection for doc in results or []]
+        merged.sort(key=lambda doc: doc.get('relevance_score', 0), reverse=True)
+        return merged[:self.top_k]
+
+    def prepare(self, conversation, user_message, timings):
+        """
+        Retrieve relevant chunks and load the conversation history concurrently.
+
+        The searches run on the thread pool while the history query runs on
+        the calling thread, which keeps the ORM on the request's own connection.
+
+        Args:
+            conversation: Conversation the turn belongs to
+            user_message: User message text
+            timings: TurnTimings for the turn
+
+        Returns:
+            tuple: (relevant_docs, conversation_history)
+        """
+        with timings.stage('prepare'):
+            futures = [
+                self.executor.submit(self._search_collection, user_message, collection, timings)
+                for collection in self.collections
+            ]
+            with timings.stage('history'):
+                conversation_history = self.history_window.load(conversation)
+            relevant_docs = self._merge([future.result() for future in futures])
+        return relevant_docs, conversation_history
+
+    async def aprepare(self, conversation, user_message, timings):
+        """
+        Async variant of prepare that gathers the searches and the history query.
+
+        Args:
+            conversation: Conversation the turn belongs to
+            user_message: User message text
+            timings: TurnTimings for the turn
+
+        Returns:
+            tuple: (relevant_docs, conversation_history)
+        """
+        loop = asyncio.get_running_loop()
+
+        async def search(collection):
+            started = time.monotonic()
+            try:
+                if self.async_search_flight is None:
+                    return await loop.run_in_executor(
+                        self.executor,
+                        functools.partial(self.vector_store.search, user_message, top_k=self.top_k, collection=collection)
+                    )
+                results, _ = await self.async_search_flight.do(
+                    (normalize_question(user_message), collection, self.top_k),
+                    loop.run_in_executor, self.executor,
+                    functools.partial(self.vector_store.search, user_message, top_k=self.top_k, collection=collection)
+                )
+                return results
+            finally:
+                timings.add(f"retrieval_{collection}", time.monotonic() - started)
+
+        async def history():
+            with timings.stage('history'):
+                return await self.history_window.aload(conversation)
+
+        with timings.stage('prepare'):
+            *results_per_collection, conversation_history = await asyncio.gather(
+                *(search(collection) for collection in self.collections),
+                history()
+            )
+        return self._merge(results_per_collection), conversation_history
+
+    def persist(self, conversation, user_message, response, timings):
+        """
+        Write the user message, the assistant message and the conversation timestamp atomically.
+
+        Args:
+            conversation: Conversation the turn belongs to
+            user_message: User message text
+            response: Assistant response text
+            timings: TurnTimings for the turn
+
+        Returns:
+            tuple: (user Message, assistant Message)
+        """
+        with timings.stage('persist'):
+            with transaction.atomic():
+                user_message_obj = Message.objects.create(
+                    conversation=conversation,
+                    role='user',
+                    content=user_message
+                )
+                assistant_message = Message.objects.create(
+                    conversation=conversation,
+                    role='assistant',
+                    content=response
+                )
+                # Only touch the timestamp column instead of rewriting the whole row
+                conversation.save(update_fields=['updated_at'])
+        return user_message_obj, assistant_message
@@ -7,6 +7,7 @@ import requests
 import logging
 from django.conf import settings
 from ..models import DataSource
+from .log_writer import get_log_writer
 
 # Setup logging
 logger = logging.getLogger(__name__)
@@ -52,6 +53,18 @@ class DataSourceService:
                     "fields": "Optional - Specific fields to return"
                 },
                 "auth_required": True
+            },
+            {
+                "name": "Logs",
+                "description": "Full-text search over ingested application logs",
+                "endpoint": "/api/logs/search/",
+                "parameters": {
+                    "q": "Required - Search terms; \"quotes\" for a phrase, * for a prefix (e.g. timeou*)",
+                    "level": "Optional - Comma-separated levels (e.g. error,warning)",
+                    "source": "Optional - Comma-separated sources",
+                    "limit": "Optional - Number of logs to return (default: 20)"
+                },
+                "auth_required": False
             }
         ]
         
@@ -233,8 +246,7 @@ class DataSourceService:
         )
         
         # Create a log entry in the database
-        from ..models import Log
-        Log.objects.create(
+        get_log_writer().log(
             message=f"Data source query: {datasource.name} - {query_result.get('message', 'No details')}",
             level="info" if query_result.get('status') == 'success' else "error",
             source="datasource_service"
@@ -483,6 +495,9 @@ class DataSourceService:
                     result['raw_response'] = mock_data
                     return result
             
+            if endpoint == "/api/logs/search/":
+                return self._search_logs(params, result)
+            
             # Default response for unhandled endpoints
             result['logs'].append({
                 'timestamp': datetime.now().isoformat(),
@@ -505,4 +520,69 @@ class DataSourceService:
             
             result['status'] = 'error'
             result['message'] = f"Error executing query: {str(e)}"
-            return result
\ No newline at end of file
+            return result
+    
+    def _search_logs(self, params, result):
+        """
+        Run a full-text log search for the Logs data source.
+        
+        Args:
+            params: Parsed parameters (q, level, source, limit)
+            result: Result structure to fill in
+            
+        Returns:
+            dict: The result with the matching logs in raw_response
+        """
+        from datetime import datetime
+        from ..models import Log
+        from .log_query import filter_logs
+        
+        if not params.get('q'):
+            result['status'] = 'error'
+            result['message'] = 'Please provide search terms, e.g. `@datasource Logs q="connection reset"`'
+            return result
+        
+        try:
+            limit = min(max(int(params.get('limit') or 20), 1), 100)
+        except ValueError:
+            limit = 20
+        
+        result['logs'].append({
+            'timestamp': datetime.now().isoformat(),
+            'level': 'info',
+            'message': f"Searching logs for: {params['q']}"
+        })
+        
+        try:
+            queryset = filter_logs(Log.objects.all(), params)
+        except ValueError as e:
+            result['status'] = 'error'
+            result['message'] = f"Invalid log search: {str(e)}"
+            return result
+        matches = list(queryset.order_by('-timestamp', '-id')[:limit])
+        
+        result['logs'].append({
+            'timestamp': datetime.now().isoformat(),
+            'level': 'info',
+            'message': f"Found {len(matches)} matching logs"
+        })
+        
+        result['status'] = 'success'
+        if not matches:
+            result['message'] = f"No logs match {params['q']}"
+        else:
+            lines = [f"Latest {len(matches)} logs matching {params['q']}:"]
+            for log in matches:
+                lines.append(f"- {log.timestamp.isoformat()} [{log.level}] {log.source}: {log.message[:200]}")
+            result['message'] = '\n'.join(lines)
+        result['raw_response'] = [
+            {
+                'id': str(log.id),
+                'timestamp': log.timestamp.isoformat(),
+                'level': log.level,
+                'source': log.source,
+                'message': log.message
+            }
+            for log in matches
+        ]
+        return result
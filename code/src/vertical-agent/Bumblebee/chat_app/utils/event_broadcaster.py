@@ -0,0 +1,137 @@
+"""
+In-process fan-out of live events (new logs, incident changes) to Server-Sent Events streams.
+"""
+import json
+import logging
+import threading
+import uuid
+from collections import deque
+from itertools import islice
+
+from django.db import transaction
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+
+class EventBroadcaster:
+    """
+    Ring buffer of recent events that any number of streams wait on.
+
+    Publishing appends the event under a condition variable and wakes the
+    waiting streams; each stream then reads only the events after the last
+    ID it sent, so a publish costs the same however many clients listen, and
+    a reconnecting client resumes from its Last-Event-ID as long as that
+    event is still in the buffer. IDs are "<instance>-<sequence>", the
+    instance being random per process, so an ID from another worker or a
+    previous run is recognized and answered with a reset.
+    """
+
+    def __init__(self, max_events=1000):
+        """
+        Initialize the broadcaster.
+
+        Args:
+            max_events: Events kept for clients that reconnect
+        """
+        self.instance = uuid.uuid4().hex[:8]
+        self._events = deque(maxlen=max_events)
+        self._sequence = 0
+        self._condition = threading.Condition()
+        self._published = 0
+
+    def publish(self, event_type, data):
+        """
+        Publish an event to every stream.
+
+        Args:
+            event_type: SSE event name, e.g. 'log' or 'incident'
+            data: JSON-serializable payload
+        """
+        payload = json.dumps(data, default=str)
+        with self._condition:
+            self._sequence += 1
+            self._events.append((self._sequence, event_type, payload))
+            self._published += 1
+            self._condition.notify_all()
+
+    def publish_on_commit(self, event_type, data):
+        """Publish once the current transaction commits (immediately outside one)."""
+        transaction.on_commit(lambda: self.publish(event_type, data))
+
+    def event_id(self, sequence):
+        """Build the ID sent to clients for a sequence number."""
+        return f"{self.instance}-{sequence}"
+
+    def resume_point(self, event_id):
+        """
+        Find where a stream resumes from a client's Last-Event-ID.
+
+        Args:
+            event_id: Last-Event-ID header or query parameter, may be empty
+
+        Returns:
+            tuple: (sequence to send events after, reset) where reset is True
+                if the ID was issued by another instance and the client must
+                reload instead of resuming
+        """
+        instance, _, sequence = (event_id or '').partition('-')
+        with self._condition:
+            if instance != self.instance or not sequence.isdigit() or int(sequence) > self._sequence:
+                # New clients get only events published from now on
+                return self._sequence, bool(event_id)
+            return int(sequence), False
+
+    def wait(self, after, timeout):
+        """
+        Wait for events after a sequence number.
+
+        Args:
+            after: Sequence of the last event the client has
+            timeout: Seconds to wait if there is nothing new
+
+        Returns:
+            tuple: (list of (sequence, event type, JSON payload), missed) where
+                missed is True if events after the sequence were already
+                dropped from the buffer
+        """
+        with self._condition:
+            if self._sequence <= after:
+                self._condition.wait_for(lambda: self._sequence > after, timeout=timeout)
+            if self._sequence <= after:
+                return [], False
+            first = self._events[0][0]
+            missed = first > after + 1
+            # Sequences are contiguous, so the new events are the tail of the buffer
+            events = list(islice(self._events, max(after + 1 - first, 0), None))
+            return events, missed
+
+    def stats(self):
+        """
+        Report broadcaster state.
+
+        Returns:
+            dict: Instance ID, last sequence, buffered and published event counts
+        """
+        with self._condition:
+            return {
+                "instance": self.instance,
+                "sequence": self._sequence,
+                "buffered": len(self._events),
+                "published": self._published,
+            }
+
+
+def format_sse(event_id, event_type, payload):
+    """
+    Format one Server-Sent Event.
+
+    Args:
+        event_id: Event ID
+        event_type: Event name
+        payload: Single-line JSON payload
+
+    Returns:
+        str: Event block terminated by a blank line
+    """
+    return f"id: {event_id}\nevent: {event_type}\ndata: {payload}\n\n"
@@ -0,0 +1,207 @@
+"""
+Bounded loading of the recent conversation history for chat turns.
+"""
+import logging
+import threading
+from collections import OrderedDict, deque
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+
+class HistoryWindow:
+    """
+    Loads the last N messages of a conversation instead of the whole conversation.
+
+    The LLM services only use the most recent messages, so the query reads
+    the newest N rows through the (conversation, created_at) index and
+    reverses them. Optionally the tail of recently active conversations is
+    kept in memory and updated as messages are saved, so a chat turn needs
+    no history query at all. The cache is per process, so it should only be
+    enabled when a single process serves the app.
+    """
+
+    def __init__(self, size=5, cache_enabled=False, max_conversations=1000):
+        """
+        Initialize the history window.
+
+        Args:
+            size: Number of most recent messages to load
+            cache_enabled: Keep the tail of each conversation in memory
+            max_conversations: Maximum number of cached conversation tails (LRU eviction)
+        """
+        self.size = size
+        self.cache_enabled = cache_enabled
+        self.max_conversations = max_conversations
+
+        self._lock = threading.Lock()
+        self._tails = OrderedDict()
+        # Loads in progress per conversation, and appends seen while they ran,
+        # so a load that raced with an append is not cached
+        self._loading = {}
+        self._generations = {}
+        self._stats = {"hits": 0, "misses": 0}
+
+    def _query(self, conversation):
+        """Queryset of the newest messages of a conversation, newest first."""
+        return conversation.messages.order_by('-created_at')[:self.size]
+
+    def _format(self, messages):
+        """Format messages, oldest first, as conversation history for the LLM services."""
+        return [{"role": msg.role, "content": msg.content} for msg in reversed(messages)]
+
+    def _tail_entries(self, messages):
+        """Pair each formatted message, oldest first, with its ID for the cached tail."""
+        return [(str(msg.id), {"role": msg.role, "content": msg.content}) for msg in reversed(messages)]
+
+    def _start_load(self, conversation_id):
+        """
+        Return the cached history of a conversation, or start a load on a miss.
+
+        Returns:
+            tuple: (cached history or None, generation to pass to _finish_load)
+        """
+        with self._lock:
+            tail = self._tails.get(conversation_id)
+            if tail is not None:
+                self._tails.move_to_end(conversation_id)
+                self._stats["hits"] += 1
+                return [message for _, message in tail], None
+            self._stats["misses"] += 1
+            self._loading[conversation_id] = self._loading.get(conversation_id, 0) + 1
+            return None, self._generations.get(conversation_id, 0)
+
+    def _finish_load(self, conversation_id, entries, generation):
+        """Cache a loaded tail unless a message was appended while it was loading."""
+        with self._lock:
+            if entries is not None and self._generations.get(conversation_id, 0) == generation:
+                self._tails[conversation_id] = deque(entries, maxlen=self.size)
+                self._tails.move_to_end(conversation_id)
+                while len(self._tails) > self.max_conversations:
+                    self._tails.popitem(last=False)
+
+            self._loading[conversation_id] -= 1
+            if not self._loading[conversation_id]:
+                del self._loading[conversation_id]
+                self._generations.pop(conversation_id, None)
+
+    def load(self, conversation):
+        """
+        Load the recent history of a conversation.
+
+        Args:
+            conversation: Conversation to load the history of
+
+        Returns:
+            list: Up to size messages, oldest first, as role/content dicts
+        """
+        if not self.cache_enabled:
+            return self._format(list(self._query(conversation)))
+
+        conversation_id = str(conversation.pk)
+        history, generation = self._start_load(conversation_id)
+        if history is not None:
+            return history
+
+        entries = None
+        try:
+            entries = self._tail_entries(list(self._query(conversation)))
+        finally:
+            self._finish_load(conversation_id, entries, generation)
+        return [message for _, message in entries]
+
+    async def aload(self, conversation):
+        """
+        Async variant of load.
+
+        The query runs with sync_to_async(thread_sensitive=False), on the shared
+        pool whose threads keep their database connections, rather than on the
+        per-request thread the async ORM would use.
+
+        Args:
+            conversation: Conversation to load the history of
+
+        Returns:
+            list: Up to size messages, oldest first, as role/content dicts
+        """
+        fetch = sync_to_async(lambda: list(self._query(conversation)), thread_sensitive=False)
+        if not self.cache_enabled:
+            return self._format(await fetch())
+
+        conversation_id = str(conversation.pk)
+        history, generation = self._start_load(conversation_id)
+        if history is not None:
+            return history
+
+        entries = None
+        try:
+            entries = self._tail_entries(await fetch())
+        finally:
+            self._finish_load(conversation_id, entries, generation)
+        return [message for _, message in entries]
+
+    def append(self, message):
+        """
+        Add a new message to the cached tail of its conversation.
+
+        Args:
+            message: Message that was just saved
+        """
+        conversation_id = str(message.conversation_id)
+        message_id = str(message.id)
+        with self._lock:
+            if conversation_id in self._loading:
+                self._generations[conversation_id] = self._generations.get(conversation_id, 0) + 1
+            tail = self._tails.get(conversation_id)
+            # A load that ran after the commit may already have picked the message up
+            if tail is not None and all(entry_id != message_id for entry_id, _ in tail):
+                tail.append((message_id, {"role": message.role, "content": message.content}))
+
+    def forget(self, conversation_id):
+        """
+        Drop the cached tail of a conversation.
+
+        Args:
+            conversation_id: ID of the conversation
+        """
+        conversation_id = str(conversation_id)
+        with self._lock:
+            self._tails.pop(conversation_id, None)
+            if conversation_id in self._loading:
+                self._generations[conversation_id] = self._generations.get(conversation_id, 0) + 1
+
+    def clear(self):
+        """Drop all cached tails."""
+        with self._lock:
+            self._tails.clear()
+            for conversation_id in self._loading:
+                self._generations[conversation_id] = self._generations.get(conversation_id, 0) + 1
+
+    def on_message_saved(self, sender, instance, created, **kwargs):
+        """post_save receiver for Message that keeps the cached tails current."""
+        if created:
+            # Apply the append only once the message is committed
+            transaction.on_commit(lambda: self.append(instance))
+        else:
+            transaction.on_commit(lambda: self.forget(instance.conversation_id))
+
+    def on_conversation_deleted(self, sender, instance, **kwargs):
+        """post_delete receiver for Conversation that drops its cached tail."""
+        self.forget(instance.pk)
+
+    def stats(self):
+        """
+        Report cache effectiveness.
+
+        Returns:
+            dict: Hits, misses and number of cached conversations
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["conversations"] = len(self._tails)
+        stats["enabled"] = self.cache_enabled
+        stats["size"] = self.size
+        return stats
@@ -0,0 +1,256 @@
+"""
+Online detection of log rate spikes per source, level and template.
+"""
+import logging
+import math
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db import transaction
+from django.utils import timezone
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Empty buckets applied one by one when a key resumes; after this many the averages have decayed anyway
+MAX_DECAY_STEPS = 64
+
+
+class RateStats:
+    """EWMA of the per-bucket count of one key, plus the count of the open bucket."""
+    __slots__ = ('bucket', 'count', 'mean', 'var', 'buckets', 'flagged')
+
+    def __init__(self, bucket):
+        self.bucket = bucket
+        self.count = 0
+        self.mean = 0.0
+        self.var = 0.0
+        self.buckets = 0
+        self.flagged = False
+
+
+class EwmaRateDetector:
+    """
+    Flags keys whose count in the current time bucket is far above their usual rate.
+
+    For every key the detector keeps an exponentially weighted mean and
+    variance of its count per bucket. Each observed log increments the count
+    of the key's open bucket and compares it with the mean; the bucket is
+    flagged once its z-score reaches z_threshold. Closing a bucket folds its
+    count into the averages. Every observation is O(1), and at most max_keys
+    keys are tracked (least recently seen are dropped).
+
+    Not thread-safe; callers serialize access.
+    """
+
+    def __init__(self, bucket_seconds=60, alpha=0.1, z_threshold=4.0, min_count=20, warmup_buckets=5, max_keys=50000):
+        """
+        Initialize the detector.
+
+        Args:
+            bucket_seconds: Length of a counting bucket
+            alpha: EWMA smoothing factor (weight of the newest bucket)
+            z_threshold: Standard deviations above the mean that count as an anomaly
+            min_count: Minimum count in a bucket before it can be flagged
+            warmup_buckets: Buckets a key must have been seen for before it can be flagged
+            max_keys: Maximum number of keys tracked
+        """
+        self.bucket_seconds = bucket_seconds
+        self.alpha = alpha
+        self.z_threshold = z_threshold
+        self.min_count = min_count
+        self.warmup_buckets = warmup_buckets
+        self.max_keys = max_keys
+        self._stats = OrderedDict()
+
+    def observe(self, key, timestamp):
+        """
+        Count one log for a key.
+
+        Args:
+            key: Hashable key, e.g. (source, level, template ID)
+            timestamp: Event time of the log
+
+        Returns:
+            dict or None: The anomaly, the first time a bucket crosses the threshold
+        """
+        bucket = int(timestamp.timestamp() // self.bucket_seconds)
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats[key] = RateStats(bucket)
+            if len(self._stats) > self.max_keys:
+                self._stats.popitem(last=False)
+        else:
+            self._stats.move_to_end(key)
+            if bucket > stats.bucket:
+                self._close_bucket(stats, bucket)
+            # Late logs count towards the open bucket
+
+        stats.count += 1
+        if stats.flagged or stats.buckets < self.warmup_buckets or stats.count < self.min_count:
+            return None
+
+        # Counts are at least Poisson-noisy, so the deviation never falls below sqrt(mean)
+        deviation = math.sqrt(max(stats.var, stats.mean, 1.0))
+        z_score = (stats.count - stats.mean) / deviation
+        if z_score < self.z_threshold:
+            return None
+
+        stats.flagged = True
+        return {
+            "key": key,
+            "bucket_start": datetime.fromtimestamp(stats.bucket * self.bucket_seconds, tz=dt_timezone.utc),
+            "observed": stats.count,
+            "expected": stats.mean,
+            "z_score": z_score,
+        }
+
+    def _close_bucket(self, stats, bucket):
+        """Fold the open bucket, and any empty ones after it, into the averages."""
+        self._update(stats, stats.count)
+        for _ in range(min(bucket - stats.bucket - 1, MAX_DECAY_STEPS)):
+            self._update(stats, 0)
+        stats.bucket = bucket
+        stats.count = 0
+        stats.flagged = False
+
+    def _update(self, stats, count):
+        """Incremental EWMA of the mean and variance."""
+        diff = count - stats.mean
+        increment = self.alpha * diff
+        stats.mean += increment
+        stats.var = (1 - self.alpha) * (stats.var + diff * increment)
+        stats.buckets += 1
+
+    def __len__(self):
+        return len(self._stats)
+
+
+class LogAnomalyMonitor:
+    """
+    Watches saved logs for rate spikes and records them as LogAnomaly rows.
+
+    Meant to be registered in LogIngestor.processors. Keys are (source,
+    level, template), so a burst of one error template is caught even when
+    the overall error rate of the source looks normal. Optionally opens an
+    Incident for anomalies at the given levels, at most one per key per
+    cooldown. Listeners registered in listeners are called with each saved
+    LogAnomaly.
+    """
+
+    def __init__(self, detector, enabled=True, auto_incident=False, incident_levels=('error', 'critical'), incident_cooldown=3600):
+        """
+        Initialize the monitor.
+
+        Args:
+            detector: EwmaRateDetector holding the rate state
+            enabled: Watch logs; when False process does nothing
+            auto_incident: Open an Incident for anomalies at incident_levels
+            incident_levels: Log levels that warrant an incident
+            incident_cooldown: Seconds before another incident is opened for the same key
+        """
+        self.detector = detector
+        self.enabled = enabled
+        self.auto_incident = auto_incident
+        self.incident_levels = set(incident_levels)
+        self.incident_cooldown = incident_cooldown
+        # Callables receiving each saved LogAnomaly
+        self.listeners = []
+        self._lock = threading.Lock()
+        self._detected = 0
+
+    def process(self, entries):
+        """
+        Feed saved logs to the detector and record the anomalies found.
+
+        Args:
+            entries: Saved Log instances
+        """
+        if not self.enabled:
+            return
+
+        found = []
+        with self._lock:
+            observe = self.detector.observe
+            for entry in entries:
+                anomaly = observe((entry.source, entry.level, entry.template_id), entry.timestamp)
+                if anomaly is not None:
+                    found.append(anomaly)
+            self._detected += len(found)
+
+        if found:
+            self._record(found)
+
+    def _record(self, found):
+        """Save anomalies, open incidents for them if configured, and notify listeners."""
+        from ..models import LogAnomaly
+        anomalies = []
+        with transaction.atomic():
+            for item in found:
+                source, level, template_id = item["key"]
+                anomaly = LogAnomaly.objects.create(
+                    source=source,
+                    level=level,
+                    template_id=template_id,
+                    bucket_start=item["bucket_start"],
+                    observed=item["observed"],
+                    expected=item["expected"],
+                    z_score=item["z_score"]
+                )
+                if self.auto_incident and level in self.incident_levels:
+                    self._open_incident(anomaly)
+                anomalies.append(anomaly)
+
+        for anomaly in anomalies:
+            logger.warning(f"Log anomaly: {anomaly}")
+            for listener in self.listeners:
+                try:
+                    listener(anomaly)
+                except Exception as e:
+                    logger.error(f"Error in log anomaly listener: {str(e)}")
+
+    def _open_incident(self, anomaly):
+        """Open an Incident for an anomaly unless one was opened for the same key recently."""
+        from ..models import Incident, LogAnomaly
+        recent = LogAnomaly.objects.filter(
+            source=anomaly.source,
+            level=anomaly.level,
+            template_id=anomaly.template_id,
+            incident__isnull=False,
+            detected_at__gte=anomaly.detected_at - timedelta(seconds=self.incident_cooldown)
+        ).exists()
+        if recent:
+            return
+
+        template = anomaly.template.template if anomaly.template_id else 'any message'
+        anomaly.incident = Incident.objects.create(
+            incident_number=f"ANOM{uuid.uuid4().hex[:8].upper()}",
+            priority=2 if anomaly.level in ('error', 'critical') else 3,
+            short_description=f"Spike of {anomaly.level} logs from {anomaly.source}"[:255],
+            long_description=(
+                f"{anomaly.observed} {anomaly.level} logs from {anomaly.source} in the "
+                f"{self.detector.bucket_seconds}s starting {anomaly.bucket_start.isoformat()}, "
+                f"against an average of {anomaly.expected:.1f} (z-score {anomaly.z_score:.1f}).\n\n"
+                f"Template: {template}"
+            ),
+            comments="Opened automatically by log anomaly detection"
+        )
+        anomaly.save(update_fields=['incident'])
+
+    def stats(self):
+        """
+        Report detector state.
+
+        Returns:
+            dict: Tracked keys, anomalies detected by this process and settings
+        """
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "keys": len(self.detector),
+                "detected": self._detected,
+                "auto_incident": self.auto_incident,
+                "checked_at": timezone.now().isoformat(),
+            }
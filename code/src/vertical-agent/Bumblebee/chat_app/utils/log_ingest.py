@@ -0,0 +1,316 @@
+"""
+Batch ingestion of application logs sent as NDJSON or a JSON array.
+"""
+import codecs
+import gzip
+import io
+import json
+import logging
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import transaction
+from django.utils import timezone
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+MAX_LEVEL_LENGTH = 20
+MAX_SOURCE_LENGTH = 100
+
+# Error details returned to the client are capped; the counts are not
+MAX_REPORTED_ERRORS = 50
+
+
+class IngestError(Exception):
+    """Raised when a payload cannot be read at all (as opposed to single bad records)."""
+
+
+def parse_timestamp(value):
+    """
+    Parse a record timestamp.
+
+    Args:
+        value: ISO 8601 string, epoch seconds or epoch milliseconds, or None
+
+    Returns:
+        datetime: Timezone-aware timestamp, now if value is None
+
+    Raises:
+        ValueError: If the value is not a timestamp
+    """
+    if value is None or value == '':
+        return timezone.now()
+    if isinstance(value, bool):
+        raise ValueError("timestamp must be an ISO 8601 string or epoch number")
+    if isinstance(value, (int, float)):
+        # Values this large are epoch milliseconds
+        seconds = value / 1000 if value > 1e11 else value
+        try:
+            return datetime.fromtimestamp(seconds, tz=dt_timezone.utc)
+        except (OverflowError, OSError):
+            # The platform's time functions reject epochs out of range with either
+            raise ValueError("timestamp is out of range")
+    if isinstance(value, str):
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed, dt_timezone.utc)
+        return parsed
+    raise ValueError("timestamp must be an ISO 8601 string or epoch number")
+
+
+def build_log(record, default_level=None, default_source=None):
+    """
+    Validate a decoded record and build an unsaved Log from it.
+
+    This is the fast path used instead of a DRF serializer per record: plain
+    type and length checks on the fields the Log model has.
+
+    Args:
+        record: Decoded JSON value
+        default_level: Level for records that do not have one
+        default_source: Source for records that do not have one
+
+    Returns:
+        Log: Unsaved log entry
+
+    Raises:
+        ValueError: If the record is not a valid log
+    """
+    from ..models import Log
+
+    if not isinstance(record, dict):
+        raise ValueError("record must be a JSON object")
+
+    message = record.get('message')
+    if not isinstance(message, str) or not message:
+        raise ValueError("message must be a non-empty string")
+
+    level = record.get('level') or default_level
+    if not isinstance(level, str) or not level or len(level) > MAX_LEVEL_LENGTH:
+        raise ValueError(f"level must be a string of at most {MAX_LEVEL_LENGTH} characters")
+
+    source = record.get('source') or default_source
+    if not isinstance(source, str) or not source or len(source) > MAX_SOURCE_LENGTH:
+        raise ValueError(f"source must be a string of at most {MAX_SOURCE_LENGTH} characters")
+
+    return Log(
+        message=message,
+        level=level.lower(),
+        source=source,
+        timestamp=parse_timestamp(record.get('timestamp'))
+    )
+
+
+def iter_ndjson(stream, max_line_bytes=1048576):
+    """
+    Decode newline-delimited JSON, one record per line.
+
+    Args:
+        stream: Binary file-like object
+        max_line_bytes: Longest line accepted; longer lines are rejected without being held in memory
+
+    Yields:
+        tuple: (line number, record, error message or None)
+    """
+    line_number = 0
+    while True:
+        line = stream.readline(max_line_bytes + 1)
+        if not line:
+            return
+        line_number += 1
+
+        if len(line) > max_line_bytes and not line.endswith(b'\n'):
+            # Skip the rest of the oversized line
+            while line and not line.endswith(b'\n'):
+                line = stream.readline(max_line_bytes + 1)
+            yield line_number, None, f"line longer than {max_line_bytes} bytes"
+            continue
+
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield line_number, json.loads(line), None
+        except ValueError as e:
+            yield line_number, None, f"invalid JSON: {str(e)}"
+
+
+def iter_json_array(stream, chunk_size=65536):
+    """
+    Decode the elements of a JSON array incrementally, without loading the whole payload.
+
+    Args:
+        stream: Binary file-like object
+        chunk_size: Bytes read at a time
+
+    Yields:
+        tuple: (element number, record, None)
+
+    Raises:
+        IngestError: If the payload is not a well-formed JSON array
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder('utf-8')()
+    buffer = ''
+    eof = False
+    started = False
+    index = 0
+
+    while True:
+        # Skip whitespace and separators between elements
+        position = 0
+        while position < len(buffer) and buffer[position] in ' \t\r\n,':
+            position += 1
+        buffer = buffer[position:]
+
+        if buffer:
+            if not started:
+                if buffer[0] != '[':
+                    raise IngestError("JSON payload must be an array of log records")
+                started = True
+                buffer = buffer[1:]
+                continue
+            if buffer[0] == ']':
+                return
+            try:
+                record, end = decoder.raw_decode(buffer)
+            except ValueError as e:
+                if eof:
+                    raise IngestError(f"invalid JSON array element {index + 1}: {str(e)}")
+            else:
+                # A value at the very end of the buffer may be a truncated number or literal
+                if end < len(buffer) or eof:
+                    index += 1
+                    yield index, record, None
+                    buffer = buffer[end:]
+                    continue
+
+        if eof:
+            raise IngestError("JSON array is not terminated")
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            eof = True
+            buffer += text_decoder.decode(b'', final=True)
+        else:
+            buffer += text_decoder.decode(chunk)
+
+
+class LogIngestor:
+    """
+    Writes batches of decoded log records in chunks.
+
+    Enrichers registered in enrichers are called with every chunk of Log
+    entries before it is written, inside the same transaction, so they can
+    fill in fields and write related rows atomically with the logs.
+    Processors registered in processors are called with every chunk of
+    saved Log entries. Either way other features build on ingestion without
+    another pass over the data.
+    """
+
+    def __init__(self, chunk_size=1000):
+        """
+        Initialize the ingestor.
+
+        Args:
+            chunk_size: Number of records per bulk_create
+        """
+        self.chunk_size = chunk_size
+        # Callables receiving each list of Log entries before it is saved
+        self.enrichers = []
+        # Callables receiving each list of saved Log entries
+        self.processors = []
+
+    def open_payload(self, stream, content_encoding=''):
+        """
+        Wrap a request stream so it is read decompressed.
+
+        Args:
+            stream: Binary file-like request stream
+            content_encoding: Value of the Content-Encoding header
+
+        Returns:
+            file-like: Stream of the decoded payload
+
+        Raises:
+            IngestError: If the encoding is not supported
+        """
+        content_encoding = (content_encoding or '').strip().lower()
+        if content_encoding in ('', 'identity'):
+            return stream
+        if content_encoding in ('gzip', 'x-gzip'):
+            return io.BufferedReader(gzip.GzipFile(fileobj=stream, mode='rb'))
+        raise IngestError(f"unsupported Content-Encoding: {content_encoding}")
+
+    def ingest(self, records, default_level=None, default_source=None):
+        """
+        Validate records and save the valid ones in chunks.
+
+        Args:
+            records: Iterable of (position, record, decode error) tuples
+            default_level: Level for records that do not have one
+            default_source: Source for records that do not have one
+
+        Returns:
+            dict: Accepted and rejected counts, number of chunks and the first
+                errors, plus "error" if the payload stopped being readable
+        """
+        result = {"accepted": 0, "rejected": 0, "chunks": 0, "errors": []}
+        pending = []
+
+        def reject(position, error):
+            result["rejected"] += 1
+            if len(result["errors"]) < MAX_REPORTED_ERRORS:
+                result["errors"].append({"record": position, "error": error})
+
+        try:
+            for position, record, error in records:
+                if error is not None:
+                    reject(position, error)
+                    continue
+                try:
+                    pending.append(build_log(record, default_level, default_source))
+                except (ValueError, TypeError, OverflowError) as e:
+                    reject(position, str(e))
+                    continue
+                if len(pending) >= self.chunk_size:
+                    self._save_chunk(pending, result)
+                    pending = []
+        except IngestError as e:
+            result["error"] = str(e)
+        except (OSError, EOFError, UnicodeDecodeError) as e:
+            # Truncated or corrupt gzip data, or bytes that are not UTF-8
+            result["error"] = f"could not read payload: {str(e)}"
+
+        # Records decoded before a payload error are still saved
+        if pending:
+            self._save_chunk(pending, result)
+        return result
+
+    def _save_chunk(self, entries, result):
+        """Save one chunk of log entries and count it."""
+        self.save_entries(entries)
+        result["accepted"] += len(entries)
+        result["chunks"] += 1
+
+    def save_entries(self, entries, in_transaction=None):
+        """
+        Save built log entries, passing them through the enrichers and then the processors.
+
+        Args:
+            entries: Unsaved Log instances
+            in_transaction: Callable run in the same transaction after the
+                insert, e.g. to move a sync watermark with the rows
+        """
+        from ..models import Log
+        with transaction.atomic():
+            for enricher in self.enrichers:
+                enricher(entries)
+            Log.objects.bulk_create(entries, batch_size=self.chunk_size)
+            if in_transaction is not None:
+                in_transaction()
+
+        for processor in self.processors:
+            try:
+                processor(entries)
+            except Exception as e:
+                logger.error(f"Error in log ingest processor {getattr(processor, '__name__', processor)}: {str(e)}")
@@ -0,0 +1,248 @@
+"""
+Filtering, keyset pagination and streaming export of logs.
+"""
+import base64
+import json
+import logging
+import uuid
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+
+from .log_ingest import parse_timestamp
+from .log_search import search_logs
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Rows fetched from the database at a time while exporting
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_FIELDS = ('id', 'timestamp', 'level', 'source', 'message')
+
+
+def _split(value):
+    """Split a comma-separated query parameter into its non-empty values."""
+    return [item.strip() for item in value.split(',') if item.strip()] if value else []
+
+
+def parse_time_param(name, value):
+    """
+    Parse a timestamp query parameter.
+
+    Args:
+        name: Parameter name, for the error message
+        value: ISO 8601 timestamp or epoch seconds, as a string
+
+    Returns:
+        datetime: Timezone-aware timestamp
+
+    Raises:
+        ValueError: If the value is not a timestamp
+    """
+    try:
+        # Epoch values arrive as strings in the query string
+        return parse_timestamp(float(value) if value.replace('.', '', 1).isdigit() else value)
+    except (ValueError, OverflowError, OSError):
+        raise ValueError(f"{name} must be an ISO 8601 timestamp or epoch seconds")
+
+
+def filter_logs(queryset, params):
+    """
+    Apply the level, source, time window, template and full-text filters of a log query.
+
+    Args:
+        queryset: Log queryset to filter
+        params: Query parameters; level and source take comma-separated values,
+            start (inclusive) and end (exclusive) take ISO 8601 or epoch timestamps,
+            q takes a full-text search query and template a LogTemplate ID
+
+    Returns:
+        QuerySet: Filtered queryset
+
+    Raises:
+        ValueError: If a parameter is invalid
+    """
+    levels = [level.lower() for level in _split(params.get('level'))]
+    if len(levels) == 1:
+        queryset = queryset.filter(level=levels[0])
+    elif levels:
+        queryset = queryset.filter(level__in=levels)
+
+    sources = _split(params.get('source'))
+    if len(sources) == 1:
+        queryset = queryset.filter(source=sources[0])
+    elif sources:
+        queryset = queryset.filter(source__in=sources)
+
+    for name, lookup in (('start', 'timestamp__gte'), ('end', 'timestamp__lt')):
+        value = params.get(name)
+        if value:
+            queryset = queryset.filter(**{lookup: parse_time_param(name, value)})
+
+    if params.get('template'):
+        try:
+            queryset = queryset.filter(template_id=uuid.UUID(params.get('template')))
+        except ValueError:
+            raise ValueError("template must be a log template ID")
+
+    if params.get('q'):
+        queryset = search_logs(queryset, params.get('q'))
+
+    return queryset
+
+
+def encode_cursor(log_entry):
+    """
+    Encode the keyset position of a log as an opaque cursor.
+
+    Args:
+        log_entry: Last Log of a page
+
+    Returns:
+        str: Cursor for the page after it
+    """
+    position = json.dumps([log_entry.timestamp.isoformat(), str(log_entry.id)])
+    return base64.urlsafe_b64encode(position.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Args:
+        cursor: Cursor from a previous page
+
+    Returns:
+        tuple: (timestamp, id) of the last log of the previous page
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        timestamp, log_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return parse_timestamp(timestamp), uuid.UUID(log_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def keyset_page(queryset, cursor=None, page_size=DEFAULT_PAGE_SIZE, descending=True):
+    """
+    Read one page of logs after a cursor, ordered by (timestamp, id).
+
+    The position is a (timestamp, id) pair rather than an offset, so every
+    page is an index range read however deep into the results it is, and
+    rows inserted meanwhile do not shift the pages.
+
+    Args:
+        queryset: Filtered Log queryset without an ordering
+        cursor: Cursor of the previous page, or None for the first page
+        page_size: Number of logs per page
+        descending: Newest first when True, oldest first otherwise
+
+    Returns:
+        tuple: (list of logs, cursor of the next page or None)
+    """
+    if descending:
+        queryset = queryset.order_by('-timestamp', '-id')
+    else:
+        queryset = queryset.order_by('timestamp', 'id')
+
+    if cursor:
+        timestamp, log_id = decode_cursor(cursor)
+        # (timestamp, id) < position, written so the timestamp range can use the index
+        if descending:
+            queryset = queryset.filter(timestamp__lte=timestamp).exclude(timestamp=timestamp, id__gte=log_id)
+        else:
+            queryset = queryset.filter(timestamp__gte=timestamp).exclude(timestamp=timestamp, id__lte=log_id)
+
+    # One extra row tells whether there is a next page
+    logs = list(queryset[:page_size + 1])
+    if len(logs) > page_size:
+        logs = logs[:page_size]
+        return logs, encode_cursor(logs[-1])
+    return logs, None
+
+
+def parse_page_size(value):
+    """
+    Parse the page_size query parameter.
+
+    Args:
+        value: Raw parameter value or None
+
+    Returns:
+        int: Page size between 1 and MAX_PAGE_SIZE
+
+    Raises:
+        ValueError: If the value is not a positive integer
+    """
+    if not value:
+        return DEFAULT_PAGE_SIZE
+    page_size = int(value)
+    if page_size < 1:
+        raise ValueError("page_size must be a positive integer")
+    return min(page_size, MAX_PAGE_SIZE)
+
+
+def export_line(row):
+    """
+    Format one exported log (a values_list row of EXPORT_FIELDS) as an NDJSON line.
+    """
+    log_id, timestamp, level, source, message = row
+    return json.dumps({
+        "id": str(log_id),
+        "timestamp": timestamp.isoformat(),
+        "level": level,
+        "source": source,
+        "message": message
+    }) + '\n'
+
+
+def iter_export_lines(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Stream logs as NDJSON lines.
+
+    Rows are read with a database iterator in chunks and written one line at
+    a time, so memory stays constant whatever the number of rows.
+
+    Args:
+        queryset: Filtered and ordered Log queryset
+        chunk_size: Rows fetched from the database at a time
+
+    Yields:
+        str: One JSON object per line
+    """
+    count = 0
+    for row in queryset.values_list(*EXPORT_FIELDS).iterator(chunk_size=chunk_size):
+        count += 1
+        yield export_line(row)
+    logger.info(f"Exported {count} logs")
+
+
+async def aiter_export_lines(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Async version of iter_export_lines, for streaming responses under ASGI.
+
+    Django reads a synchronous iterator to the end before sending it under
+    ASGI. Here each chunk of lines is read from iter_export_lines with
+    sync_to_async, on the request's database thread, and sent before the
+    next one is read.
+
+    Args:
+        queryset: Filtered and ordered Log queryset
+        chunk_size: Rows fetched from the database at a time
+
+    Yields:
+        str: chunk_size NDJSON lines at a time
+    """
+    lines = iter_export_lines(queryset, chunk_size)
+    next_chunk = sync_to_async(lambda: ''.join(islice(lines, chunk_size)))
+    while True:
+        chunk = await next_chunk()
+        if not chunk:
+            break
+        yield chunk
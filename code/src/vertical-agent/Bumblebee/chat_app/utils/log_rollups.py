@@ -0,0 +1,251 @@
+"""
+Per-minute, per-hour and per-day log counts by level and source.
+"""
+import logging
+from datetime import timedelta, timezone as dt_timezone
+
+from django.db import connections, router, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Trunc
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+GRANULARITIES = ('minute', 'hour', 'day')
+
+BUCKET_SIZES = {
+    'minute': timedelta(minutes=1),
+    'hour': timedelta(hours=1),
+    'day': timedelta(days=1),
+}
+
+# Histograms longer than this many buckets use the next coarser granularity
+MAX_AUTO_BUCKETS = 500
+
+# Zero-filled buckets are only returned up to this many
+MAX_FILLED_BUCKETS = 10000
+
+
+def bucket_start(timestamp, granularity):
+    """
+    Truncate a timestamp to the start of its bucket (UTC).
+
+    Args:
+        timestamp: Timezone-aware datetime
+        granularity: 'minute', 'hour' or 'day'
+
+    Returns:
+        datetime: Start of the bucket
+    """
+    timestamp = timestamp.astimezone(dt_timezone.utc)
+    if granularity == 'minute':
+        return timestamp.replace(second=0, microsecond=0)
+    if granularity == 'hour':
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def count_entries(entries):
+    """
+    Count log entries per rollup row.
+
+    Args:
+        entries: Log instances
+
+    Returns:
+        dict: (granularity, bucket, level, source) -> count
+    """
+    counts = {}
+    for entry in entries:
+        for granularity in GRANULARITIES:
+            key = (granularity, bucket_start(entry.timestamp, granularity), entry.level, entry.source)
+            counts[key] = counts.get(key, 0) + 1
+    return counts
+
+
+def add_to_rollups(entries, using=None):
+    """
+    Add log entries to the rollup counts.
+
+    Call it in the transaction that writes the logs, so the counts and the
+    rows cannot disagree. SQLite and PostgreSQL increment the counts with a
+    single INSERT ... ON CONFLICT DO UPDATE; other backends update row by row.
+
+    Args:
+        entries: Log instances being saved
+        using: Database alias, the default write database if None
+    """
+    from ..models import Log, LogRollup
+    counts = count_entries(entries)
+    if not counts:
+        return
+
+    using = using or router.db_for_write(Log)
+    connection = connections[using]
+    if connection.vendor in ('sqlite', 'postgresql'):
+        table = connection.ops.quote_name(LogRollup._meta.db_table)
+        sql = (
+            f"INSERT INTO {table} (granularity, bucket, level, source, count) VALUES (%s, %s, %s, %s, %s) "
+            f"ON CONFLICT (granularity, bucket, level, source) DO UPDATE SET count = {table}.count + excluded.count"
+        )
+        rows = [
+            (granularity, connection.ops.adapt_datetimefield_value(bucket), level, source, count)
+            for (granularity, bucket, level, source), count in counts.items()
+        ]
+        with connection.cursor() as cursor:
+            cursor.executemany(sql, rows)
+        return
+
+    with transaction.atomic(using=using):
+        for (granularity, bucket, level, source), count in counts.items():
+            updated = LogRollup.objects.using(using).filter(
+                granularity=granularity, bucket=bucket, level=level, source=source
+            ).update(count=F('count') + count)
+            if not updated:
+                LogRollup.objects.using(using).create(
+                    granularity=granularity, bucket=bucket, level=level, source=source, count=count
+                )
+
+
+def rebuild_rollups(start, end=None):
+    """
+    Recompute the rollups of a time range from the Log table.
+
+    Used to backfill logs saved before rollups existed or to repair counts.
+    The range is widened to whole days so every granularity is complete.
+
+    Args:
+        start: Start of the range
+        end: End of the range, now if None
+
+    Returns:
+        int: Number of rollup rows written
+    """
+    from django.utils import timezone
+    from ..models import Log, LogRollup
+
+    start = bucket_start(start, 'day')
+    end = bucket_start(end or timezone.now(), 'day') + BUCKET_SIZES['day']
+    written = 0
+    with transaction.atomic():
+        LogRollup.objects.filter(bucket__gte=start, bucket__lt=end).delete()
+        for granularity in GRANULARITIES:
+            rows = (
+                Log.objects.filter(timestamp__gte=start, timestamp__lt=end)
+                .annotate(bucket=Trunc('timestamp', granularity, tzinfo=dt_timezone.utc))
+                .values('bucket', 'level', 'source')
+                .annotate(count=Count('id'))
+                .order_by()
+            )
+            batch = [
+                LogRollup(granularity=granularity, bucket=row['bucket'], level=row['level'],
+                          source=row['source'], count=row['count'])
+                for row in rows
+            ]
+            LogRollup.objects.bulk_create(batch, batch_size=1000)
+            written += len(batch)
+    return written
+
+
+def prune_rollups(retention_days, now=None):
+    """
+    Delete rollup rows older than the retention of their granularity.
+
+    Coarser granularities already hold the sums of the finer ones, so pruning
+    minute rows after a few days leaves the hour and day histograms intact.
+
+    Args:
+        retention_days: Dict of granularity -> days to keep (None keeps forever)
+        now: Current time, for tests
+
+    Returns:
+        dict: Granularity -> number of rows deleted
+    """
+    from django.utils import timezone
+    from ..models import LogRollup
+
+    now = now or timezone.now()
+    deleted = {}
+    for granularity in GRANULARITIES:
+        days = retention_days.get(granularity)
+        if days is None:
+            continue
+        cutoff = bucket_start(now - timedelta(days=days), granularity)
+        deleted[granularity], _ = LogRollup.objects.filter(granularity=granularity, bucket__lt=cutoff).delete()
+    return deleted
+
+
+def choose_granularity(start, end, retention_days, now):
+    """
+    Pick the finest granularity that covers a range in at most MAX_AUTO_BUCKETS buckets
+    and whose rows for the start of the range have not been pruned.
+
+    Args:
+        start: Start of the range
+        end: End of the range
+        retention_days: Dict of granularity -> days kept
+        now: Current time
+
+    Returns:
+        str: 'minute', 'hour' or 'day'
+    """
+    for granularity in GRANULARITIES:
+        days = retention_days.get(granularity)
+        if days is not None and start < now - timedelta(days=days):
+            continue
+        if (end - start) / BUCKET_SIZES[granularity] <= MAX_AUTO_BUCKETS:
+            return granularity
+    return 'day'
+
+
+def histogram(start, end, granularity, levels=None, sources=None, group_by=None):
+    """
+    Count logs per bucket from the rollups.
+
+    Reads one rollup row per bucket and level/source combination instead
+    of the logs themselves.
+
+    Args:
+        start: Start of the range (inclusive, truncated to the bucket)
+        end: End of the range (exclusive)
+        granularity: 'minute', 'hour' or 'day'
+        levels: Levels to count, all if empty
+        sources: Sources to count, all if empty
+        group_by: 'level', 'source' or None for totals only
+
+    Returns:
+        list: One dict per bucket, oldest first, with the bucket start, the
+            count and, when grouping, the counts per level or source
+    """
+    from ..models import LogRollup
+
+    first = bucket_start(start, granularity)
+    queryset = LogRollup.objects.filter(granularity=granularity, bucket__gte=first, bucket__lt=end)
+    if levels:
+        queryset = queryset.filter(level__in=levels)
+    if sources:
+        queryset = queryset.filter(source__in=sources)
+
+    fields = ['bucket'] + ([group_by] if group_by else [])
+    # Ordered like the unique index so rows are grouped while it is read
+    rows = queryset.values(*fields).annotate(total=Sum('count')).order_by(*fields)
+
+    buckets = {}
+    for row in rows:
+        bucket = buckets.setdefault(row['bucket'], {"bucket": row['bucket'], "count": 0})
+        bucket["count"] += row['total']
+        if group_by:
+            bucket.setdefault("by", {})[row[group_by]] = row['total']
+
+    # Fill empty buckets so charts get an evenly spaced series
+    size = BUCKET_SIZES[granularity]
+    if (end - first) / size <= MAX_FILLED_BUCKETS:
+        current = first
+        while current < end:
+            empty = {"bucket": current, "count": 0}
+            if group_by:
+                empty["by"] = {}
+            buckets.setdefault(current, empty)
+            current += size
+
+    return [buckets[key] for key in sorted(buckets)]
@@ -0,0 +1,232 @@
+"""
+Full-text search over log messages.
+
+SQLite uses an FTS5 table over chat_app_log kept in sync by triggers;
+PostgreSQL uses a GIN index on to_tsvector('simple', message). Either way
+the index is updated by the database in the same transaction as the log
+rows, and searches are a filter that composes with the other log filters.
+"""
+import logging
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, Q
+from django.db.models.expressions import RawSQL
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+LOG_TABLE = 'chat_app_log'
+FTS_TABLE = 'chat_app_log_fts'
+POSTGRES_INDEX = 'log_message_fts_idx'
+
+# 'simple' keeps identifiers, hostnames and error codes as they are instead of stemming them
+POSTGRES_CONFIG = 'simple'
+
+SQLITE_INSTALL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(message, content='{LOG_TABLE}', tokenize='unicode61')",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {LOG_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, message) VALUES (new.rowid, new.message);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {LOG_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, message) VALUES ('delete', old.rowid, old.message);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF message ON {LOG_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, message) VALUES ('delete', old.rowid, old.message);
+        INSERT INTO {FTS_TABLE}(rowid, message) VALUES (new.rowid, new.message);
+    END""",
+    # Index the rows that already exist
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+SQLITE_UNINSTALL = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+POSTGRES_INSTALL = [
+    f"CREATE INDEX IF NOT EXISTS {POSTGRES_INDEX} ON {LOG_TABLE} USING GIN (to_tsvector('{POSTGRES_CONFIG}', message))",
+]
+
+POSTGRES_UNINSTALL = [
+    f"DROP INDEX IF EXISTS {POSTGRES_INDEX}",
+]
+
+# Aliases of databases whose full-text index is known to be in place
+_ready = set()
+
+
+def _execute(connection, statements):
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def install_fulltext_index(connection):
+    """
+    Create the full-text index for the backend of a connection.
+
+    Args:
+        connection: Database connection (or schema_editor.connection in a migration)
+    """
+    if connection.vendor == 'sqlite':
+        _execute(connection, SQLITE_INSTALL)
+    elif connection.vendor == 'postgresql':
+        _execute(connection, POSTGRES_INSTALL)
+    else:
+        logger.warning(f"No full-text index for {connection.vendor}; log search will use LIKE")
+        return
+    _ready.add(connection.alias)
+
+
+def uninstall_fulltext_index(connection):
+    """
+    Drop the full-text index for the backend of a connection.
+
+    Args:
+        connection: Database connection (or schema_editor.connection in a migration)
+    """
+    if connection.vendor == 'sqlite':
+        _execute(connection, SQLITE_UNINSTALL)
+    elif connection.vendor == 'postgresql':
+        _execute(connection, POSTGRES_UNINSTALL)
+    _ready.discard(connection.alias)
+
+
+def ensure_fulltext_index(connection, rebuild=False):
+    """
+    Reinstall the SQLite triggers and reindex if they are missing.
+
+    Django rebuilds a SQLite table to alter it, which drops its triggers and
+    renumbers its rowids, and VACUUM may renumber rowids too. Run after
+    migrations, and with rebuild=True after a VACUUM.
+
+    Args:
+        connection: Database connection
+        rebuild: Reindex every log even if the triggers are in place
+
+    Returns:
+        bool: True if the index was (re)built
+    """
+    if connection.vendor != 'sqlite':
+        return False
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger') AND name LIKE %s",
+            [f"{FTS_TABLE}%"]
+        )
+        existing = {row[0] for row in cursor.fetchall()}
+
+    if FTS_TABLE not in existing:
+        # Not installed (yet); the migration creates it
+        return False
+
+    if rebuild or not {f"{FTS_TABLE}_ai", f"{FTS_TABLE}_ad", f"{FTS_TABLE}_au"} <= existing:
+        logger.info("Rebuilding the log full-text index")
+        _execute(connection, SQLITE_INSTALL)
+        _ready.add(connection.alias)
+        return True
+    return False
+
+
+def _is_ready(connection):
+    """Check once per database whether the full-text index exists."""
+    if connection.alias in _ready:
+        return True
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+        elif connection.vendor == 'postgresql':
+            cursor.execute("SELECT 1 FROM pg_indexes WHERE indexname = %s", [POSTGRES_INDEX])
+        else:
+            return False
+        found = cursor.fetchone() is not None
+    if found:
+        _ready.add(connection.alias)
+    return found
+
+
+def parse_search_query(text):
+    """
+    Split a search query into terms.
+
+    Words are matched individually (all must match); "quoted words" match as
+    a phrase and a trailing * makes the last word a prefix, e.g.
+    `"connection reset" timeou*`.
+
+    Args:
+        text: Search query as typed by the user
+
+    Returns:
+        list: (words, is_prefix) pairs, one per term
+    """
+    terms = []
+    for match in re.finditer(r'"([^"]*)"\*?|\S+', text or ''):
+        term = match.group(0)
+        words = re.findall(r'\w+', match.group(1) if match.group(1) is not None else term)
+        if words:
+            terms.append(([word.lower() for word in words], term.endswith('*')))
+    return terms
+
+
+def sqlite_match_expression(terms):
+    """Build an FTS5 MATCH expression; terms only contain word characters, so quoting is safe."""
+    parts = []
+    for words, prefix in terms:
+        parts.append('"' + ' '.join(words) + '"' + ('*' if prefix else ''))
+    return ' AND '.join(parts)
+
+
+def postgres_tsquery(terms):
+    """Build a to_tsquery expression; phrases use the followed-by operator."""
+    parts = []
+    for words, prefix in terms:
+        lexemes = [f"'{w}'" for w in words]
+        if prefix:
+            lexemes[-1] += ':*'
+        parts.append('(' + ' <-> '.join(lexemes) + ')')
+    return ' & '.join(parts)
+
+
+def search_logs(queryset, text):
+    """
+    Restrict a Log queryset to logs whose message matches a search query.
+
+    Args:
+        queryset: Log queryset
+        text: Search query, see parse_search_query
+
+    Returns:
+        QuerySet: Filtered queryset
+
+    Raises:
+        ValueError: If the query has no searchable words
+    """
+    terms = parse_search_query(text)
+    if not terms:
+        raise ValueError("q must contain at least one word")
+
+    connection = connections[queryset.db]
+    if not _is_ready(connection):
+        # No full-text index on this backend: every word must appear somewhere in the message
+        condition = Q()
+        for words, _ in terms:
+            condition &= Q(message__icontains=' '.join(words))
+        return queryset.filter(condition)
+
+    if connection.vendor == 'sqlite':
+        match = RawSQL(
+            f"{LOG_TABLE}.rowid IN (SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s)",
+            [sqlite_match_expression(terms)],
+            output_field=BooleanField()
+        )
+    else:
+        match = RawSQL(
+            f"to_tsvector('{POSTGRES_CONFIG}', {LOG_TABLE}.message) @@ to_tsquery('{POSTGRES_CONFIG}', %s)",
+            [postgres_tsquery(terms)],
+            output_field=BooleanField()
+        )
+    return queryset.filter(match)
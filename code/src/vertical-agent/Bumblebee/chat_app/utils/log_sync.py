@@ -0,0 +1,248 @@
+"""
+Incremental sync of logs from MongoDB into the Log table.
+"""
+import logging
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from .log_ingest import parse_timestamp, MAX_LEVEL_LENGTH, MAX_SOURCE_LENGTH
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+
+class LogSyncError(Exception):
+    """Raised when the sync cannot reach or read its source."""
+
+
+def _load_pymongo():
+    """Import pymongo, which only the sync needs."""
+    try:
+        import pymongo
+        from bson import ObjectId
+    except ImportError:
+        raise LogSyncError("MongoDB log sync needs pymongo. Please install pymongo.")
+    return pymongo, ObjectId
+
+
+def _position(document):
+    """(timestamp, _id) of a document in watermark form, or None if its timestamp is not a date."""
+    timestamp = document.get("timestamp")
+    if not isinstance(timestamp, datetime):
+        return None
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=dt_timezone.utc)
+    # ObjectId hex strings have a fixed length, so they compare in _id order
+    return timestamp.astimezone(dt_timezone.utc), str(document["_id"])
+
+
+class MongoLogSync:
+    """
+    Copies new documents of a MongoDB logs collection into Log.
+
+    The position of the last copied document, (timestamp, _id), is kept in a
+    LogSyncState row and moved in the same transaction as the inserted logs.
+    Each batch is an index range read after that position, so a sync costs
+    as much as the new documents, whatever the size of the collection.
+    Logs carry the document _id as external_id, and IDs already present are
+    skipped, so replaying a batch never duplicates logs. Batches are saved
+    through a LogIngestor, so synced logs are mined, counted and watched
+    like ingested ones.
+    """
+
+    def __init__(self, ingestor, uri, database='platformManager', collection='logs', name='mongo-logs',
+                 batch_size=1000, default_source='mongo', ensure_index=True):
+        """
+        Initialize the sync.
+
+        Args:
+            ingestor: LogIngestor used to save the logs
+            uri: MongoDB connection URI
+            database: Database holding the logs
+            collection: Logs collection
+            name: Name of the LogSyncState row holding the watermark
+            batch_size: Documents read and saved per batch
+            default_source: Source for documents without one
+            ensure_index: Create the (timestamp, _id) index the batches are read from
+        """
+        self.ingestor = ingestor
+        self.uri = uri
+        self.database = database
+        self.collection_name = collection
+        self.name = name
+        self.batch_size = batch_size
+        self.default_source = default_source
+        self.ensure_index = ensure_index
+        self._collection = None
+
+    @property
+    def collection(self):
+        """The logs collection on a client created on first use."""
+        if self._collection is None:
+            if not self.uri:
+                raise LogSyncError("No MongoDB URI configured for the log sync")
+            pymongo, _ = _load_pymongo()
+            client = pymongo.MongoClient(self.uri)
+            self._collection = client[self.database][self.collection_name]
+            if self.ensure_index:
+                self._collection.create_index(
+                    [("timestamp", pymongo.ASCENDING), ("_id", pymongo.ASCENDING)], name="timestamp_1__id_1"
+                )
+        return self._collection
+
+    def _state(self):
+        from ..models import LogSyncState
+        state, _ = LogSyncState.objects.get_or_create(name=self.name)
+        return state
+
+    def _after(self, state):
+        """Query for the documents after the watermark."""
+        if state.last_timestamp is None:
+            return {"timestamp": {"$type": "date"}}
+        _, ObjectId = _load_pymongo()
+        # Mongo stores naive UTC datetimes
+        timestamp = state.last_timestamp.astimezone(dt_timezone.utc).replace(tzinfo=None)
+        last_id = ObjectId(state.last_id) if ObjectId.is_valid(state.last_id) else state.last_id
+        # (timestamp, _id) > watermark, with the timestamp bound on its own so it limits the index range
+        return {
+            "timestamp": {"$gte": timestamp},
+            "$or": [{"timestamp": {"$gt": timestamp}}, {"_id": {"$gt": last_id}}],
+        }
+
+    def build_log(self, document):
+        """
+        Convert a log document to an unsaved Log.
+
+        Args:
+            document: MongoDB document with timestamp, level, source and message
+
+        Returns:
+            Log: Unsaved log with external_id set to the document _id
+        """
+        from ..models import Log
+        timestamp = document.get("timestamp")
+        if hasattr(timestamp, "tzinfo"):
+            if timestamp.tzinfo is None:
+                timestamp = timestamp.replace(tzinfo=dt_timezone.utc)
+        else:
+            timestamp = parse_timestamp(timestamp)
+        return Log(
+            external_id=str(document["_id"]),
+            timestamp=timestamp,
+            level=str(document.get("level") or 'info').lower()[:MAX_LEVEL_LENGTH],
+            source=str(document.get("source") or self.default_source)[:MAX_SOURCE_LENGTH],
+            message=str(document.get("message") or '')
+        )
+
+    def save_documents(self, documents, state):
+        """
+        Save documents not synced yet and move the watermark past all of them.
+
+        Args:
+            documents: Documents in (timestamp, _id) order
+            state: LogSyncState of the sync
+
+        Returns:
+            int: Number of logs created
+        """
+        from ..models import Log
+        entries = []
+        for document in documents:
+            try:
+                entries.append(self.build_log(document))
+            except (ValueError, TypeError, OverflowError) as e:
+                logger.error(f"Skipping log document {document.get('_id')}: {str(e)}")
+
+        # Documents seen before (a replayed batch or change stream event) are skipped
+        existing = set(Log.objects.filter(external_id__in=[entry.external_id for entry in entries])
+                       .values_list('external_id', flat=True))
+        entries = [entry for entry in entries if entry.external_id not in existing]
+
+        last = max(filter(None, map(_position, documents)), default=None)
+        if last is not None and (state.last_timestamp is None or last > (state.last_timestamp, state.last_id)):
+            state.last_timestamp, state.last_id = last
+        state.synced += len(entries)
+
+        self.ingestor.save_entries(entries, in_transaction=state.save)
+        return len(entries)
+
+    def sync(self, max_batches=None):
+        """
+        Copy the documents added since the last sync.
+
+        Args:
+            max_batches: Stop after this many batches, None to catch up fully
+
+        Returns:
+            dict: Logs created, batches read and the new watermark
+        """
+        pymongo, _ = _load_pymongo()
+        state = self._state()
+        result = {"synced": 0, "batches": 0}
+        try:
+            while max_batches is None or result["batches"] < max_batches:
+                documents = list(
+                    self.collection.find(self._after(state), {"timestamp": 1, "level": 1, "source": 1, "message": 1})
+                    .sort([("timestamp", pymongo.ASCENDING), ("_id", pymongo.ASCENDING)])
+                    .limit(self.batch_size)
+                )
+                if not documents:
+                    break
+                result["synced"] += self.save_documents(documents, state)
+                result["batches"] += 1
+                if len(documents) < self.batch_size:
+                    break
+        except pymongo.errors.PyMongoError as e:
+            raise LogSyncError(f"Error reading logs from MongoDB: {str(e)}")
+
+        result["last_timestamp"] = state.last_timestamp
+        result["last_id"] = state.last_id
+        return result
+
+    def follow(self, poll_interval=5.0, use_change_stream=True, should_stop=None):
+        """
+        Keep syncing: tail a change stream if the server has one, otherwise poll.
+
+        The change stream is opened before catching up, so documents inserted
+        during the catch-up arrive through it (and are skipped if already
+        synced). Standalone servers have no change streams; then the sync
+        runs every poll_interval seconds.
+
+        Args:
+            poll_interval: Seconds between polls, and the longest wait for stream events
+            use_change_stream: Try a change stream before falling back to polling
+            should_stop: Callable returning True to stop, for tests and signals
+        """
+        pymongo, _ = _load_pymongo()
+        should_stop = should_stop or (lambda: False)
+        if use_change_stream:
+            try:
+                pipeline = [{"$match": {"operationType": "insert"}}]
+                with self.collection.watch(pipeline, max_await_time_ms=int(poll_interval * 1000)) as stream:
+                    logger.info(f"Following {self.collection_name} with a change stream")
+                    self.sync()
+                    self._consume(stream, should_stop)
+                    return
+            except pymongo.errors.OperationFailure as e:
+                logger.info(f"Change streams unavailable ({str(e)}), polling every {poll_interval}s")
+
+        while not should_stop():
+            result = self.sync()
+            if result["synced"]:
+                logger.info(f"Synced {result['synced']} logs from MongoDB")
+            time.sleep(poll_interval)
+
+    def _consume(self, stream, should_stop):
+        """Save inserted documents from a change stream in batches."""
+        state = self._state()
+        pending = []
+        while stream.alive and not should_stop():
+            change = stream.try_next()
+            if change is not None and "timestamp" in change.get("fullDocument", {}):
+                pending.append(change["fullDocument"])
+            # Write when the batch is full or the stream has gone quiet
+            if pending and (change is None or len(pending) >= self.batch_size):
+                self.save_documents(pending, state)
+                pending = []
+        if pending:
+            self.save_documents(pending, state)
@@ -0,0 +1,358 @@
+"""
+Streaming log template mining with a Drain-style fixed-depth parse tree.
+
+A template is a log message with its variable parts (IDs, hosts, durations,
+counts) replaced by <*>, e.g. "Connection to <*> timed out after <*>".
+"""
+import logging
+import re
+import threading
+import uuid
+from collections import OrderedDict
+
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+WILDCARD = '<*>'
+
+# Tokens containing a digit (IDs, IPs, durations, counts) are treated as parameters up front
+_has_digit = re.compile(r'\d').search
+
+
+class LogCluster:
+    """A template and the number of messages assigned to it."""
+    __slots__ = ('id', 'tokens', 'size', 'leaf')
+
+    def __init__(self, cluster_id, tokens, size=0):
+        self.id = cluster_id
+        self.tokens = tokens
+        self.size = size
+        # Tree leaf the cluster was inserted into; its tokens may have been generalized since
+        self.leaf = None
+
+    @property
+    def template(self):
+        return ' '.join(self.tokens)
+
+
+class DrainMiner:
+    """
+    Assigns messages to templates in one pass, without a database.
+
+    Messages are split on whitespace and routed through a tree keyed on the
+    token count and then the first depth - 2 tokens; the leaf holds the
+    candidate templates, and the message joins the most similar one if at
+    least similarity_threshold of its tokens match (differing tokens become
+    <*>), or starts a new template. Masked messages that were seen before
+    skip the tree through a lookup table, which is what most lines hit.
+
+    Not thread-safe; callers serialize access.
+    """
+
+    def __init__(self, depth=4, similarity_threshold=0.4, max_children=100, max_clusters=10000, cache_size=100000):
+        """
+        Initialize the miner.
+
+        Args:
+            depth: Tree depth including the root and token-count levels (at least 3)
+            similarity_threshold: Share of matching tokens needed to join a template
+            max_children: Children per tree node before tokens share a <*> branch
+            max_clusters: Templates kept in memory (least recently used are dropped)
+            cache_size: Masked messages remembered for the lookup table
+        """
+        self.prefix_depth = max(depth - 2, 1)
+        self.similarity_threshold = similarity_threshold
+        self.max_children = max_children
+        self.max_clusters = max_clusters
+        self.cache_size = cache_size
+
+        self.clusters = OrderedDict()
+        self._root = {}
+        self._cache = {}
+        # Clusters created or generalized since the last drain_changes()
+        self._changed = {}
+
+    def add(self, message):
+        """
+        Assign a message to a template.
+
+        Args:
+            message: Log message
+
+        Returns:
+            tuple: (cluster, list of parameter values in template order)
+        """
+        tokens = message.split()
+        masked = tuple([WILDCARD if _has_digit(token) else token for token in tokens])
+
+        cluster = self._cache.get(masked)
+        if cluster is None or cluster.id not in self.clusters:
+            cluster = self._match(masked)
+            if len(self._cache) >= self.cache_size:
+                self._cache.clear()
+            self._cache[masked] = cluster
+
+        cluster.size += 1
+        self.clusters.move_to_end(cluster.id)
+        params = [token for token, template_token in zip(tokens, cluster.tokens) if template_token == WILDCARD]
+        return cluster, params
+
+    def load(self, cluster_id, template, size=0):
+        """
+        Restore a known template, e.g. from the database.
+
+        Args:
+            cluster_id: ID of the template
+            template: Template text
+            size: Messages already assigned to it
+
+        Returns:
+            LogCluster: Restored cluster
+        """
+        cluster = LogCluster(cluster_id, tuple(template.split()), size)
+        self._add_cluster(cluster)
+        return cluster
+
+    def drain_changes(self):
+        """
+        Return and reset the clusters created or generalized since the last call.
+
+        Returns:
+            list: Changed clusters, including any dropped from memory since
+        """
+        changed = list(self._changed.values())
+        self._changed.clear()
+        return changed
+
+    def _match(self, masked):
+        """Find the best matching cluster in the tree, generalizing it, or create one."""
+        leaf = self._leaf(masked, create=False)
+        best = None
+        if leaf:
+            best_similarity = -1.0
+            best_params = -1
+            for cluster in leaf:
+                same = params = 0
+                for template_token, token in zip(cluster.tokens, masked):
+                    if template_token == WILDCARD:
+                        params += 1
+                    elif template_token == token:
+                        same += 1
+                similarity = same / len(masked) if masked else 1.0
+                if similarity > best_similarity or (similarity == best_similarity and params > best_params):
+                    best, best_similarity, best_params = cluster, similarity, params
+            if best_similarity < self.similarity_threshold:
+                best = None
+
+        if best is None:
+            best = LogCluster(uuid.uuid4(), masked)
+            self._add_cluster(best)
+            self._changed[best.id] = best
+            return best
+
+        generalized = tuple(
+            template_token if template_token == token else WILDCARD
+            for template_token, token in zip(best.tokens, masked)
+        )
+        if generalized != best.tokens:
+            best.tokens = generalized
+            self._changed[best.id] = best
+        return best
+
+    def _leaf(self, tokens, create):
+        """Walk the tree for a token sequence and return its leaf list (None if missing and not create)."""
+        node = self._root.get(len(tokens))
+        if node is None:
+            if not create:
+                return None
+            node = self._root[len(tokens)] = {}
+
+        for token in tokens[:self.prefix_depth]:
+            child = node.get(token)
+            if child is None:
+                if not create:
+                    child = node.get(WILDCARD)
+                    if child is None:
+                        return None
+                else:
+                    key = token if len(node) < self.max_children else WILDCARD
+                    child = node.setdefault(key, {})
+            node = child
+
+        leaf = node.get(None)
+        if leaf is None and create:
+            leaf = node[None] = []
+        return leaf
+
+    def _add_cluster(self, cluster):
+        """Insert a cluster into the tree, dropping the least recently used one if full."""
+        cluster.leaf = self._leaf(cluster.tokens, create=True)
+        cluster.leaf.append(cluster)
+        self.clusters[cluster.id] = cluster
+        while len(self.clusters) > self.max_clusters:
+            _, evicted = self.clusters.popitem(last=False)
+            evicted.leaf.remove(evicted)
+
+
+def extract_params(template_tokens, message):
+    """
+    Pick the values of a message at the <*> positions of a template.
+
+    Args:
+        template_tokens: Template split into tokens
+        message: Log message of that template
+
+    Returns:
+        list: Parameter values in template order
+    """
+    return [token for token, template_token in zip(message.split(), template_tokens) if template_token == WILDCARD]
+
+
+def render_template(template, params):
+    """
+    Rebuild a message from its template and parameters.
+
+    Args:
+        template: Template text
+        params: Parameter values in template order
+
+    Returns:
+        str: Message with single spaces between tokens
+    """
+    values = iter(params or [])
+    return ' '.join(next(values, WILDCARD) if token == WILDCARD else token for token in template.split())
+
+
+class LogTemplateMiner:
+    """
+    Assigns saved logs to LogTemplate rows.
+
+    Meant to be registered in LogIngestor.enrichers: each chunk of logs is
+    mined before it is written, so the template and params are part of the
+    same bulk insert, and new or generalized templates are saved in the same
+    transaction. The tree is per process and is restored from the database
+    on first use.
+    """
+
+    def __init__(self, depth=4, similarity_threshold=0.4, max_clusters=10000, enabled=True):
+        """
+        Initialize the miner.
+
+        Args:
+            depth: Parse tree depth
+            similarity_threshold: Share of matching tokens needed to join a template
+            max_clusters: Templates kept in memory
+            enabled: Mine templates; when False logs are left without a template
+        """
+        self.enabled = enabled
+        self.miner = DrainMiner(depth=depth, similarity_threshold=similarity_threshold, max_clusters=max_clusters)
+        self._lock = threading.Lock()
+        self._loaded = False
+        # Templates known to exist in the database
+        self._saved = set()
+
+    def _load(self):
+        """Restore the most recently seen templates from the database."""
+        from ..models import LogTemplate
+        templates = LogTemplate.objects.order_by('-last_seen').values_list('id', 'template', 'count')[:self.miner.max_clusters]
+        # Oldest first, so the most recent end up most recently used
+        for template_id, template, count in reversed(list(templates)):
+            self.miner.load(template_id, template, count)
+            self._saved.add(template_id)
+        self._loaded = True
+        logger.info(f"Loaded {len(self._saved)} log templates")
+
+    def enrich(self, entries):
+        """
+        Set template and params on unsaved logs and save the templates they use.
+
+        Args:
+            entries: Unsaved Log instances
+        """
+        if not self.enabled or not entries:
+            return
+
+        with self._lock:
+            if not self._loaded:
+                self._load()
+
+            clusters = {}
+            counts = {}
+            first_seen = {}
+            last_seen = {}
+            for entry in entries:
+                cluster, _ = self.miner.add(entry.message)
+                entry.template_id = cluster.id
+                clusters[cluster.id] = cluster
+                counts[cluster.id] = counts.get(cluster.id, 0) + 1
+                if cluster.id not in first_seen or entry.timestamp < first_seen[cluster.id]:
+                    first_seen[cluster.id] = entry.timestamp
+                if cluster.id not in last_seen or entry.timestamp > last_seen[cluster.id]:
+                    last_seen[cluster.id] = entry.timestamp
+
+            # Templates may have been generalized by later logs of the chunk
+            for entry in entries:
+                entry.params = extract_params(clusters[entry.template_id].tokens, entry.message)
+
+            changed = self.miner.drain_changes()
+            self._save(changed, clusters, counts, first_seen, last_seen)
+
+    def _save(self, changed, clusters, counts, first_seen, last_seen):
+        """Create new templates, update generalized ones and bump the counts."""
+        from ..models import LogTemplate
+        now = timezone.now()
+        changed_ids = {cluster.id for cluster in changed}
+        new = [cluster for cluster in changed if cluster.id not in self._saved]
+
+        with transaction.atomic():
+            if new:
+                LogTemplate.objects.bulk_create([
+                    LogTemplate(
+                        id=cluster.id,
+                        template=cluster.template,
+                        token_count=len(cluster.tokens),
+                        count=counts.get(cluster.id, 0),
+                        first_seen=first_seen.get(cluster.id, now),
+                        last_seen=last_seen.get(cluster.id, now)
+                    )
+                    for cluster in new
+                ])
+                self._saved.update(cluster.id for cluster in new)
+
+            new_ids = {cluster.id for cluster in new}
+            for cluster_id, count in counts.items():
+                if cluster_id in new_ids:
+                    continue
+                fields = {
+                    'count': F('count') + count,
+                    'last_seen': Greatest(F('last_seen'), last_seen[cluster_id]),
+                }
+                cluster = clusters[cluster_id]
+                if cluster_id in changed_ids:
+                    fields['template'] = cluster.template
+                updated = LogTemplate.objects.filter(pk=cluster_id).update(**fields)
+                if not updated:
+                    # Deleted from the database meanwhile; recreate it so the logs can point to it
+                    LogTemplate.objects.create(
+                        id=cluster_id,
+                        template=cluster.template,
+                        token_count=len(cluster.tokens),
+                        count=count,
+                        first_seen=first_seen[cluster_id],
+                        last_seen=last_seen[cluster_id]
+                    )
+
+    def stats(self):
+        """
+        Report miner state.
+
+        Returns:
+            dict: Number of templates in memory and whether mining is enabled
+        """
+        with self._lock:
+            return {"enabled": self.enabled, "templates": len(self.miner.clusters), "loaded": self._loaded}
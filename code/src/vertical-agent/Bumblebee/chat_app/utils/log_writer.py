@@ -0,0 +1,316 @@
+"""
+Buffered writer that takes audit Log inserts off the request path.
+"""
+import atexit
+import logging
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from .log_rollups import add_to_rollups
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Queued to tell the flush thread to write what it has and stop
+_STOP = object()
+
+
+class BufferedLogWriter:
+    """
+    Queues Log records in memory and writes them with bulk_create from a background thread.
+
+    A batch is written once it reaches batch_size records or flush_interval
+    seconds after its first record, whichever comes first. When the buffer
+    is full, callers block for up to put_timeout seconds (backpressure) and
+    then write their record themselves rather than drop it. A batch that
+    fails is retried once and then written record by record, so one bad
+    record does not take the others with it; a record that cannot be
+    written even on its own is counted as failed and logged in full. The
+    buffer is flushed when the process exits.
+
+    As with LogIngestor, enrichers registered in enrichers are called with
+    every batch before it is inserted, in the same transaction, and the
+    rollup counts are updated after them; listeners receive the written
+    batches.
+    """
+
+    def __init__(self, max_buffer=10000, batch_size=500, flush_interval=1.0, put_timeout=2.0, enabled=True):
+        """
+        Initialize the writer.
+
+        Args:
+            max_buffer: Maximum number of records waiting to be written
+            batch_size: Maximum number of records per bulk_create
+            flush_interval: Seconds a record may wait before its batch is written
+            put_timeout: Seconds a caller waits for buffer space before writing synchronously
+            enabled: Buffer records; when False every record is written immediately
+        """
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.enabled = enabled
+
+        # Callables receiving each list of records before it is written
+        self.enrichers = []
+        # Callables receiving each list of records once it is written
+        self.listeners = []
+
+        self._queue = queue.Queue(maxsize=max_buffer)
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._closed = False
+
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "queued": 0,
+            "written": 0,
+            "batches": 0,
+            "sync_writes": 0,
+            "failed": 0,
+        }
+
+    def log(self, message, level="info", source="system", timestamp=None):
+        """
+        Record a log entry.
+
+        Args:
+            message: Log message
+            level: Log level (info, warning, error)
+            source: Component that produced the log
+            timestamp: When the event happened, now by default
+
+        Returns:
+            Log: The record; it is saved shortly after unless buffering is disabled
+        """
+        from ..models import Log
+        log_entry = Log(
+            message=message,
+            level=level,
+            source=source,
+            timestamp=timestamp or timezone.now()
+        )
+        self.write(log_entry)
+        return log_entry
+
+    def write(self, log_entry):
+        """
+        Queue an unsaved Log instance for writing.
+
+        Args:
+            log_entry: Log instance to write
+        """
+        if not self.enabled or self._closed:
+            self._write_now([log_entry])
+            return
+
+        self._ensure_started()
+        try:
+            self._queue.put(log_entry, timeout=self.put_timeout)
+        except queue.Full:
+            logger.warning(f"Log buffer full for {self.put_timeout}s, writing log entry synchronously")
+            self._write_now([log_entry])
+            return
+
+        with self._stats_lock:
+            self._stats["queued"] += 1
+
+    def flush(self):
+        """Block until every queued record has been written."""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.join()
+
+    def close(self, timeout=10.0):
+        """
+        Write the remaining records and stop the flush thread.
+
+        Args:
+            timeout: Seconds to wait for the flush thread to finish
+        """
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+
+    def stats(self):
+        """
+        Report buffer activity.
+
+        Returns:
+            dict: Queued, written, batch, synchronous-write and failure counters
+        """
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["pending"] = self._queue.qsize()
+        stats["enabled"] = self.enabled
+        return stats
+
+    def _ensure_started(self):
+        """Start the flush thread on first use."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='log-writer', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        """Flush thread: collect records into batches and write them."""
+        stopping = False
+        while not stopping:
+            batch = []
+            first = self._queue.get()
+            if first is _STOP:
+                self._queue.task_done()
+                break
+            batch.append(first)
+
+            # Collect until the batch is full or the first record has waited flush_interval
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    self._queue.task_done()
+                    stopping = True
+                    break
+                batch.append(item)
+
+            try:
+                self._write_batch(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+        # Drain anything queued after the stop request
+        leftover = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            self._queue.task_done()
+            if item is not _STOP:
+                leftover.append(item)
+        if leftover:
+            self._write_batch(leftover)
+        connection.close()
+
+    def _insert(self, entries):
+        """Enrich and insert records and add them to the rollups in one transaction."""
+        from ..models import Log
+        with transaction.atomic():
+            for enricher in self.enrichers:
+                enricher(entries)
+            Log.objects.bulk_create(entries, batch_size=self.batch_size)
+            add_to_rollups(entries)
+
+    def _write_batch(self, batch):
+        """
+        Write a batch from the flush thread.
+
+        The batch is retried once on a database error, then written one
+        record at a time; records failing on their own are reported by
+        _lost.
+        """
+        for attempt in range(2):
+            try:
+                self._insert(batch)
+                with self._stats_lock:
+                    self._stats["written"] += len(batch)
+                    self._stats["batches"] += 1
+                self._notify(batch)
+                return
+            except Exception as e:
+                logger.error(f"Error writing {len(batch)} log entries (attempt {attempt + 1}): {str(e)}")
+                self._reset(batch)
+                # A broken connection is replaced on the next query
+                close_old_connections()
+
+        written = []
+        for entry in batch:
+            try:
+                self._insert([entry])
+            except Exception as e:
+                self._reset([entry])
+                close_old_connections()
+                self._lost([entry], e)
+                continue
+            written.append(entry)
+        if written:
+            with self._stats_lock:
+                self._stats["written"] += len(written)
+                self._stats["batches"] += 1
+            self._notify(written)
+
+    def _reset(self, entries):
+        """Clear the ids a rolled-back insert assigned, so the records can be inserted again."""
+        for entry in entries:
+            entry.pk = None
+
+    def _lost(self, entries, error):
+        """Count records that could not be written and log them, so they can be recovered from the log."""
+        with self._stats_lock:
+            self._stats["failed"] += len(entries)
+        for entry in entries:
+            logger.error(
+                f"Log entry lost ({str(error)}): timestamp={entry.timestamp} level={entry.level} "
+                f"source={entry.source} message={entry.message!r}"
+            )
+
+    def _write_now(self, entries):
+        """Write records on the calling thread."""
+        try:
+            self._insert(entries)
+            with self._stats_lock:
+                self._stats["written"] += len(entries)
+                self._stats["sync_writes"] += len(entries)
+        except Exception as e:
+            self._lost(entries, e)
+            return
+        self._notify(entries)
+
+    def _notify(self, entries):
+        """Pass written records to the listeners."""
+        for listener in self.listeners:
+            try:
+                listener(entries)
+            except Exception as e:
+                logger.error(f"Error in log writer listener: {str(e)}")
+
+
+_log_writer = None
+_log_writer_lock = threading.Lock()
+
+
+def get_log_writer():
+    """
+    Get the process-wide buffered log writer, creating it on first use.
+
+    Returns:
+        BufferedLogWriter: Writer configured from the AUDIT_LOG_* settings
+    """
+    global _log_writer
+    if _log_writer is None:
+        with _log_writer_lock:
+            if _log_writer is None:
+                _log_writer = BufferedLogWriter(
+                    max_buffer=settings.AUDIT_LOG_MAX_BUFFER,
+                    batch_size=settings.AUDIT_LOG_BATCH_SIZE,
+                    flush_interval=settings.AUDIT_LOG_FLUSH_INTERVAL,
+                    put_timeout=settings.AUDIT_LOG_PUT_TIMEOUT,
+                    enabled=settings.AUDIT_LOG_BUFFERED
+                )
+                atexit.register(_log_writer.close)
+    return _log_writer
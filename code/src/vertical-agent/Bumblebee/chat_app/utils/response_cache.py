@@ -0,0 +1,428 @@
+"""
+Response cache for reusing LLM answers to repeated support questions.
+"""
+import asyncio
+import hashlib
+import logging
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+_PUNCTUATION_RE = re.compile(r"[^\w\s@]")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_question(text):
+    """
+    Normalise a user question so trivially different phrasings share a key.
+
+    Args:
+        text: Raw user question
+
+    Returns:
+        str: Lower-cased question without punctuation or repeated whitespace
+    """
+    text = _PUNCTUATION_RE.sub(" ", (text or "").lower())
+    return _WHITESPACE_RE.sub(" ", text).strip()
+
+
+def chunk_identity(doc):
+    """
+    Build the (source id, chunk id, version) identity of a retrieved chunk.
+
+    The version is a hash of the chunk content, so editing a document or a
+    knowledge base entry produces a new identity even if the ids are reused.
+
+    Args:
+        doc: Search result from the vector store
+
+    Returns:
+        tuple: (source_id, chunk_id, version)
+    """
+    metadata = doc.get("metadata", {})
+    source_id = str(metadata.get("document_id") or metadata.get("kb_id") or metadata.get("title", ""))
+    chunk_id = f"{source_id}_{metadata.get('chunk', 0)}"
+    version = hashlib.sha1(doc.get("content", "").encode("utf-8")).hexdigest()[:16]
+    return source_id, chunk_id, version
+
+
+def context_hash(relevant_docs):
+    """
+    Hash the identities and versions of the retrieved chunks.
+
+    Args:
+        relevant_docs: Search results from the vector store
+
+    Returns:
+        str: Stable hash of the retrieval context
+    """
+    identities = sorted(f"{chunk_id}:{version}" for _, chunk_id, version in map(chunk_identity, relevant_docs or []))
+    return hashlib.sha1("|".join(identities).encode("utf-8")).hexdigest()
+
+
+def _unit_vector(vector):
+    """Scale a vector to unit length so cosine similarity becomes a dot product."""
+    norm = math.sqrt(sum(x * x for x in vector))
+    if not norm:
+        return []
+    return [x / norm for x in vector]
+
+
+class ResponseCache:
+    """
+    In-process cache of generated chat responses.
+
+    Entries are keyed on the normalised question, the identities and versions
+    of the retrieved chunks and the model. Lookups try the exact key first and
+    then the embedding-nearest question that was answered from the same
+    context. Entries are dropped as soon as one of their source documents
+    changes in the vector store.
+    """
+
+    def __init__(self, max_entries=500, ttl=3600, similarity_threshold=0.92, embed_fn=None, enabled=True,
+                 max_candidates=32, aembed_fn=None):
+        """
+        Initialize the response cache.
+
+        Args:
+            max_entries: Maximum number of cached responses (LRU eviction)
+            ttl: Seconds an entry stays valid
+            similarity_threshold: Minimum cosine similarity for a semantic hit
+            embed_fn: Callable returning an embedding for a text, or None
+            enabled: Whether the cache serves and stores responses at all
+            max_candidates: Most recent same-context entries compared in a semantic lookup
+            aembed_fn: Coroutine function returning an embedding for a text, used by aget and aset
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.similarity_threshold = similarity_threshold
+        self.embed_fn = embed_fn
+        self.enabled = enabled
+        self.max_candidates = max_candidates
+        self.aembed_fn = aembed_fn
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._keys_by_context = {}
+        self._keys_by_source = {}
+        # Embeddings of questions that missed, kept so set() can reuse them
+        self._pending_embeddings = OrderedDict()
+
+        self._stats = {
+            "exact_hits": 0,
+            "semantic_hits": 0,
+            "misses": 0,
+            "saved_latency_seconds": 0.0,
+            "invalidations": 0,
+            "evictions": 0,
+        }
+
+    def get(self, question, relevant_docs, model):
+        """
+        Look up a cached response.
+
+        Args:
+            question: User question
+            relevant_docs: Chunks retrieved for the question
+            model: Name of the model that would answer the question
+
+        Returns:
+            str: Cached response or None on a miss
+        """
+        if not self.enabled:
+            return None
+
+        normalized = normalize_question(question)
+        response, candidates = self._lookup(normalized, relevant_docs, model)
+        if response is not None:
+            return response
+
+        # Only pay for an embedding when there is something to compare against
+        if candidates and self.embed_fn is not None:
+            response = self._semantic_hit(self._nearest(normalized, self._embed(normalized), candidates))
+            if response is not None:
+                return response
+
+        return self._miss(normalized)
+
+    async def aget(self, question, relevant_docs, model):
+        """
+        Async variant of get that awaits the embedding of the question.
+
+        Args:
+            question: User question
+            relevant_docs: Chunks retrieved for the question
+            model: Name of the model that would answer the question
+
+        Returns:
+            str: Cached response or None on a miss
+        """
+        if not self.enabled:
+            return None
+
+        normalized = normalize_question(question)
+        response, candidates = self._lookup(normalized, relevant_docs, model)
+        if response is not None:
+            return response
+
+        if candidates and (self.aembed_fn is not None or self.embed_fn is not None):
+            response = self._semantic_hit(self._nearest(normalized, await self._aembed(normalized), candidates))
+            if response is not None:
+                return response
+
+        return self._miss(normalized)
+
+    def set(self, question, relevant_docs, model, response, latency):
+        """
+        Store a generated response.
+
+        Args:
+            question: User question
+            relevant_docs: Chunks the response was generated from
+            model: Name of the model that produced the response
+            response: Generated response text
+            latency: Seconds it took to generate the response
+        """
+        if not self.enabled or not response:
+            return
+
+        normalized = normalize_question(question)
+        # Embed the question once, here, reusing the embedding of the lookup that missed;
+        # the API call is made outside the lock so it does not stall other lookups
+        embedding = self._pop_pending_embedding(normalized)
+        if embedding is None and self.embed_fn is not None:
+            embedding = self._embed(normalized)
+        self._store(normalized, relevant_docs, model, response, latency, embedding)
+
+    async def aset(self, question, relevant_docs, model, response, latency):
+        """
+        Async variant of set that awaits the embedding of the question.
+
+        Args:
+            question: User question
+            relevant_docs: Chunks the response was generated from
+            model: Name of the model that produced the response
+            response: Generated response text
+            latency: Seconds it took to generate the response
+        """
+        if not self.enabled or not response:
+            return
+
+        normalized = normalize_question(question)
+        embedding = self._pop_pending_embedding(normalized)
+        if embedding is None and (self.aembed_fn is not None or self.embed_fn is not None):
+            embedding = await self._aembed(normalized)
+        self._store(normalized, relevant_docs, model, response, latency, embedding)
+
+    def invalidate_source(self, source_id):
+        """
+        Drop every entry that was generated from chunks of a source.
+
+        Args:
+            source_id: ID of the document or knowledge base entry that changed
+        """
+        with self._lock:
+            keys = list(self._keys_by_source.get(str(source_id), ()))
+            for key in keys:
+                self._remove(key)
+            self._stats["invalidations"] += len(keys)
+
+        if keys:
+            logger.info(f"Invalidated {len(keys)} cached responses for source {source_id}")
+
+    def clear(self):
+        """Remove all cached responses."""
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_context.clear()
+            self._keys_by_source.clear()
+            self._pending_embeddings.clear()
+
+    def stats(self):
+        """
+        Report cache effectiveness.
+
+        Returns:
+            dict: Hit, miss and saved-latency counters
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+
+        hits = stats["exact_hits"] + stats["semantic_hits"]
+        lookups = hits + stats["misses"]
+        stats["hit_rate"] = round(hits / lookups, 4) if lookups else 0.0
+        stats["saved_latency_seconds"] = round(stats["saved_latency_seconds"], 3)
+        stats["enabled"] = self.enabled
+        return stats
+
+    def _context_key(self, relevant_docs, model):
+        """Combine the retrieval context and the model into one key part."""
+        return f"{model}:{context_hash(relevant_docs)}"
+
+    def _key(self, normalized, context_key):
+        """Build the exact lookup key."""
+        return hashlib.sha1(f"{context_key}|{normalized}".encode("utf-8")).hexdigest()
+
+    def _lookup(self, normalized, relevant_docs, model):
+        """
+        Try the exact key of a question.
+
+        Returns:
+            tuple: (cached response or None, keys of the same-context entries to compare on a miss)
+        """
+        context_key = self._context_key(relevant_docs, model)
+        key = self._key(normalized, context_key)
+        with self._lock:
+            entry = self._live_entry(key)
+            if entry is not None:
+                return self._record_hit(key, entry, "exact_hits"), []
+            return None, list(self._keys_by_context.get(context_key, ()))[-self.max_candidates:]
+
+    def _semantic_hit(self, match):
+        """Return the response of the nearest entry if it is still live, or None."""
+        if match is None:
+            return None
+        with self._lock:
+            entry = self._live_entry(match)
+            if entry is None:
+                return None
+            return self._record_hit(match, entry, "semantic_hits")
+
+    def _miss(self, normalized):
+        """Count a miss."""
+        with self._lock:
+            self._stats["misses"] += 1
+        logger.info(f"Response cache miss for question: '{normalized[:80]}'")
+        return None
+
+    def _pop_pending_embedding(self, normalized):
+        """Take the embedding a missed lookup computed for a question, if any."""
+        with self._lock:
+            return self._pending_embeddings.pop(normalized, None)
+
+    def _store(self, normalized, relevant_docs, model, response, latency, embedding):
+        """Add an entry with its embedding, evicting the least recently used ones."""
+        context_key = self._context_key(relevant_docs, model)
+        key = self._key(normalized, context_key)
+        sources = {source_id for source_id, _, _ in map(chunk_identity, relevant_docs or [])}
+
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = {
+                "response": response,
+                "normalized": normalized,
+                "context_key": context_key,
+                "sources": sources,
+                "latency": latency,
+                "created_at": time.monotonic(),
+                "embedding": embedding,
+            }
+            # Insertion-ordered so semantic lookups can compare the most recent entries first
+            self._keys_by_context.setdefault(context_key, {})[key] = None
+            for source_id in sources:
+                self._keys_by_source.setdefault(source_id, set()).add(key)
+
+            while len(self._entries) > self.max_entries:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self._stats["evictions"] += 1
+
+    def _live_entry(self, key):
+        """Return a non-expired entry, dropping it if it has expired. Caller holds the lock."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry["created_at"] > self.ttl:
+            self._remove(key)
+            return None
+        return entry
+
+    def _record_hit(self, key, entry, kind):
+        """Update LRU order and counters for a hit. Caller holds the lock."""
+        self._entries.move_to_end(key)
+        self._stats[kind] += 1
+        self._stats["saved_latency_seconds"] += entry["latency"]
+        logger.info(f"Response cache {kind[:-5]} hit, saved {entry['latency']:.2f}s of generation")
+        return entry["response"]
+
+    def _remove(self, key):
+        """Remove an entry and its index references. Caller holds the lock."""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        context_keys = self._keys_by_context.get(entry["context_key"])
+        if context_keys is not None:
+            context_keys.pop(key, None)
+            if not context_keys:
+                del self._keys_by_context[entry["context_key"]]
+        for source_id in entry["sources"]:
+            source_keys = self._keys_by_source.get(source_id)
+            if source_keys is not None:
+                source_keys.discard(key)
+                if not source_keys:
+                    del self._keys_by_source[source_id]
+
+    def _embed(self, normalized):
+        """Embed a normalised question as a unit vector, or return None."""
+        try:
+            embedding = self.embed_fn(normalized)
+        except Exception as e:
+            logger.error(f"Error embedding question for response cache: {str(e)}")
+            return None
+        if embedding is None:
+            return None
+        return _unit_vector(embedding)
+
+    async def _aembed(self, normalized):
+        """Embed a normalised question with aembed_fn, or embed_fn on a thread, as a unit vector or None."""
+        try:
+            if self.aembed_fn is not None:
+                embedding = await self.aembed_fn(normalized)
+            else:
+                embedding = await asyncio.get_running_loop().run_in_executor(None, self.embed_fn, normalized)
+        except Exception as e:
+            logger.error(f"Error embedding question for response cache: {str(e)}")
+            return None
+        if embedding is None:
+            return None
+        return _unit_vector(embedding)
+
+    def _nearest(self, normalized, query_embedding, candidate_keys):
+        """
+        Find the cached question most similar to the given one.
+
+        Only the embeddings stored with the entries are compared, so a lookup
+        makes no embedding calls besides the one for the query itself.
+
+        Args:
+            normalized: Normalised question to match
+            query_embedding: Unit embedding of the question, or None
+            candidate_keys: Keys of entries answered from the same context
+
+        Returns:
+            str: Key of the best entry above the similarity threshold, or None
+        """
+        if query_embedding is None:
+            return None
+
+        with self._lock:
+            self._pending_embeddings[normalized] = query_embedding
+            while len(self._pending_embeddings) > self.max_entries:
+                self._pending_embeddings.popitem(last=False)
+            # Stored embeddings are never modified, so they can be compared outside the lock
+            candidates = [(key, self._entries[key]["embedding"]) for key in candidate_keys
+                          if key in self._entries and self._entries[key]["embedding"] is not None]
+
+        best_key = None
+        best_score = self.similarity_threshold
+        for key, embedding in candidates:
+            score = sum(x * y for x, y in zip(query_embedding, embedding))
+            if score >= best_score:
+                best_key, best_score = key, score
+        return best_key
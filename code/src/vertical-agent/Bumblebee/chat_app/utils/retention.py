@@ -0,0 +1,212 @@
+"""
+Retention of logs and conversations: archive expired rows, then delete them in small batches.
+"""
+import gzip
+import json
+import logging
+import os
+import time
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+class NdjsonArchive:
+    """
+    Gzipped NDJSON file that purged rows are written to before they are deleted.
+
+    The file is only created when the first row is written, and every batch
+    is flushed before its rows are deleted, so a crash can at worst leave a
+    row both archived and still in the table, never deleted and unarchived.
+    """
+
+    def __init__(self, directory, name):
+        """
+        Initialize the archive.
+
+        Args:
+            directory: Directory for archive files
+            name: Prefix of the file name, e.g. 'logs'
+        """
+        self.path = os.path.join(directory, f"{name}-{timezone.now():%Y%m%dT%H%M%S}.ndjson.gz")
+        self._file = None
+        self.rows = 0
+
+    def write(self, rows):
+        """
+        Append rows and flush them to disk.
+
+        Args:
+            rows: JSON-serializable dicts
+        """
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._file = gzip.open(self.path, 'at', encoding='utf-8')
+        for row in rows:
+            self._file.write(json.dumps(row, default=str) + '\n')
+            self.rows += 1
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def purge_logs(queryset, batch_size=DEFAULT_BATCH_SIZE, pause=0.0, archive=None):
+    """
+    Delete logs in batches, oldest first.
+
+    Each batch is the next batch_size rows in (timestamp, id) order, read from
+    the timestamp index and deleted by primary key in its own short
+    transaction, so the write lock is never held for long.
+
+    Args:
+        queryset: Logs to delete
+        batch_size: Rows per batch
+        pause: Seconds to sleep between batches
+        archive: NdjsonArchive receiving the rows before they are deleted, or None
+
+    Returns:
+        int: Number of logs deleted
+    """
+    from ..models import Log
+    fields = ('id', 'timestamp', 'level', 'source', 'message', 'template_id', 'params')
+    deleted = 0
+    while True:
+        rows = list(queryset.order_by('timestamp', 'id').values(*fields)[:batch_size])
+        if not rows:
+            break
+        if archive is not None:
+            archive.write(rows)
+        with transaction.atomic():
+            count, _ = Log.objects.filter(id__in=[row['id'] for row in rows]).delete()
+        deleted += count
+        if len(rows) < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+    return deleted
+
+
+def purge_conversations(queryset, batch_size=DEFAULT_BATCH_SIZE, pause=0.0, archive=None):
+    """
+    Delete conversations and their messages in batches.
+
+    Messages are deleted explicitly, a batch of conversations at a time,
+    instead of through one cascading delete of every conversation.
+
+    Args:
+        queryset: Conversations to delete
+        batch_size: Messages per batch; conversations per batch are capped at a tenth of it
+        pause: Seconds to sleep between batches
+        archive: NdjsonArchive receiving each conversation with its messages, or None
+
+    Returns:
+        int: Number of conversations deleted
+    """
+    from ..models import Conversation, Message
+    conversations_per_batch = max(batch_size // 10, 1)
+    deleted = 0
+    while True:
+        conversations = list(
+            queryset.order_by('updated_at', 'id').values('id', 'title', 'created_at', 'updated_at')[:conversations_per_batch]
+        )
+        if not conversations:
+            break
+        ids = [conversation['id'] for conversation in conversations]
+
+        if archive is not None:
+            messages = {}
+            for message in Message.objects.filter(conversation_id__in=ids).order_by('conversation_id', 'created_at').values(
+                'id', 'conversation_id', 'role', 'content', 'created_at'
+            ):
+                messages.setdefault(message.pop('conversation_id'), []).append(message)
+            archive.write([dict(conversation, messages=messages.get(conversation['id'], [])) for conversation in conversations])
+
+        # Long conversations are emptied over several transactions
+        while True:
+            message_ids = list(Message.objects.filter(conversation_id__in=ids).values_list('id', flat=True)[:batch_size])
+            if not message_ids:
+                break
+            with transaction.atomic():
+                Message.objects.filter(id__in=message_ids).delete()
+            if pause and len(message_ids) == batch_size:
+                time.sleep(pause)
+
+        with transaction.atomic():
+            count, _ = Conversation.objects.filter(id__in=ids).delete()
+        deleted += count
+        if len(conversations) < conversations_per_batch:
+            break
+        if pause:
+            time.sleep(pause)
+    return deleted
+
+
+def enforce_retention(log_days, source_days, conversation_days, batch_size=DEFAULT_BATCH_SIZE, pause=0.0,
+                      archive_dir=None, now=None, dry_run=False):
+    """
+    Purge logs and conversations older than their retention.
+
+    Args:
+        log_days: Days logs are kept (0 keeps forever)
+        source_days: Dict of source -> days, overriding log_days for logs of that source
+        conversation_days: Days a conversation is kept after its last update (0 keeps forever)
+        batch_size: Rows per batch
+        pause: Seconds to sleep between batches
+        archive_dir: Directory for the NDJSON archives, or None to delete without archiving
+        now: Current time, for tests
+        dry_run: Count the expired rows without deleting them
+
+    Returns:
+        dict: Expired (dry run) or deleted rows per policy, and the archive files written
+    """
+    from ..models import Conversation, Log
+    now = now or timezone.now()
+
+    # Each source with an override has its own policy; the default covers all other sources
+    policies = [(f"logs:{source}", Log.objects.filter(source=source), days) for source, days in source_days.items()]
+    policies.append(("logs", Log.objects.exclude(source__in=list(source_days)), log_days))
+
+    result = {"dry_run": dry_run, "purged": {}, "archives": []}
+    log_archive = NdjsonArchive(archive_dir, 'logs') if archive_dir and not dry_run else None
+    try:
+        for name, queryset, days in policies:
+            if not days:
+                continue
+            expired = queryset.filter(timestamp__lt=now - timedelta(days=days))
+            if dry_run:
+                result["purged"][name] = expired.count()
+                continue
+            result["purged"][name] = purge_logs(expired, batch_size=batch_size, pause=pause, archive=log_archive)
+            logger.info(f"Purged {result['purged'][name]} {name} older than {days} days")
+    finally:
+        if log_archive is not None:
+            log_archive.close()
+            if log_archive.rows:
+                result["archives"].append(log_archive.path)
+
+    if conversation_days:
+        expired = Conversation.objects.filter(updated_at__lt=now - timedelta(days=conversation_days))
+        if dry_run:
+            result["purged"]["conversations"] = expired.count()
+        else:
+            archive = NdjsonArchive(archive_dir, 'conversations') if archive_dir else None
+            try:
+                result["purged"]["conversations"] = purge_conversations(expired, batch_size=batch_size, pause=pause, archive=archive)
+            finally:
+                if archive is not None:
+                    archive.close()
+                    if archive.rows:
+                        result["archives"].append(archive.path)
+            logger.info(f"Purged {result['purged']['conversations']} conversations idle for {conversation_days} days")
+
+    return result
@@ -0,0 +1,174 @@
+"""
+Single-flight coalescing of identical concurrent calls.
+"""
+import asyncio
+import logging
+import threading
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    """An in-flight call that followers can wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.followers = 0
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share a key into one upstream call.
+
+    The first caller for a key (the leader) runs the function. Callers that
+    arrive with the same key while it is running wait for the leader and
+    receive the same result, or the same exception. Once the call finishes
+    the key is forgotten, so later callers start a fresh call.
+    """
+
+    def __init__(self, name="single_flight"):
+        """
+        Initialize the coalescer.
+
+        Args:
+            name: Name used in log messages
+        """
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.leader_count = 0
+        self.shared_count = 0
+
+    def do(self, key, fn, *args, **kwargs):
+        """
+        Run fn once for all concurrent callers with the same key.
+
+        Args:
+            key: Hashable key identifying identical calls
+            fn: Function to call
+            *args: Positional arguments for fn
+            **kwargs: Keyword arguments for fn
+
+        Returns:
+            tuple: (result, shared) where shared is True if another caller ran fn
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = _Call()
+                self._calls[key] = call
+                self.leader_count += 1
+                leader = True
+            else:
+                call.followers += 1
+                self.shared_count += 1
+                leader = False
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn(*args, **kwargs)
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+            if call.followers:
+                logger.info(f"{self.name}: shared one call with {call.followers} concurrent identical requests")
+
+        return call.result, False
+
+    def stats(self):
+        """
+        Report how many calls were coalesced.
+
+        Returns:
+            dict: Number of upstream calls, shared results and calls in flight
+        """
+        with self._lock:
+            return {
+                "upstream_calls": self.leader_count,
+                "shared_results": self.shared_count,
+                "in_flight": len(self._calls),
+            }
+
+
+class AsyncSingleFlight:
+    """
+    Coalesce concurrent coroutine calls that share a key, for the async message path.
+
+    Behaves like SingleFlight but followers await the leader's future instead
+    of blocking a thread. All callers must run on the same event loop.
+    """
+
+    def __init__(self, name="single_flight"):
+        """
+        Initialize the coalescer.
+
+        Args:
+            name: Name used in log messages
+        """
+        self.name = name
+        self._calls = {}
+        self.leader_count = 0
+        self.shared_count = 0
+
+    async def do(self, key, coro_fn, *args, **kwargs):
+        """
+        Await coro_fn once for all concurrent callers with the same key.
+
+        Args:
+            key: Hashable key identifying identical calls
+            coro_fn: Coroutine function to await
+            *args: Positional arguments for coro_fn
+            **kwargs: Keyword arguments for coro_fn
+
+        Returns:
+            tuple: (result, shared) where shared is True if another caller ran coro_fn
+        """
+        future = self._calls.get(key)
+        if future is not None:
+            self.shared_count += 1
+            # Shield the shared future so a cancelled follower does not cancel the leader
+            return await asyncio.shield(future), True
+
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        self.leader_count += 1
+        try:
+            result = await coro_fn(*args, **kwargs)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved in case nobody was waiting
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            del self._calls[key]
+
+    def stats(self):
+        """
+        Report how many calls were coalesced.
+
+        Returns:
+            dict: Number of upstream calls, shared results and calls in flight
+        """
+        return {
+            "upstream_calls": self.leader_count,
+            "shared_results": self.shared_count,
+            "in_flight": len(self._calls),
+        }
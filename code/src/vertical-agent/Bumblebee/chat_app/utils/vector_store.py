@@ -31,7 +31,22 @@ class VectorStore:
         self.initialized = False
         # This will be set from the outside by views.py
         self.openai_service = None
+        # Callables notified with a source ID whenever its chunks change
+        self.change_listeners = []
         self._initialize_vector_store()
+
+    def _notify_change(self, source_id):
+        """
+        Notify change listeners that the chunks of a source were added, replaced or removed.
+        
+        Args:
+            source_id: ID of the document or knowledge base entry that changed
+        """
+        for listener in self.change_listeners:
+            try:
+                listener(str(source_id))
+            except Exception as e:
+                logger.error(f"Error notifying vector store change listener: {str(e)}")
         
     def _initialize_vector_store(self):
         """Initialize the vector store with Langchain and FAISS/Chroma."""
@@ -235,6 +250,8 @@ class VectorStore:
             
             with open(self.documents_info_path, 'w') as f:
                 json.dump(self.documents_info, f)
+            
+            self._notify_change(document_id)
                 
             return str(document_id)
             
@@ -242,13 +259,17 @@ class VectorStore:
             logger.error(f"Error adding document to vector store: {str(e)}")
             raise
     
-    def search(self, query, top_k=3):
+    # Chunk collections that can be searched, by name
+    SEARCH_COLLECTIONS = ('documents', 'knowledge_base')
+    
+    def search(self, query, top_k=3, collection='documents'):
         """
         Search the vector store for relevant document chunks.
         
         Args:
             query: Search query
             top_k: Number of results to return
+            collection: Chunk collection to search, 'documents' or 'knowledge_base'
             
         Returns:
             list: List of relevant document chunks with metadata
@@ -258,32 +279,41 @@ class VectorStore:
             if not self.initialized:
                 return []
         
+        if collection not in self.SEARCH_COLLECTIONS:
+            raise ValueError(f"Unknown vector store collection: {collection}")
+        
         try:
+            chunks_by_id = self.knowledge_base_by_id if collection == 'knowledge_base' else self.documents_by_id
+            
             # Try to use OpenAI for semantic search if available
             if hasattr(self, 'openai_service') and self.openai_service is not None and self.openai_service.initialized:
-                return self._semantic_search_with_openai(query, top_k)
+                return self._semantic_search_with_openai(query, top_k, chunks_by_id)
             
             # Fall back to basic keyword search
-            return self._basic_keyword_search(query, top_k)
+            return self._basic_keyword_search(query, top_k, chunks_by_id)
             
         except Exception as e:
             logger.error(f"Error searching vector store: {str(e)}")
             return []
             
-    def _semantic_search_with_openai(self, query, top_k=3):
+    def _semantic_search_with_openai(self, query, top_k=3, chunks_by_id=None):
         """
         Perform semantic search using OpenAI embeddings.
         
         Args:
             query: Search query
             top_k: Number of results to return
+            chunks_by_id: Chunks to search, the document chunks by default
             
         Returns:
             list: List of relevant document chunks with metadata
         """
+        if chunks_by_id is None:
+            chunks_by_id = self.documents_by_id
+        
         try:
             # Log the current state of the documents
-            doc_count = len(self.documents_by_id)
+            doc_count = len(chunks_by_id)
             logger.info(f"Searching through {doc_count} document chunks for query: '{query}'")
             if doc_count == 0:
                 logger.warning("No documents found in vector store")
@@ -295,7 +325,7 @@ class VectorStore:
             query_terms = query.lower().split()
             
             # Get all documents and their contents
-            for chunk_id, doc in self.documents_by_id.items():
+            for chunk_id, doc in chunks_by_id.items():
                 content = doc["content"]
                 metadata = doc["metadata"]
                 
@@ -350,25 +380,29 @@ class VectorStore:
             
         except Exception as e:
             logger.error(f"Error in semantic search: {str(e)}")
-            return self._basic_keyword_search(query, top_k)
+            return self._basic_keyword_search(query, top_k, chunks_by_id)
     
-    def _basic_keyword_search(self, query, top_k=3):
+    def _basic_keyword_search(self, query, top_k=3, chunks_by_id=None):
         """
         Perform basic keyword search.
         
         Args:
             query: Search query
             top_k: Number of results to return
+            chunks_by_id: Chunks to search, the document chunks by default
             
         Returns:
             list: List of relevant document chunks with metadata
         """
+        if chunks_by_id is None:
+            chunks_by_id = self.documents_by_id
+        
         # For our simplified implementation, we'll do a basic keyword search
         query_terms = query.lower().split()
         
         # Score each document based on term frequency
         results = []
-        for chunk_id, doc in self.documents_by_id.items():
+        for chunk_id, doc in chunks_by_id.items():
             content = doc["content"].lower()
             metadata = doc["metadata"]
             
@@ -393,9 +427,9 @@ class VectorStore:
             })
         
         # If we have no results but have documents, return a random one
-        if not formatted_results and self.documents_by_id:
-            random_id = list(self.documents_by_id.keys())[0]
-            random_doc = self.documents_by_id[random_id]
+        if not formatted_results and chunks_by_id:
+            random_id = next(iter(chunks_by_id))
+            random_doc = chunks_by_id[random_id]
             formatted_results.append({
                 "content": random_doc["content"],
                 "metadata": random_doc["metadata"],
@@ -439,6 +473,7 @@ class VectorStore:
                     json.dump(self.documents_info, f)
                     
             logger.info(f"Successfully deleted document {document_id} and {len(chunk_ids_to_remove)} chunks")
+            self._notify_change(document_id)
                     
         except Exception as e:
             logger.error(f"Error deleting document from vector store: {str(e)}")
@@ -800,6 +835,8 @@ class VectorStore:
             
             with open(self.knowledge_base_info_path, 'w') as f:
                 json.dump(self.knowledge_base_info, f)
+            
+            self._notify_change(kb_id)
                 
             return str(kb_id)
             
@@ -842,6 +879,7 @@ class VectorStore:
                     json.dump(self.knowledge_base_info, f)
                     
             logger.info(f"Successfully deleted knowledge base entry {kb_id} and {len(chunk_ids_to_remove)} chunks")
+            self._notify_change(kb_id)
                     
         except Exception as e:
             logger.error(f"Error deleting knowledge base entry from vector store: {str(e)}")
@@ -1,22 +1,55 @@
 from django.shortcuts import render, redirect, get_object_or_404
-from django.http import JsonResponse
+from django.http import JsonResponse, HttpResponseNotAllowed, StreamingHttpResponse
 from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.utils import timezone
+from django.core.exceptions import ValidationError
+from django.db import connection as db_connection, transaction, IntegrityError
+from django.db.models import Count, Max
+from django.db.models.functions import Substr
+from django.db.models.signals import post_save, post_delete
 from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import condition
 from rest_framework.decorators import api_view, parser_classes
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from rest_framework.response import Response
 from rest_framework import status
-from .models import Document, Conversation, Message, Automation, Incident, DataSource, Dashboard, Log, KnowledgeBase
+from rest_framework.utils.urls import replace_query_param
+from .models import Document, Conversation, Message, Automation, Incident, DataSource, Dashboard, Log, LogTemplate, LogAnomaly, KnowledgeBase
 from .forms import DocumentUploadForm
 from .serializers import DocumentSerializer, ConversationSerializer, MessageSerializer, AutomationSerializer, IncidentSerializer, DataSourceSerializer, DashboardSerializer, LogSerializer, KnowledgeBaseSerializer
+from .serializers import ConversationListSerializer, IncidentListSerializer, KnowledgeBaseListSerializer, LogTemplateSerializer, LogAnomalySerializer
+from .pagination import paginated_response
 from .utils.document_processor import process_document
 from .utils.vector_store import VectorStore
 from .utils.llm_service import LLMService
 from .utils.openai_service import OpenAIService
 from .utils.automation_service import AutomationService
 from .utils.datasource_service import DataSourceService
+from .utils.response_cache import ResponseCache, normalize_question, context_hash
+from .utils.single_flight import SingleFlight, AsyncSingleFlight
+from .utils.chat_pipeline import ChatTurnPipeline, TurnTimings, is_command
+from .utils.history_window import HistoryWindow
+from .utils.log_writer import get_log_writer
+from .utils.log_ingest import LogIngestor, IngestError, iter_ndjson, iter_json_array
+from .utils.log_query import filter_logs, keyset_page, parse_page_size, parse_time_param, iter_export_lines, aiter_export_lines
+from .utils.log_templates import LogTemplateMiner
+from .utils.log_rollups import add_to_rollups, choose_granularity, histogram, GRANULARITIES
+from .utils.log_anomaly import EwmaRateDetector, LogAnomalyMonitor
+from .utils.retention import purge_conversations
+from .utils.event_broadcaster import EventBroadcaster, format_sse
+from asgiref.sync import sync_to_async
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import hashlib
 import json
+import logging
 import os
+import threading
+import time
+from datetime import timedelta
+
+logger = logging.getLogger(__name__)
 
 # Initialize services
 openai_service = OpenAIService()
@@ -29,12 +62,155 @@ datasource_service = None
 # Connect OpenAI service to vector store for better embeddings
 vector_store.openai_service = openai_service
 
+# Helper function to embed questions for the response cache, only when OpenAI is available
+def embed_question(text):
+    if not openai_service.initialized:
+        return None
+    return openai_service.generate_embeddings(text)
+
+async def aembed_question(text):
+    if not openai_service.initialized:
+        return None
+    return await openai_service.agenerate_embeddings(text)
+
+# Cache generated responses and drop them whenever a source document changes
+response_cache = ResponseCache(
+    max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+    ttl=settings.RESPONSE_CACHE_TTL,
+    similarity_threshold=settings.RESPONSE_CACHE_SIMILARITY_THRESHOLD,
+    embed_fn=embed_question,
+    aembed_fn=aembed_question,
+    enabled=settings.RESPONSE_CACHE_ENABLED
+)
+vector_store.change_listeners.append(response_cache.invalidate_source)
+
+# Coalesce identical in-flight searches and LLM generations into one upstream call
+search_flight = SingleFlight("vector_search")
+llm_flight = SingleFlight("llm_generation")
+
+# Vector searches run on a bounded thread pool; the async message path coalesces on the event loop
+search_executor = ThreadPoolExecutor(max_workers=settings.VECTOR_SEARCH_WORKERS, thread_name_prefix='vector-search')
+async_search_flight = AsyncSingleFlight("vector_search")
+async_llm_flight = AsyncSingleFlight("llm_generation")
+
+# Load only the recent messages the LLM uses, optionally from an in-memory tail kept current on save
+history_window = HistoryWindow(
+    size=settings.CHAT_HISTORY_WINDOW,
+    cache_enabled=settings.CHAT_HISTORY_CACHE_ENABLED,
+    max_conversations=settings.CHAT_HISTORY_CACHE_MAX_CONVERSATIONS
+)
+if history_window.cache_enabled:
+    post_save.connect(history_window.on_message_saved, sender=Message, dispatch_uid='history_window_message_saved')
+    post_delete.connect(history_window.on_conversation_deleted, sender=Conversation, dispatch_uid='history_window_conversation_deleted')
+
+# Runs retrieval across the vector store collections concurrently with the history query
+chat_pipeline = ChatTurnPipeline(
+    vector_store,
+    search_executor,
+    history_window,
+    search_flight=search_flight,
+    async_search_flight=async_search_flight,
+    top_k=3
+)
+
+# Bulk ingestion of application logs; later stages register on log_ingestor.processors
+log_ingestor = LogIngestor(chunk_size=settings.LOG_INGEST_CHUNK_SIZE)
+
+# Assign every ingested log a mined template and its parameters
+log_template_miner = LogTemplateMiner(
+    depth=settings.LOG_TEMPLATE_DEPTH,
+    similarity_threshold=settings.LOG_TEMPLATE_SIMILARITY,
+    max_clusters=settings.LOG_TEMPLATE_MAX_TEMPLATES,
+    enabled=settings.LOG_TEMPLATE_MINING_ENABLED
+)
+log_ingestor.enrichers.append(log_template_miner.enrich)
+get_log_writer().enrichers.append(log_template_miner.enrich)
+# Keep the per-minute/hour/day counts current in the same transaction as the logs
+log_ingestor.enrichers.append(add_to_rollups)
+
+# Flag rate spikes per (source, level, template) as logs are saved
+log_anomaly_monitor = LogAnomalyMonitor(
+    EwmaRateDetector(
+        bucket_seconds=settings.LOG_ANOMALY_BUCKET_SECONDS,
+        alpha=settings.LOG_ANOMALY_ALPHA,
+        z_threshold=settings.LOG_ANOMALY_Z_THRESHOLD,
+        min_count=settings.LOG_ANOMALY_MIN_COUNT,
+        warmup_buckets=settings.LOG_ANOMALY_WARMUP_BUCKETS,
+        max_keys=settings.LOG_ANOMALY_MAX_KEYS
+    ),
+    enabled=settings.LOG_ANOMALY_ENABLED,
+    auto_incident=settings.LOG_ANOMALY_AUTO_INCIDENT,
+    incident_levels=settings.LOG_ANOMALY_INCIDENT_LEVELS,
+    incident_cooldown=settings.LOG_ANOMALY_INCIDENT_COOLDOWN
+)
+log_ingestor.processors.append(log_anomaly_monitor.process)
+get_log_writer().listeners.append(log_anomaly_monitor.process)
+
+# Pushes new logs, incident changes and log anomalies to the UI over Server-Sent Events
+live_events = EventBroadcaster(max_events=settings.LIVE_EVENTS_BUFFER_SIZE)
+# Under ASGI each open stream waits for events on one of these threads
+live_events_executor = ThreadPoolExecutor(max_workers=settings.LIVE_EVENTS_ASYNC_WAITERS, thread_name_prefix='live-events')
+
+def live_log_payload(log_entry):
+    """Fields of a log sent to live streams (what the logs panel shows)."""
+    return {
+        "id": str(log_entry.id),
+        "timestamp": log_entry.timestamp.isoformat(),
+        "level": log_entry.level,
+        "source": log_entry.source,
+        "message": log_entry.message
+    }
+
+def publish_logs(entries):
+    """Publish saved logs; of a large batch only the newest are sent, with a count of the others."""
+    entries = list(entries)
+    limit = settings.LIVE_EVENTS_MAX_LOGS_PER_BATCH
+    if len(entries) > limit:
+        live_events.publish_on_commit('logs_skipped', {"count": len(entries) - limit})
+        entries = sorted(entries, key=lambda entry: entry.timestamp)[-limit:]
+    for entry in entries:
+        live_events.publish_on_commit('log', live_log_payload(entry))
+
+def publish_log_saved(sender, instance, created, **kwargs):
+    """post_save receiver for logs saved one at a time (bulk writes publish through their own hooks)."""
+    if created:
+        publish_logs([instance])
+
+def publish_incident_saved(sender, instance, created, **kwargs):
+    """post_save receiver that pushes new and updated incidents."""
+    live_events.publish_on_commit('incident', {
+        "action": "created" if created else "updated",
+        "incident": IncidentListSerializer(instance).data
+    })
+
+def publish_incident_deleted(sender, instance, **kwargs):
+    """post_delete receiver that pushes deleted incidents."""
+    live_events.publish_on_commit('incident', {"action": "deleted", "incident": {"id": str(instance.id)}})
+
+post_save.connect(publish_log_saved, sender=Log, dispatch_uid='live_events_log_saved')
+post_save.connect(publish_incident_saved, sender=Incident, dispatch_uid='live_events_incident_saved')
+post_delete.connect(publish_incident_deleted, sender=Incident, dispatch_uid='live_events_incident_deleted')
+log_ingestor.processors.append(publish_logs)
+get_log_writer().listeners.append(publish_logs)
+log_anomaly_monitor.listeners.append(
+    lambda anomaly: live_events.publish_on_commit('anomaly', LogAnomalySerializer(anomaly).data)
+)
+
 # Load documents from database into vector store on startup
-if hasattr(vector_store, '_load_documents_from_database'):
+def load_vector_store():
     try:
         vector_store._load_documents_from_database()
     except Exception as e:
         print(f"Error loading documents into vector store: {str(e)}")
+    finally:
+        db_connection.close()
+
+if hasattr(vector_store, '_load_documents_from_database'):
+    # Under ASGI this module is first imported inside the event loop, where the
+    # ORM refuses synchronous queries, so load on a separate thread and wait for it
+    loader = threading.Thread(target=load_vector_store, name='vector-store-loader')
+    loader.start()
+    loader.join()
 
 # Helper function to get or create the automation service
 def get_automation_service():
@@ -50,6 +226,66 @@ def get_datasource_service():
         datasource_service = DataSourceService()
     return datasource_service
 
+# Helper function to get the name of the model that currently answers chat messages
+def current_model_name():
+    if openai_service.initialized:
+        return openai_service.chat_model
+    return llm_service.model_name
+
+def generate_llm_response(user_message, conversation_history, relevant_docs):
+    """
+    Generate a response - use OpenAI if available, otherwise fall back to local LLM.
+    
+    Returns:
+        tuple: (response text, name of the model that produced it)
+    """
+    try:
+        # First try using OpenAI service
+        if openai_service.initialized:
+            response = openai_service.generate_chat_response(
+                user_message,
+                conversation_history,
+                relevant_docs,
+                raise_on_error=True
+            )
+            return response, openai_service.chat_model
+    except Exception as e:
+        print(f"Error using OpenAI service: {str(e)}")
+        
+    # If OpenAI failed or not available, use fallback LLM service
+    response = llm_service.generate_response(
+        user_message, 
+        conversation_history, 
+        relevant_docs
+    )
+    return response, llm_service.model_name
+
+async def agenerate_llm_response(user_message, conversation_history, relevant_docs):
+    """
+    Async variant of generate_llm_response that awaits OpenAI instead of blocking a thread.
+    
+    Returns:
+        tuple: (response text, name of the model that produced it)
+    """
+    try:
+        if openai_service.initialized:
+            response = await openai_service.agenerate_chat_response(
+                user_message,
+                conversation_history,
+                relevant_docs,
+                raise_on_error=True
+            )
+            return response, openai_service.chat_model
+    except Exception as e:
+        print(f"Error using OpenAI service: {str(e)}")
+    
+    response = await sync_to_async(llm_service.generate_response, thread_sensitive=False)(
+        user_message,
+        conversation_history,
+        relevant_docs
+    )
+    return response, llm_service.model_name
+
 def index(request):
     """Render the main chat interface."""
     conversations = Conversation.objects.all().order_by('-updated_at')
@@ -73,9 +309,9 @@ def index(request):
 def conversations(request):
     """API endpoint for managing conversations."""
     if request.method == 'GET':
-        conversations = Conversation.objects.all().order_by('-updated_at')
-        serializer = ConversationSerializer(conversations, many=True)
-        return Response(serializer.data)
+        # One cursor page of conversations, without their messages
+        conversations = Conversation.objects.all()
+        return paginated_response(request, conversations, ConversationListSerializer, ('-updated_at', '-id'))
     
     elif request.method == 'POST':
         serializer = ConversationSerializer(data=request.data)
@@ -90,7 +326,36 @@ def conversations(request):
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+def conversation_etag(request, conversation_id):
+    """
+    ETag of a conversation and its messages, from one aggregate query.
+    
+    Command turns add messages without saving the conversation, so the
+    message count and newest message are part of the tag, not just updated_at.
+    """
+    state = Conversation.objects.filter(pk=conversation_id).annotate(
+        message_count=Count('messages'),
+        last_message_at=Max('messages__created_at')
+    ).values_list('title', 'updated_at', 'message_count', 'last_message_at').first()
+    if state is None:
+        return None
+    return hashlib.sha1(repr(state).encode('utf-8')).hexdigest()
+
+def messages_since(conversation, since):
+    """
+    Messages of a conversation created after the message with ID since.
+    
+    Returns:
+        QuerySet: The newer messages in order, or None if since is not a message of the conversation
+    """
+    try:
+        cursor = conversation.messages.only('created_at').get(pk=since)
+    except (Message.DoesNotExist, ValueError, ValidationError):
+        return None
+    return conversation.messages.filter(created_at__gt=cursor.created_at).order_by('created_at')
+
 @api_view(['GET', 'DELETE', 'PATCH'])
+@condition(etag_func=conversation_etag)
 def conversation_detail(request, conversation_id):
     """API endpoint for individual conversation operations."""
     try:
@@ -100,7 +365,8 @@ def conversation_detail(request, conversation_id):
     
     if request.method == 'GET':
         serializer = ConversationSerializer(conversation)
-        return Response(serializer.data)
+        # Let clients cache the conversation but revalidate it with If-None-Match every time
+        return Response(serializer.data, headers={'Cache-Control': 'no-cache'})
     
     elif request.method == 'PATCH':
         # Update only the fields provided in the request
@@ -114,6 +380,114 @@ def conversation_detail(request, conversation_id):
         conversation.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+def handle_command_message(conversation, user_message_obj, user_message):
+    """
+    Handle @automation and @datasource commands in a chat message.
+    
+    Returns:
+        dict or list: Response data for the command, or None if the message is not a command
+    """
+    # Check for @automation command
+    if '@automation' in user_message.lower():
+        # Handle automation command
+        automation_response = get_automation_service().handle_automation_command(user_message)
+        
+        # Check if response is structured (dict) or simple string
+        if isinstance(automation_response, dict) and ('logs' in automation_response or 'status' in automation_response):
+            # For structured responses, create an assistant message with formatted message
+            # and include the full structured response for client-side processing
+            if 'formatted_message' in automation_response:
+                assistant_message_content = automation_response['formatted_message']
+            else:
+                # Create a formatted message if not already provided
+                assistant_message_content = f"**{automation_response.get('automation', {}).get('name', 'Automation')} Execution Result:**\n\n"
+                
+                if automation_response.get('status') == 'success':
+                    assistant_message_content += f"✅ {automation_response.get('message', 'Execution completed successfully.')}"
+                else:
+                    assistant_message_content += f"❌ {automation_response.get('message', 'Execution failed.')}"
+            
+            # Create the message
+            assistant_message = Message.objects.create(
+                conversation=conversation,
+                role='assistant',
+                content=assistant_message_content
+            )
+            
+            # Return both messages and the automation logs for the modal
+            serializer = MessageSerializer([user_message_obj, assistant_message], many=True)
+            
+            # Return structured response with messages and automation logs
+            return {
+                'messages': serializer.data,
+                'automation_logs': automation_response
+            }
+        else:
+            # For simple string responses
+            assistant_message = Message.objects.create(
+                conversation=conversation,
+                role='assistant',
+                content=automation_response
+            )
+            
+            # Return both user and assistant messages
+            serializer = MessageSerializer([user_message_obj, assistant_message], many=True)
+            return serializer.data
+        
+    # Check for @datasource command
+    if '@datasource' in user_message.lower():
+        # Handle data source command
+        datasource_response = get_datasource_service().handle_datasource_command(user_message)
+        
+        # Check if response is structured (dict) or simple string
+        if isinstance(datasource_response, dict) and 'logs' in datasource_response:
+            # For structured responses, create an assistant message with basic info
+            # and include the full structured response for client-side processing
+            assistant_message_content = f"**{datasource_response.get('datasource', {}).get('name', 'Data Source')} Query Result:**\n\n"
+            
+            if datasource_response.get('status') == 'success':
+                assistant_message_content += f"✅ {datasource_response.get('message', 'Query executed successfully.')}"
+            else:
+                assistant_message_content += f"❌ {datasource_response.get('message', 'Query execution failed.')}"
+            
+            # Create the message
+            assistant_message = Message.objects.create(
+                conversation=conversation,
+                role='assistant',
+                content=assistant_message_content
+            )
+            
+            # Return both messages with the structured response as metadata
+            serializer = MessageSerializer([user_message_obj, assistant_message], many=True)
+            
+            # Ensure we include the full datasource_logs for the frontend to display the modal
+            # Make the logs structure clearer with explicit field mappings
+            response_data = {
+                'messages': serializer.data, 
+                'datasource_logs': {
+                    'datasource': datasource_response.get('datasource', {}),
+                    'status': datasource_response.get('status', ''),
+                    'message': datasource_response.get('message', ''),
+                    'logs': datasource_response.get('logs', []),
+                    'raw_response': datasource_response.get('raw_response')
+                }
+            }
+            print("Returning datasource logs response:", response_data)
+            return response_data
+        else:
+            # For simple string responses (like listings or errors), just return the string
+            assistant_message = Message.objects.create(
+                conversation=conversation,
+                role='assistant',
+                content=datasource_response
+            )
+            
+            # Return both user and assistant messages
+            serializer = MessageSerializer([user_message_obj, assistant_message], many=True)
+            return serializer.data
+    
+    return None
+
 @api_view(['GET', 'POST'])
 @csrf_exempt
 def messages(request, conversation_id):
@@ -124,7 +498,14 @@ def messages(request, conversation_id):
         return Response(status=status.HTTP_404_NOT_FOUND)
     
     if request.method == 'GET':
-        messages = conversation.messages.all()
+        # ?since=<message id> returns only the messages after that one
+        since = request.query_params.get('since')
+        if since:
+            messages = messages_since(conversation, since)
+            if messages is None:
+                return Response({"error": "since must be the ID of a message in this conversation"}, status=status.HTTP_400_BAD_REQUEST)
+        else:
+            messages = conversation.messages.all()
         serializer = MessageSerializer(messages, many=True)
         return Response(serializer.data)
     
@@ -132,115 +513,21 @@ def messages(request, conversation_id):
         # Check if there's a command in the message
         user_message = request.data.get('content', '')
         
-        # Create user message
-        user_message_obj = Message.objects.create(
-            conversation=conversation,
-            role='user',
-            content=user_message
-        )
-        
-        # Check for @automation command
-        if '@automation' in user_message.lower():
-            # Handle automation command
-            automation_response = get_automation_service().handle_automation_command(user_message)
-            
-            # Check if response is structured (dict) or simple string
-            if isinstance(automation_response, dict) and ('logs' in automation_response or 'status' in automation_response):
-                # For structured responses, create an assistant message with formatted message
-                # and include the full structured response for client-side processing
-                if 'formatted_message' in automation_response:
-                    assistant_message_content = automation_response['formatted_message']
-                else:
-                    # Create a formatted message if not already provided
-                    assistant_message_content = f"**{automation_response.get('automation', {}).get('name', 'Automation')} Execution Result:**\n\n"
-                    
-                    if automation_response.get('status') == 'success':
-                        assistant_message_content += f"✅ {automation_response.get('message', 'Execution completed successfully.')}"
-                    else:
-                        assistant_message_content += f"❌ {automation_response.get('message', 'Execution failed.')}"
-                
-                # Create the message
-                assistant_message = Message.objects.create(
-                    conversation=conversation,
-                    role='assistant',
-                    content=assistant_message_content
-                )
-                
-                # Return both messages and the automation logs for the modal
-                serializer = MessageSerializer([user_message_obj, assistant_message], many=True)
-                
-                # Return structured response with messages and automation logs
-                return Response({
-                    'messages': serializer.data,
-                    'automation_logs': automation_response
-                }, status=status.HTTP_201_CREATED)
-            else:
-                # For simple string responses
-                assistant_message = Message.objects.create(
-                    conversation=conversation,
-                    role='assistant',
-                    content=automation_response
-                )
-                
-                # Return both user and assistant messages
-                serializer = MessageSerializer([user_message_obj, assistant_message], many=True)
-                return Response(serializer.data, status=status.HTTP_201_CREATED)
-            
-        # Check for @datasource command
-        if '@datasource' in user_message.lower():
-            # Handle data source command
-            datasource_response = get_datasource_service().handle_datasource_command(user_message)
-            
-            # Check if response is structured (dict) or simple string
-            if isinstance(datasource_response, dict) and 'logs' in datasource_response:
-                # For structured responses, create an assistant message with basic info
-                # and include the full structured response for client-side processing
-                assistant_message_content = f"**{datasource_response.get('datasource', {}).get('name', 'Data Source')} Query Result:**\n\n"
-                
-                if datasource_response.get('status') == 'success':
-                    assistant_message_content += f"✅ {datasource_response.get('message', 'Query executed successfully.')}"
-                else:
-                    assistant_message_content += f"❌ {datasource_response.get('message', 'Query execution failed.')}"
-                
-                # Create the message
-                assistant_message = Message.objects.create(
-                    conversation=conversation,
-                    role='assistant',
-                    content=assistant_message_content
-                )
-                
-                # Return both messages with the structured response as metadata
-                serializer = MessageSerializer([user_message_obj, assistant_message], many=True)
-                
-                # Ensure we include the full datasource_logs for the frontend to display the modal
-                # Make the logs structure clearer with explicit field mappings
-                response_data = {
-                    'messages': serializer.data, 
-                    'datasource_logs': {
-                        'datasource': datasource_response.get('datasource', {}),
-                        'status': datasource_response.get('status', ''),
-                        'message': datasource_response.get('message', ''),
-                        'logs': datasource_response.get('logs', []),
-                        'raw_response': datasource_response.get('raw_response')
-                    }
-                }
-                print("Returning datasource logs response:", response_data)
-                return Response(response_data, status=status.HTTP_201_CREATED)
-            else:
-                # For simple string responses (like listings or errors), just return the string
-                assistant_message = Message.objects.create(
-                    conversation=conversation,
-                    role='assistant',
-                    content=datasource_response
-                )
-                
-                # Return both user and assistant messages
-                serializer = MessageSerializer([user_message_obj, assistant_message], many=True)
-                return Response(serializer.data, status=status.HTTP_201_CREATED)
+        # Handle @automation and @datasource commands
+        if is_command(user_message):
+            user_message_obj = Message.objects.create(
+                conversation=conversation,
+                role='user',
+                content=user_message
+            )
+            command_response = handle_command_message(conversation, user_message_obj, user_message)
+            return Response(command_response, status=status.HTTP_201_CREATED)
         
         # Normal message processing
-        # 1. Search vector store for relevant documents
-        relevant_docs = vector_store.search(user_message, top_k=3)
+        timings = TurnTimings()
+        
+        # 1. Search the vector store collections and load the conversation history concurrently
+        relevant_docs, conversation_history = chat_pipeline.prepare(conversation, user_message, timings)
         
         # Debug information about documents
         print(f"Found {len(relevant_docs)} relevant documents for query: {user_message}")
@@ -250,47 +537,121 @@ def messages(request, conversation_id):
             print(f"  Metadata: {doc.get('metadata', {})}")
             print(f"  Relevance score: {doc.get('relevance_score', 0)}")
         
-        # 2. Format conversation history and context for LLM
-        conversation_history = []
-        for msg in conversation.messages.all().order_by('created_at'):
-            if msg.id != user_message_obj.id:  # Skip the message we just added
-                conversation_history.append({"role": msg.role, "content": msg.content})
+        # 2. Serve repeated questions over the same context from the response cache
+        model_name = current_model_name()
+        with timings.stage('cache'):
+            response = response_cache.get(user_message, relevant_docs, model_name)
         
-        # 3. Get response - use OpenAI if available, otherwise fall back to local LLM
-        response = None
-        try:
-            # First try using OpenAI service
-            if openai_service.initialized:
-                response = openai_service.generate_chat_response(
-                    user_message,
-                    conversation_history,
-                    relevant_docs
-                )
-        except Exception as e:
-            print(f"Error using OpenAI service: {str(e)}")
-            response = None
-            
-        # If OpenAI failed or not available, use fallback LLM service
         if response is None:
-            response = llm_service.generate_response(
-                user_message, 
-                conversation_history, 
-                relevant_docs
-            )
-        
-        # 4. Create assistant message
-        assistant_message = Message.objects.create(
-            conversation=conversation,
-            role='assistant',
-            content=response
-        )
+            def generate():
+                # Get response and cache it unless we had to fall back to another model
+                started = time.monotonic()
+                response, answered_by = generate_llm_response(user_message, conversation_history, relevant_docs)
+                if answered_by == model_name:
+                    response_cache.set(user_message, relevant_docs, model_name, response, time.monotonic() - started)
+                return response
+            
+            # 3. Identical questions over the same context asked concurrently share one generation
+            with timings.stage('llm'):
+                response, _ = llm_flight.do(
+                    (normalize_question(user_message), context_hash(relevant_docs), model_name),
+                    generate
+                )
         
-        # Update conversation timestamp
-        conversation.save()  # This will update the updated_at field
+        # 4. Save both messages and the conversation timestamp in one transaction
+        user_message_obj, assistant_message = chat_pipeline.persist(conversation, user_message, response, timings)
+        print(f"Chat turn timings (ms): {timings.as_dict()}")
         
         # Return both user and assistant messages
         serializer = MessageSerializer([user_message_obj, assistant_message], many=True)
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+        return Response(serializer.data, status=status.HTTP_201_CREATED,
+                        headers={'Server-Timing': timings.server_timing_header()})
+
+async def messages_async(request, conversation_id):
+    """
+    Async API endpoint for messages in a conversation.
+    
+    Same contract as messages, but meant to be served by an ASGI server: the OpenAI
+    embedding and completion are awaited and the vector search runs on a bounded
+    thread pool, so a chat turn waiting on the LLM does not hold a worker thread.
+    The ORM calls run with sync_to_async(thread_sensitive=False): the async ORM would
+    run them on a thread created for each request, which opens and closes its own
+    SQLite connection, while the shared pool threads keep theirs.
+    """
+    try:
+        conversation = await sync_to_async(Conversation.objects.get, thread_sensitive=False)(pk=conversation_id)
+    except Conversation.DoesNotExist:
+        return JsonResponse({}, status=status.HTTP_404_NOT_FOUND)
+    
+    if request.method == 'GET':
+        since = request.GET.get('since')
+        if since:
+            messages = await sync_to_async(messages_since, thread_sensitive=False)(conversation, since)
+            if messages is None:
+                return JsonResponse({"error": "since must be the ID of a message in this conversation"}, status=status.HTTP_400_BAD_REQUEST)
+        else:
+            messages = conversation.messages.all()
+        messages = await sync_to_async(list, thread_sensitive=False)(messages)
+        serializer = MessageSerializer(messages, many=True)
+        return JsonResponse(serializer.data, safe=False)
+    
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['GET', 'POST'])
+    
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        return JsonResponse({"error": "Request body must be JSON"}, status=status.HTTP_400_BAD_REQUEST)
+    user_message = data.get('content', '')
+    
+    # Commands call external services synchronously, so run them off the event loop
+    if is_command(user_message):
+        user_message_obj = await sync_to_async(Message.objects.create, thread_sensitive=False)(
+            conversation=conversation,
+            role='user',
+            content=user_message
+        )
+        command_response = await sync_to_async(handle_command_message, thread_sensitive=False)(
+            conversation, user_message_obj, user_message
+        )
+        return JsonResponse(command_response, safe=False, status=status.HTTP_201_CREATED)
+    
+    timings = TurnTimings()
+    
+    # 1. Search the vector store collections on the search pool while the history loads
+    relevant_docs, conversation_history = await chat_pipeline.aprepare(conversation, user_message, timings)
+    
+    # 2. Serve repeated questions from the response cache (a semantic lookup awaits the embeddings API)
+    model_name = current_model_name()
+    with timings.stage('cache'):
+        response = await response_cache.aget(user_message, relevant_docs, model_name)
+    
+    if response is None:
+        async def generate():
+            started = time.monotonic()
+            response, answered_by = await agenerate_llm_response(user_message, conversation_history, relevant_docs)
+            if answered_by == model_name:
+                await response_cache.aset(user_message, relevant_docs, model_name, response, time.monotonic() - started)
+            return response
+        
+        # 3. Generate the response, sharing it with identical in-flight questions
+        with timings.stage('llm'):
+            response, _ = await async_llm_flight.do(
+                (normalize_question(user_message), context_hash(relevant_docs), model_name),
+                generate
+            )
+    
+    # 4. Save both messages and the conversation timestamp in one transaction
+    user_message_obj, assistant_message = await sync_to_async(chat_pipeline.persist, thread_sensitive=False)(
+        conversation, user_message, response, timings
+    )
+    
+    serializer = MessageSerializer([user_message_obj, assistant_message], many=True)
+    return JsonResponse(serializer.data, safe=False, status=status.HTTP_201_CREATED,
+                        headers={'Server-Timing': timings.server_timing_header()})
+
+# Assigned directly because csrf_exempt only preserves coroutine functions from Django 5.0
+messages_async.csrf_exempt = True
 
 @api_view(['POST'])
 @parser_classes([MultiPartParser, FormParser])
@@ -353,10 +714,10 @@ def upload_document(request):
 
 @api_view(['GET'])
 def documents(request):
-    """API endpoint to list all uploaded documents."""
-    documents = Document.objects.all().order_by('-uploaded_at')
-    serializer = DocumentSerializer(documents, many=True)
-    return Response(serializer.data)
+    """API endpoint to list uploaded documents, one cursor page at a time."""
+    # Skip the extracted text, which can be large and is not part of the listing
+    documents = Document.objects.only('id', 'title', 'file', 'file_type', 'uploaded_at')
+    return paginated_response(request, documents, DocumentSerializer, ('-uploaded_at', '-id'))
 
 @api_view(['DELETE'])
 def delete_document(request, document_id):
@@ -398,7 +759,7 @@ def trigger_automation(request, automation_id):
         )
     
     # Create a log entry for this automation execution
-    log_entry = Log.objects.create(
+    log_entry = get_log_writer().log(
         message=f"Executing automation: {automation.name}",
         level="info",
         source="automation_service"
@@ -438,7 +799,7 @@ def trigger_automation(request, automation_id):
             
         # Log the result in the database
         log_level = "info" if result['status'] == "success" else "error"
-        Log.objects.create(
+        get_log_writer().log(
             message=f"Automation result: {result.get('message', 'No details')}",
             level=log_level,
             source="automation_service"
@@ -496,6 +857,22 @@ def debug_vector_store(request):
         'sample_chunks': sample_docs,
         'openai_service_attached': hasattr(vector_store, 'openai_service') and vector_store.openai_service is not None
     })
+
+@api_view(['GET', 'DELETE'])
+def debug_response_cache(request):
+    """Debug endpoint to report response cache, request coalescing and history window metrics or clear the cache."""
+    if request.method == 'DELETE':
+        response_cache.clear()
+    stats = response_cache.stats()
+    stats['coalescing'] = {
+        'vector_search': search_flight.stats(),
+        'llm_generation': llm_flight.stats(),
+        'async_vector_search': async_search_flight.stats(),
+        'async_llm_generation': async_llm_flight.stats()
+    }
+    stats['history_window'] = history_window.stats()
+    return Response(stats)
+
 @api_view(['GET'])
 def datasources(request):
     """API endpoint to list available data sources."""
@@ -533,7 +910,7 @@ def query_datasource(request, datasource_id):
     )
     
     # Create a log entry for this datasource query
-    log_entry = Log.objects.create(
+    get_log_writer().log(
         message=f"Executed data source query: {datasource.name}",
         level="info" if result.get('status') == 'success' else "error",
         source="datasource_service"
@@ -547,17 +924,31 @@ def query_datasource(request, datasource_id):
 def incidents(request):
     """API endpoint for listing and creating incidents."""
     if request.method == 'GET':
-        incidents = Incident.objects.all().order_by('-created_at')
-        serializer = IncidentSerializer(incidents, many=True)
-        return Response(serializer.data)
+        incidents = Incident.objects.defer('long_description', 'comments')
+        return paginated_response(request, incidents, IncidentListSerializer, ('-created_at', '-id'))
     
     elif request.method == 'POST':
+        # Deliveries retried by Optimus carry the same Idempotency-Key; answer them with the incident already created
+        idempotency_key = request.headers.get('Idempotency-Key') or None
+        if idempotency_key:
+            existing = Incident.objects.filter(idempotency_key=idempotency_key).first()
+            if existing:
+                return Response(IncidentSerializer(existing).data, status=status.HTTP_200_OK)
+
         serializer = IncidentSerializer(data=request.data)
         if serializer.is_valid():
-            incident = serializer.save()
+            try:
+                with transaction.atomic():
+                    incident = serializer.save(idempotency_key=idempotency_key)
+            except IntegrityError:
+                # A concurrent delivery with the same key won the race
+                existing = Incident.objects.filter(idempotency_key=idempotency_key).first()
+                if idempotency_key and existing:
+                    return Response(IncidentSerializer(existing).data, status=status.HTTP_200_OK)
+                raise
             
             # Log incident creation
-            Log.objects.create(
+            get_log_writer().log(
                 message=f"New incident created: {incident.incident_number} - {incident.short_description} (Priority: {incident.priority})",
                 level="info",
                 source="api"
@@ -657,21 +1048,292 @@ def dashboard_detail(request, dashboard_id):
         dashboard.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
         
+def log_page_response(request):
+    """Serialize one keyset page of the logs matching the request's filters."""
+    try:
+        queryset = filter_logs(Log.objects.all(), request.query_params)
+        page_size = parse_page_size(request.query_params.get('page_size'))
+        logs, next_cursor = keyset_page(
+            queryset,
+            cursor=request.query_params.get('cursor'),
+            page_size=page_size,
+            descending=request.query_params.get('order', 'desc') != 'asc'
+        )
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    serializer = LogSerializer(logs, many=True)
+    next_url = None
+    if next_cursor:
+        next_url = replace_query_param(request.build_absolute_uri(), 'cursor', next_cursor)
+    return Response({"next": next_url, "results": serializer.data})
+
 @api_view(['GET', 'POST'])
 def logs(request):
-    """API endpoint for listing and creating logs."""
+    """
+    API endpoint for listing and creating logs.
+    
+    GET filters by level and source (comma-separated), start and end, and q
+    (full-text search), and pages with a keyset cursor on (timestamp, id):
+    {"next": url, "results": [...]}. order=asc returns the oldest logs first
+    instead of the newest.
+    """
     if request.method == 'GET':
-        logs = Log.objects.all().order_by('-timestamp')[:100]  # Limit to last 100 logs
-        serializer = LogSerializer(logs, many=True)
-        return Response(serializer.data)
+        return log_page_response(request)
     
     elif request.method == 'POST':
         serializer = LogSerializer(data=request.data)
         if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
+            # Saved like ingested logs: mined, counted in the rollups, checked for anomalies and published
+            log_entry = Log(**serializer.validated_data)
+            log_ingestor.save_entries([log_entry])
+            return Response(LogSerializer(log_entry).data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+@api_view(['GET'])
+def logs_search(request):
+    """
+    API endpoint for full-text search over log messages.
+    
+    q is required: words must all match, "quoted words" match as a phrase and
+    a trailing * matches a prefix. Takes the other log list filters and
+    pagination too; results are newest first.
+    """
+    if not request.query_params.get('q', '').strip():
+        return Response({"error": "q is required"}, status=status.HTTP_400_BAD_REQUEST)
+    return log_page_response(request)
+
+@api_view(['GET'])
+def log_templates(request):
+    """
+    API endpoint for the most frequent log templates in a time window.
+    
+    Takes the log list filters; the window defaults to the last hour. Counts
+    are grouped on the template ID, which every ingested log carries, so no
+    message is read or pattern-matched.
+    """
+    params = request.query_params.copy()
+    if not params.get('start') and not params.get('end'):
+        params['start'] = (timezone.now() - timedelta(hours=1)).isoformat()
+    try:
+        queryset = filter_logs(Log.objects.filter(template__isnull=False), params)
+        limit = min(parse_page_size(request.query_params.get('limit') or '20'), 200)
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    counts = list(
+        queryset.values('template_id').annotate(count=Count('id')).order_by('-count')[:limit]
+    )
+    templates = LogTemplate.objects.in_bulk([row['template_id'] for row in counts])
+    results = [
+        {"template": LogTemplateSerializer(templates[row['template_id']]).data, "count": row['count']}
+        for row in counts
+        if row['template_id'] in templates
+    ]
+    return Response({"start": params.get('start'), "end": params.get('end'), "results": results})
+
+@api_view(['GET'])
+def log_histogram(request):
+    """
+    API endpoint for log counts over time.
+    
+    Answered from the rollup tables, so the cost depends on the number of
+    buckets, not the number of logs. start and end default to the last 24
+    hours; granularity is minute, hour, day or auto (the finest one giving at
+    most 500 buckets that is still retained); level and source take
+    comma-separated values; group_by=level or source splits every count.
+    """
+    now = timezone.now()
+    try:
+        start = request.query_params.get('start')
+        start = parse_time_param('start', start) if start else now - timedelta(days=1)
+        end = request.query_params.get('end')
+        end = parse_time_param('end', end) if end else now
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    if end <= start:
+        return Response({"error": "end must be after start"}, status=status.HTTP_400_BAD_REQUEST)
+    
+    granularity = request.query_params.get('granularity', 'auto')
+    if granularity == 'auto':
+        granularity = choose_granularity(start, end, settings.LOG_ROLLUP_RETENTION_DAYS, now)
+    elif granularity not in GRANULARITIES:
+        return Response({"error": f"granularity must be auto or one of {', '.join(GRANULARITIES)}"}, status=status.HTTP_400_BAD_REQUEST)
+    
+    group_by = request.query_params.get('group_by') or None
+    if group_by not in (None, 'level', 'source'):
+        return Response({"error": "group_by must be level or source"}, status=status.HTTP_400_BAD_REQUEST)
+    
+    levels = [level.strip().lower() for level in request.query_params.get('level', '').split(',') if level.strip()]
+    sources = [source.strip() for source in request.query_params.get('source', '').split(',') if source.strip()]
+    buckets = histogram(start, end, granularity, levels=levels, sources=sources, group_by=group_by)
+    
+    return Response({
+        "start": start,
+        "end": end,
+        "granularity": granularity,
+        "total": sum(bucket["count"] for bucket in buckets),
+        "buckets": buckets
+    })
+
+@api_view(['GET'])
+def log_anomalies(request):
+    """
+    API endpoint for log rate spikes found while ingesting, newest first.
+    
+    source and level take comma-separated values; pages with a cursor.
+    Includes the detector state of this process under "detector".
+    """
+    queryset = LogAnomaly.objects.select_related('template')
+    levels = [level.strip().lower() for level in request.query_params.get('level', '').split(',') if level.strip()]
+    sources = [source.strip() for source in request.query_params.get('source', '').split(',') if source.strip()]
+    if levels:
+        queryset = queryset.filter(level__in=levels)
+    if sources:
+        queryset = queryset.filter(source__in=sources)
+    
+    response = paginated_response(request, queryset, LogAnomalySerializer, ('-detected_at', '-id'))
+    response.data["detector"] = log_anomaly_monitor.stats()
+    return response
+
+@api_view(['GET'])
+def logs_export(request):
+    """
+    API endpoint for exporting logs as NDJSON.
+    
+    Takes the same filters as the log list, including q, and streams every matching log,
+    oldest first unless order=desc, without holding them in memory.
+    """
+    try:
+        queryset = filter_logs(Log.objects.all(), request.query_params)
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    if request.query_params.get('order', 'asc') == 'desc':
+        queryset = queryset.order_by('-timestamp', '-id')
+    else:
+        queryset = queryset.order_by('timestamp', 'id')
+    
+    # Under ASGI a synchronous iterator would be read into memory before sending
+    lines = aiter_export_lines(queryset) if isinstance(request._request, ASGIRequest) else iter_export_lines(queryset)
+    response = StreamingHttpResponse(lines, content_type='application/x-ndjson')
+    response['Content-Disposition'] = 'attachment; filename="logs.ndjson"'
+    return response
+
+def events_stream(request):
+    """
+    Server-Sent Events stream of new logs ('log'), incident changes ('incident')
+    and log anomalies ('anomaly').
+    
+    Events are pushed as they are committed, so panels update without
+    reloading their lists. Browsers reconnect with Last-Event-ID (or
+    ?last_event_id=) and get the events they missed; when those are no longer
+    buffered, or the ID is from another worker, a 'reset' event tells the
+    client to reload its panels once. types takes a comma-separated subset of
+    event types. Streams end after LIVE_EVENTS_MAX_STREAM_SECONDS so server
+    threads are recycled; EventSource reconnects on its own.
+    """
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+    
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    types = {item.strip() for item in request.GET.get('types', '').split(',') if item.strip()}
+    
+    def event_chunk(events, missed, after):
+        """SSE text for a batch of events, and the sequence to wait after next."""
+        chunk = []
+        if missed:
+            chunk.append(format_sse(live_events.event_id(after), 'reset', '{}'))
+        for sequence, event_type, payload in events:
+            after = sequence
+            if not types or event_type in types:
+                chunk.append(format_sse(live_events.event_id(sequence), event_type, payload))
+        return ''.join(chunk), after
+    
+    def stream():
+        after, reset = live_events.resume_point(last_event_id)
+        yield "retry: 3000\n\n"
+        yield format_sse(live_events.event_id(after), 'reset' if reset else 'ready', '{}')
+        deadline = time.monotonic() + settings.LIVE_EVENTS_MAX_STREAM_SECONDS
+        while time.monotonic() < deadline:
+            events, missed = live_events.wait(after, timeout=settings.LIVE_EVENTS_KEEPALIVE)
+            if not events:
+                yield ": keepalive\n\n"
+                continue
+            chunk, after = event_chunk(events, missed, after)
+            if chunk:
+                yield chunk
+    
+    async def astream():
+        # Under ASGI Django reads a synchronous iterator to the end before sending it,
+        # so the wait runs on a thread and each event is sent as soon as it arrives
+        loop = asyncio.get_running_loop()
+        after, reset = live_events.resume_point(last_event_id)
+        yield "retry: 3000\n\n"
+        yield format_sse(live_events.event_id(after), 'reset' if reset else 'ready', '{}')
+        deadline = time.monotonic() + settings.LIVE_EVENTS_MAX_STREAM_SECONDS
+        while time.monotonic() < deadline:
+            events, missed = await loop.run_in_executor(
+                live_events_executor, live_events.wait, after, settings.LIVE_EVENTS_KEEPALIVE
+            )
+            if not events:
+                yield ": keepalive\n\n"
+                continue
+            chunk, after = event_chunk(events, missed, after)
+            if chunk:
+                yield chunk
+    
+    response = StreamingHttpResponse(astream() if isinstance(request, ASGIRequest) else stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop proxies such as nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+NDJSON_CONTENT_TYPES = ('application/x-ndjson', 'application/ndjson', 'application/jsonl', 'application/json-lines', 'text/plain')
+
+@csrf_exempt
+def logs_ingest(request):
+    """
+    API endpoint for ingesting a batch of logs.
+    
+    Accepts NDJSON (one log object per line) or a JSON array of log objects,
+    optionally gzip-compressed with Content-Encoding: gzip. The body is read as
+    a stream, so batches are not limited by the upload size setting. Records are
+    validated with plain field checks and saved with bulk_create in chunks;
+    invalid records are counted and reported without failing the batch.
+    The level (default info) and source query parameters are defaults for
+    records without them.
+    """
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['POST'])
+    
+    content_type = request.content_type or 'application/x-ndjson'
+    if content_type in NDJSON_CONTENT_TYPES:
+        parse = lambda stream: iter_ndjson(stream, settings.LOG_INGEST_MAX_LINE_BYTES)
+    elif content_type == 'application/json':
+        parse = iter_json_array
+    else:
+        return JsonResponse({"error": f"Unsupported Content-Type: {content_type}. Send application/x-ndjson or application/json."},
+                            status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+    
+    try:
+        stream = log_ingestor.open_payload(request, request.headers.get('Content-Encoding'))
+    except IngestError as e:
+        return JsonResponse({"error": str(e)}, status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+    
+    started = time.perf_counter()
+    result = log_ingestor.ingest(
+        parse(stream),
+        default_level=request.GET.get('level', 'info'),
+        default_source=request.GET.get('source')
+    )
+    elapsed = time.perf_counter() - started
+    logger.debug("Ingested %d logs (%d rejected) in %.3fs", result['accepted'], result['rejected'], elapsed)
+    
+    # A payload that stopped being readable is a bad request, even if part of it was saved
+    response_status = status.HTTP_400_BAD_REQUEST if "error" in result else status.HTTP_200_OK
+    return JsonResponse(result, status=response_status)
+
 @api_view(['DELETE'])
 def clear_conversations(request):
     """API endpoint for deleting all conversations."""
@@ -683,8 +1345,11 @@ def clear_conversations(request):
         content='Welcome to Wells Fargo AI Integrated Platform Support Assistant.'
     )
     
-    # Delete all other conversations
-    Conversation.objects.exclude(id=default_conversation.id).delete()
+    # Delete all other conversations in batches so chat requests are not locked out meanwhile
+    purge_conversations(
+        Conversation.objects.exclude(id=default_conversation.id),
+        batch_size=settings.RETENTION_BATCH_SIZE
+    )
     
     # Return success message
     return Response({"message": "All conversations cleared. Default conversation created."}, status=status.HTTP_200_OK)
@@ -713,9 +1378,9 @@ def clear_documents(request):
 def knowledge_base_entries(request):
     """API endpoint for listing and creating knowledge base entries."""
     if request.method == 'GET':
-        entries = KnowledgeBase.objects.all().order_by('-updated_at')
-        serializer = KnowledgeBaseSerializer(entries, many=True)
-        return Response(serializer.data)
+        # Send a short preview computed in the database instead of every content body
+        entries = KnowledgeBase.objects.defer('content').annotate(preview=Substr('content', 1, 100))
+        return paginated_response(request, entries, KnowledgeBaseListSerializer, ('-updated_at', '-id'))
     
     elif request.method == 'POST':
         serializer = KnowledgeBaseSerializer(data=request.data)
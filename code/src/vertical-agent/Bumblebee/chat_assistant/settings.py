@@ -84,6 +84,10 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Wait for concurrent writers instead of failing with "database is locked"
+            'timeout': 20,
+        },
     }
 }
 
@@ -141,6 +145,85 @@ VECTOR_STORE_DIR = os.path.join(BASE_DIR, 'vector_store')
 LLM_MODEL_PATH = os.getenv('LLM_MODEL_PATH', os.path.join(BASE_DIR, 'models'))
 LLM_MODEL_NAME = os.getenv('LLM_MODEL_NAME', 'mistral-7b-instruct-v0.1.Q4_K_M.gguf')
 
+# Response cache settings
+RESPONSE_CACHE_ENABLED = os.getenv('RESPONSE_CACHE_ENABLED', 'true').lower() == 'true'
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', '500'))
+RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', '3600'))  # seconds
+RESPONSE_CACHE_SIMILARITY_THRESHOLD = float(os.getenv('RESPONSE_CACHE_SIMILARITY_THRESHOLD', '0.92'))
+
+# Threads used by the message views for vector searches
+VECTOR_SEARCH_WORKERS = int(os.getenv('VECTOR_SEARCH_WORKERS', '4'))
+
+# Number of recent messages loaded as conversation history for a chat turn
+CHAT_HISTORY_WINDOW = int(os.getenv('CHAT_HISTORY_WINDOW', '5'))
+# Keep the recent history of active conversations in memory (only safe with a single server process)
+CHAT_HISTORY_CACHE_ENABLED = os.getenv('CHAT_HISTORY_CACHE_ENABLED', 'false').lower() == 'true'
+CHAT_HISTORY_CACHE_MAX_CONVERSATIONS = int(os.getenv('CHAT_HISTORY_CACHE_MAX_CONVERSATIONS', '1000'))
+
+# Audit Log records are buffered and written in batches by a background thread
+AUDIT_LOG_BUFFERED = os.getenv('AUDIT_LOG_BUFFERED', 'true').lower() == 'true'
+AUDIT_LOG_BATCH_SIZE = int(os.getenv('AUDIT_LOG_BATCH_SIZE', '500'))
+AUDIT_LOG_FLUSH_INTERVAL = float(os.getenv('AUDIT_LOG_FLUSH_INTERVAL', '1.0'))  # seconds
+AUDIT_LOG_MAX_BUFFER = int(os.getenv('AUDIT_LOG_MAX_BUFFER', '10000'))
+AUDIT_LOG_PUT_TIMEOUT = float(os.getenv('AUDIT_LOG_PUT_TIMEOUT', '2.0'))  # seconds a full buffer blocks before writing synchronously
+
+# Batch log ingestion (POST /api/logs/ingest/)
+LOG_INGEST_CHUNK_SIZE = int(os.getenv('LOG_INGEST_CHUNK_SIZE', '1000'))  # records per bulk_create
+LOG_INGEST_MAX_LINE_BYTES = int(os.getenv('LOG_INGEST_MAX_LINE_BYTES', '1048576'))  # longest NDJSON line accepted
+
+# Template mining of ingested logs (Drain parse tree)
+LOG_TEMPLATE_MINING_ENABLED = os.getenv('LOG_TEMPLATE_MINING_ENABLED', 'true').lower() == 'true'
+LOG_TEMPLATE_DEPTH = int(os.getenv('LOG_TEMPLATE_DEPTH', '4'))
+LOG_TEMPLATE_SIMILARITY = float(os.getenv('LOG_TEMPLATE_SIMILARITY', '0.4'))  # share of matching tokens to join a template
+LOG_TEMPLATE_MAX_TEMPLATES = int(os.getenv('LOG_TEMPLATE_MAX_TEMPLATES', '10000'))  # templates kept in memory
+
+# Days of log rollups kept per granularity (coarser rollups keep the totals of pruned ones)
+LOG_ROLLUP_RETENTION_DAYS = {
+    'minute': int(os.getenv('LOG_ROLLUP_MINUTE_RETENTION_DAYS', '2')),
+    'hour': int(os.getenv('LOG_ROLLUP_HOUR_RETENTION_DAYS', '30')),
+    'day': int(os.getenv('LOG_ROLLUP_DAY_RETENTION_DAYS', '400')),
+}
+
+# Online detection of log rate spikes per source, level and template
+LOG_ANOMALY_ENABLED = os.getenv('LOG_ANOMALY_ENABLED', 'true').lower() == 'true'
+LOG_ANOMALY_BUCKET_SECONDS = int(os.getenv('LOG_ANOMALY_BUCKET_SECONDS', '60'))
+LOG_ANOMALY_ALPHA = float(os.getenv('LOG_ANOMALY_ALPHA', '0.1'))  # EWMA weight of the newest bucket
+LOG_ANOMALY_Z_THRESHOLD = float(os.getenv('LOG_ANOMALY_Z_THRESHOLD', '4.0'))
+LOG_ANOMALY_MIN_COUNT = int(os.getenv('LOG_ANOMALY_MIN_COUNT', '20'))  # logs in a bucket before it can be flagged
+LOG_ANOMALY_WARMUP_BUCKETS = int(os.getenv('LOG_ANOMALY_WARMUP_BUCKETS', '5'))
+LOG_ANOMALY_MAX_KEYS = int(os.getenv('LOG_ANOMALY_MAX_KEYS', '50000'))  # (source, level, template) keys kept in memory
+LOG_ANOMALY_AUTO_INCIDENT = os.getenv('LOG_ANOMALY_AUTO_INCIDENT', 'false').lower() == 'true'
+LOG_ANOMALY_INCIDENT_LEVELS = [level.strip() for level in os.getenv('LOG_ANOMALY_INCIDENT_LEVELS', 'error,critical').split(',') if level.strip()]
+LOG_ANOMALY_INCIDENT_COOLDOWN = int(os.getenv('LOG_ANOMALY_INCIDENT_COOLDOWN', '3600'))  # seconds between incidents for the same key
+
+# Live feed of new logs and incident changes (GET /api/events/stream/, Server-Sent Events)
+LIVE_EVENTS_BUFFER_SIZE = int(os.getenv('LIVE_EVENTS_BUFFER_SIZE', '1000'))  # events kept for clients resuming with Last-Event-ID
+LIVE_EVENTS_KEEPALIVE = float(os.getenv('LIVE_EVENTS_KEEPALIVE', '15'))  # seconds between keepalive comments
+LIVE_EVENTS_MAX_STREAM_SECONDS = int(os.getenv('LIVE_EVENTS_MAX_STREAM_SECONDS', '300'))  # streams end after this and the browser reconnects
+LIVE_EVENTS_MAX_LOGS_PER_BATCH = int(os.getenv('LIVE_EVENTS_MAX_LOGS_PER_BATCH', '100'))  # newest logs of a bulk write that are pushed
+LIVE_EVENTS_ASYNC_WAITERS = int(os.getenv('LIVE_EVENTS_ASYNC_WAITERS', '100'))  # threads waiting for events for ASGI streams, one per open stream
+
+# Incremental sync of logs from MongoDB (manage.py sync_mongo_logs); needs pymongo
+LOG_SYNC_MONGO_URI = os.getenv('LOG_SYNC_MONGO_URI', os.getenv('MONGO_URI', ''))
+LOG_SYNC_MONGO_DB = os.getenv('LOG_SYNC_MONGO_DB', 'platformManager')
+LOG_SYNC_MONGO_COLLECTION = os.getenv('LOG_SYNC_MONGO_COLLECTION', 'logs')
+LOG_SYNC_BATCH_SIZE = int(os.getenv('LOG_SYNC_BATCH_SIZE', '1000'))
+LOG_SYNC_POLL_INTERVAL = float(os.getenv('LOG_SYNC_POLL_INTERVAL', '5'))  # seconds between polls without a change stream
+LOG_SYNC_DEFAULT_SOURCE = os.getenv('LOG_SYNC_DEFAULT_SOURCE', 'mongo')  # source of documents without one
+
+# Retention of logs and conversations (0 keeps forever), enforced by manage.py enforce_retention
+LOG_RETENTION_DAYS = int(os.getenv('LOG_RETENTION_DAYS', '30'))
+# Per-source overrides, e.g. "auth=90,healthcheck=3"
+LOG_SOURCE_RETENTION_DAYS = {
+    source.strip(): int(days)
+    for source, _, days in (item.partition('=') for item in os.getenv('LOG_SOURCE_RETENTION_DAYS', '').split(','))
+    if source.strip() and days.strip()
+}
+CONVERSATION_RETENTION_DAYS = int(os.getenv('CONVERSATION_RETENTION_DAYS', '90'))  # since the last message; messages go with their conversation
+RETENTION_BATCH_SIZE = int(os.getenv('RETENTION_BATCH_SIZE', '1000'))  # rows deleted per transaction
+RETENTION_BATCH_PAUSE = float(os.getenv('RETENTION_BATCH_PAUSE', '0.2'))  # seconds between batches so requests get the write lock
+RETENTION_ARCHIVE_DIR = os.getenv('RETENTION_ARCHIVE_DIR', os.path.join(BASE_DIR, 'archive'))  # gzipped NDJSON of purged rows; empty disables
+
 # Directory for uploaded files
 UPLOAD_DIR = os.path.join(MEDIA_ROOT, 'documents')
 
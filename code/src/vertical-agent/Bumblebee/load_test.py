@@ -0,0 +1,162 @@
+"""
+Load test for the chat message endpoints.
+
+Compares the sync messages endpoint with the async one under concurrent chat
+turns. To make the LLM wait realistic without spending API credits, run the
+stub OpenAI server and point the app at it:
+
+    python load_test.py stub-openai --port 8765 --delay 2
+    OPENAI_API_KEY=stub OPENAI_BASE_URL=http://127.0.0.1:8765/v1 \\
+        uvicorn chat_assistant.asgi:application --port 8000
+
+    python load_test.py run --base-url http://127.0.0.1:8000 --endpoint sync --concurrency 200 --requests 400
+    python load_test.py run --base-url http://127.0.0.1:8000 --endpoint async --concurrency 200 --requests 400
+
+Every request asks a unique question so the response cache and request
+coalescing do not hide the cost of the LLM call.
+"""
+import argparse
+import hashlib
+import json
+import statistics
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+
+def run_stub_openai(port, delay):
+    """
+    Serve a minimal OpenAI-compatible API that answers after a fixed delay.
+
+    Args:
+        port: Port to listen on
+        delay: Seconds to wait before answering a chat completion
+    """
+    class StubHandler(BaseHTTPRequestHandler):
+        # Keep connections alive like the real API, so the clients' connection pools are exercised
+        protocol_version = 'HTTP/1.1'
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length', 0))
+            body = json.loads(self.rfile.read(length) or b'{}')
+
+            if self.path.endswith('/embeddings'):
+                # Deterministic pseudo-embedding so different questions are not similar
+                digest = hashlib.sha256(str(body.get("input", "")).encode('utf-8')).digest()
+                payload = {
+                    "object": "list",
+                    "data": [{"object": "embedding", "index": 0, "embedding": [b / 255 - 0.5 for b in digest]}],
+                    "model": body.get("model", "stub"),
+                    "usage": {"prompt_tokens": 0, "total_tokens": 0}
+                }
+            else:
+                time.sleep(delay)
+                payload = {
+                    "id": f"chatcmpl-{uuid.uuid4().hex}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": body.get("model", "stub"),
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": "Stub answer."},
+                        "finish_reason": "stop"
+                    }],
+                    "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+                }
+
+            data = json.dumps(payload).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', port), StubHandler)
+    server.daemon_threads = True
+    print(f"Stub OpenAI API listening on http://127.0.0.1:{port}/v1 (completion delay {delay}s)")
+    server.serve_forever()
+
+
+def run_load_test(base_url, endpoint, concurrency, total_requests):
+    """
+    Send concurrent chat turns and report latency and throughput.
+
+    Args:
+        base_url: Base URL of the running app
+        endpoint: 'sync' or 'async' messages endpoint
+        concurrency: Number of chat turns in flight at once
+        total_requests: Total number of chat turns to send
+    """
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+
+    response = session.post(f"{base_url}/api/conversations/", json={"title": "Load test"})
+    response.raise_for_status()
+    conversation_id = response.json()['id']
+
+    path = 'messages/async/' if endpoint == 'async' else 'messages/'
+    url = f"{base_url}/api/conversations/{conversation_id}/{path}"
+
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def chat_turn(i):
+        started = time.monotonic()
+        try:
+            result = session.post(url, json={"content": f"Load test question {i} {uuid.uuid4().hex}"}, timeout=300)
+            ok = result.status_code == 201
+        except requests.RequestException as e:
+            ok = False
+            result = e
+        elapsed = time.monotonic() - started
+        with lock:
+            if ok:
+                latencies.append(elapsed)
+            else:
+                errors.append(str(getattr(result, 'status_code', result)))
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(chat_turn, range(total_requests)))
+    wall_time = time.monotonic() - started
+
+    print(f"Endpoint: {endpoint} ({url})")
+    print(f"Requests: {total_requests}, concurrency: {concurrency}, errors: {len(errors)}")
+    print(f"Wall time: {wall_time:.2f}s, throughput: {len(latencies) / wall_time:.1f} turns/s")
+    if latencies:
+        latencies.sort()
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        print(f"Latency p50: {statistics.median(latencies):.2f}s, p95: {p95:.2f}s, max: {latencies[-1]:.2f}s")
+    if errors:
+        print(f"First errors: {errors[:5]}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    stub_parser = subparsers.add_parser('stub-openai', help='Run a stub OpenAI API with a fixed completion delay')
+    stub_parser.add_argument('--port', type=int, default=8765)
+    stub_parser.add_argument('--delay', type=float, default=2.0)
+
+    run_parser = subparsers.add_parser('run', help='Send concurrent chat turns to the app')
+    run_parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+    run_parser.add_argument('--endpoint', choices=['sync', 'async'], default='async')
+    run_parser.add_argument('--concurrency', type=int, default=100)
+    run_parser.add_argument('--requests', type=int, default=200)
+
+    args = parser.parse_args()
+    if args.command == 'stub-openai':
+        run_stub_openai(args.port, args.delay)
+    else:
+        run_load_test(args.base_url.rstrip('/'), args.endpoint, args.concurrency, args.requests)
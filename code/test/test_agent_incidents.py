@@ -0,0 +1,119 @@
+"""
+Tests for how the Optimus polling cycle records incidents and moves the watermark.
+"""
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+OPTIMUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "optimus (Orchestration Agent)")
+sys.path.insert(0, OPTIMUS_DIR)
+
+import agent  # noqa: E402
+from outbox import Outbox  # noqa: E402
+from servicenow import AssignmentGroupLookupError  # noqa: E402
+
+
+def incident(number, group, updated_on):
+    return {
+        "sys_id": f"sys-{number}", "number": f"INC{number}", "assignment_group": group,
+        "sys_updated_on": updated_on, "priority": "3", "short_description": "", "description": "",
+        "comments": "", "state": "1",
+    }
+
+
+class StubGroups:
+    """
+    Stands in for servicenow.assignment_groups with a fixed sys_id -> name map.
+    """
+
+    def __init__(self, names, error=None):
+        self.names = names
+        self.error = error
+
+    def remember(self, sys_id, name):
+        pass
+
+    def resolve_many(self, sys_ids):
+        if self.error:
+            raise self.error
+        return {sys_id: self.names[sys_id] for sys_id in sys_ids if sys_id in self.names}
+
+
+class ProcessIncidentsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.outbox = Outbox(path=os.path.join(self.directory.name, "outbox.sqlite3"))
+        self.incidents = [
+            incident(1, "g-known", "2024-01-01 10:00:00"),
+            incident(2, "g-gone", "2024-01-01 10:00:01"),
+            incident(3, "g-known", "2024-01-01 10:00:02"),
+            incident(4, "", "2024-01-01 10:00:03"),
+        ]
+        self.marked = []
+        agent.unresolved_group_cycles.clear()
+        for target, value in (
+            ("outbox", self.outbox),
+            ("assignment_groups", StubGroups({"g-known": "Payments"})),
+            ("fetch_unassigned_incidents", lambda: list(self.incidents)),
+            ("mark_incidents_processed", lambda incidents: self.marked.append([i["number"] for i in incidents])),
+        ):
+            patcher = mock.patch.object(agent, target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.outbox.connection.close()
+        self.directory.cleanup()
+
+    def queued(self):
+        return sorted(row["incident_number"] for row in self.outbox.connection.execute("SELECT incident_number FROM deliveries"))
+
+    def test_unresolved_group_holds_the_watermark_but_not_the_queue(self):
+        agent.process_incidents()
+
+        # The incident after the unresolved one is still queued ...
+        self.assertEqual(self.queued(), ["INC1", "INC3"])
+        # ... but the watermark only moves past the ones before it
+        self.assertEqual(self.marked, [["INC1"]])
+
+        # Fetched again next cycle, nothing is queued twice
+        agent.process_incidents()
+        self.assertEqual(self.queued(), ["INC1", "INC3"])
+        self.assertEqual(self.marked[-1], ["INC1"])
+
+    def test_unresolved_group_is_given_up_after_the_retry_cap(self):
+        with mock.patch.object(agent, "ASSIGNMENT_GROUP_MAX_RETRIES", 3):
+            for _ in range(2):
+                agent.process_incidents()
+                self.assertEqual(self.marked[-1], ["INC1"])
+            agent.process_incidents()
+
+        self.assertEqual(self.marked[-1], ["INC1", "INC2", "INC3", "INC4"])
+        self.assertEqual(agent.unresolved_group_cycles, {"sys-2:2024-01-01 10:00:01": 3})
+        self.assertEqual(self.queued(), ["INC1", "INC3"])
+
+    def test_resolved_group_is_forgotten(self):
+        agent.process_incidents()
+        self.assertEqual(len(agent.unresolved_group_cycles), 1)
+
+        agent.assignment_groups.names["g-gone"] = "Identity"
+        agent.process_incidents()
+
+        self.assertEqual(agent.unresolved_group_cycles, {})
+        self.assertEqual(self.marked[-1], ["INC1", "INC2", "INC3", "INC4"])
+        self.assertEqual(self.queued(), ["INC1", "INC2", "INC3"])
+
+    def test_failed_group_lookup_keeps_the_watermark(self):
+        agent.assignment_groups.error = AssignmentGroupLookupError("ServiceNow down")
+
+        agent.process_incidents()
+
+        self.assertEqual(self.marked, [])
+        self.assertEqual(self.queued(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
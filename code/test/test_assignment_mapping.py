@@ -0,0 +1,169 @@
+"""
+Tests for the Optimus in-memory assignment mapping: change-stream updates and the TTL fallback.
+"""
+import os
+import queue
+import sys
+import threading
+import time
+import unittest
+from unittest import mock
+
+import mongomock
+from pymongo.errors import OperationFailure
+
+OPTIMUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "optimus (Orchestration Agent)")
+sys.path.insert(0, OPTIMUS_DIR)
+
+import mongo  # noqa: E402
+from mongo import AssignmentMappingCache  # noqa: E402
+
+
+def wait_for(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not met in time")
+        time.sleep(0.01)
+
+
+class FakeClock:
+    """
+    Stands in for the time module in mongo: monotonic() is set by the test and sleep() waits until the test ends.
+    """
+
+    def __init__(self):
+        self.now = 1000.0
+        self.stopped = threading.Event()
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.stopped.wait()
+
+
+class ChangeStream:
+    """
+    Change stream fed by the test; putting None ends it.
+    """
+
+    def __init__(self):
+        self.changes = queue.Queue()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def __iter__(self):
+        while True:
+            change = self.changes.get()
+            if change is None:
+                return
+            yield change
+
+
+class MappingCollection:
+    """
+    A mongomock collection holding the mapping document, counting reads and serving watch() from the test.
+    """
+
+    def __init__(self, watch_error=None):
+        self.collection = mongomock.MongoClient().platformManager.assignmentGroup
+        self.collection.insert_one({"_id": "assignment_mapping", "mappings": {"Payments": {"restURL": "http://a"}}})
+        self.reads = 0
+        self.watch_error = watch_error
+        self.stream = ChangeStream()
+
+    def find_one(self, *args, **kwargs):
+        self.reads += 1
+        return self.collection.find_one(*args, **kwargs)
+
+    def watch(self, pipeline, **kwargs):
+        if self.watch_error:
+            raise self.watch_error
+        return self.stream
+
+    def set_mapping(self, mappings):
+        self.collection.update_one({"_id": "assignment_mapping"}, {"$set": {"mappings": mappings}})
+
+
+class AssignmentMappingCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch.object(mongo, "time", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.clock.stopped.set)
+
+    def test_copy_is_reloaded_once_the_ttl_expires(self):
+        collection = MappingCollection()
+        cache = AssignmentMappingCache(ttl=60, watch=False, collection=collection)
+
+        self.assertEqual(cache.get("Payments"), {"restURL": "http://a"})
+        collection.set_mapping({"Payments": {"restURL": "http://b"}})
+        self.clock.now += 30
+        self.assertEqual(cache.get("Payments"), {"restURL": "http://a"})
+        self.assertEqual(collection.reads, 1)
+
+        self.clock.now += 31
+        self.assertEqual(cache.get("Payments"), {"restURL": "http://b"})
+        self.assertEqual(cache.get("Unknown"), {})
+        self.assertEqual(collection.reads, 2)
+
+    def test_without_change_streams_it_falls_back_to_the_ttl(self):
+        error = OperationFailure("The $changeStream stage is only supported on replica sets", code=40573)
+        collection = MappingCollection(watch_error=error)
+        cache = AssignmentMappingCache(ttl=60, watch=True, collection=collection)
+
+        cache.get("Payments")
+        cache._watcher.join(5)
+
+        self.assertFalse(cache._watcher.is_alive())
+        self.assertFalse(cache._watching)
+        collection.set_mapping({"Payments": {"restURL": "http://b"}})
+        self.clock.now += 61
+        self.assertEqual(cache.get("Payments"), {"restURL": "http://b"})
+
+    def test_change_stream_updates_the_copy_without_reloading(self):
+        collection = MappingCollection()
+        cache = AssignmentMappingCache(ttl=60, watch=True, collection=collection)
+
+        self.assertEqual(cache.get("Payments"), {"restURL": "http://a"})
+        wait_for(lambda: cache._watching)
+        reads = collection.reads
+
+        collection.stream.changes.put({
+            "operationType": "update",
+            "fullDocument": {"_id": "assignment_mapping", "mappings": {"Identity": {"restURL": "http://c"}}},
+        })
+        wait_for(lambda: cache.get("Identity"))
+        self.assertEqual(cache.get("Payments"), {})
+
+        # Followed by the stream, the copy does not expire
+        self.clock.now += 3600
+        cache.get("Identity")
+        self.assertEqual(collection.reads, reads)
+
+        collection.stream.changes.put({"operationType": "delete"})
+        wait_for(lambda: cache.mappings() == {})
+
+    def test_broken_stream_goes_back_to_the_ttl(self):
+        collection = MappingCollection()
+        cache = AssignmentMappingCache(ttl=60, watch=True, collection=collection)
+        cache.get("Payments")
+        wait_for(lambda: cache._watching)
+
+        collection.stream.changes.put(None)
+        wait_for(lambda: not cache._watching)
+        collection.set_mapping({"Payments": {"restURL": "http://b"}})
+        self.clock.now += 61
+
+        self.assertEqual(cache.get("Payments"), {"restURL": "http://b"})
+
+
+if __name__ == "__main__":
+    unittest.main()
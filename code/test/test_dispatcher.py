@@ -0,0 +1,130 @@
+"""
+Tests for the Optimus dispatch engine: per-agent limits, failures and latency percentiles.
+"""
+import os
+import sys
+import threading
+import time
+import unittest
+from unittest import mock
+
+OPTIMUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "optimus (Orchestration Agent)")
+sys.path.insert(0, OPTIMUS_DIR)
+
+from dispatcher import DispatchEngine, format_summary, percentile  # noqa: E402
+
+
+class ConcurrencyProbe:
+    """
+    Records how many sends run at once, in total and per agent.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.running = {}
+        self.peak = {}
+        self.total_peak = 0
+
+    def send(self, agent, duration=0.02, result=True):
+        def run():
+            with self.lock:
+                self.running[agent] = self.running.get(agent, 0) + 1
+                self.peak[agent] = max(self.peak.get(agent, 0), self.running[agent])
+                self.total_peak = max(self.total_peak, sum(self.running.values()))
+            time.sleep(duration)
+            with self.lock:
+                self.running[agent] -= 1
+            return result
+        return run
+
+
+class DispatchEngineTest(unittest.TestCase):
+
+    def engine(self, **kwargs):
+        engine = DispatchEngine(**kwargs)
+        self.addCleanup(engine._executor.shutdown)
+        return engine
+
+    def test_deliveries_stay_within_the_worker_and_per_agent_limits(self):
+        probe = ConcurrencyProbe()
+        tasks = [(agent, f"{agent}-{number}", probe.send(agent)) for agent in ("network", "database", "identity")
+                 for number in range(6)]
+
+        summary = self.engine(max_workers=4, per_agent=2).dispatch(tasks)
+
+        self.assertEqual((summary["dispatched"], summary["failed"]), (18, 0))
+        self.assertEqual(set(summary["results"]), {label for _, label, _ in tasks})
+        self.assertEqual(max(probe.peak.values()), 2)
+        self.assertLessEqual(probe.total_peak, 4)
+
+    def test_slow_agent_does_not_hold_up_the_others(self):
+        others_done = threading.Event()
+        delivered = []
+
+        def slow():
+            # Only returns once every delivery to the other agent went through
+            return others_done.wait(5)
+
+        def fast(number):
+            def send():
+                delivered.append(number)
+                if len(delivered) == 4:
+                    others_done.set()
+                return True
+            return send
+
+        tasks = [("slow", f"slow-{number}", slow) for number in range(3)]
+        tasks += [("fast", f"fast-{number}", fast(number)) for number in range(4)]
+
+        summary = self.engine(max_workers=2, per_agent=1).dispatch(tasks)
+
+        self.assertEqual(summary["dispatched"], 7)
+        self.assertEqual(delivered, [0, 1, 2, 3])
+
+    def test_failures_are_counted_and_errors_kept(self):
+        def refuse():
+            raise ConnectionError("connection refused")
+
+        tasks = [("network", "INC1", lambda: True), ("network", "INC2", lambda: False), ("database", "INC3", refuse)]
+
+        with mock.patch("builtins.print"):
+            summary = self.engine(max_workers=2, per_agent=1).dispatch(tasks)
+
+        self.assertEqual((summary["dispatched"], summary["failed"]), (1, 2))
+        self.assertEqual(summary["results"], {"INC1": True, "INC2": False, "INC3": False})
+        self.assertEqual(summary["errors"], {"INC3": "connection refused"})
+
+    def test_no_tasks(self):
+        summary = self.engine().dispatch([])
+
+        self.assertEqual((summary["dispatched"], summary["failed"], summary["p95_ms"]), (0, 0, 0))
+        self.assertTrue(format_summary(summary).startswith("Dispatch cycle: 0 dispatched, 0 failed"))
+
+    def test_sessions_are_kept_per_thread_and_posts_have_timeouts(self):
+        engine = self.engine(connect_timeout=2, read_timeout=7)
+        sessions = []
+        thread = threading.Thread(target=lambda: sessions.append(engine.session()))
+        thread.start()
+        thread.join()
+
+        self.assertIs(engine.session(), engine.session())
+        self.assertIsNot(engine.session(), sessions[0])
+        with mock.patch.object(engine.session(), "post") as post:
+            engine.post("http://agent/incident", json={})
+        post.assert_called_once_with("http://agent/incident", json={}, timeout=(2, 7))
+
+
+class PercentileTest(unittest.TestCase):
+
+    def test_nearest_rank(self):
+        values = list(range(100, 0, -1))
+
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 95), 95)
+        self.assertEqual(percentile(values, 100), 100)
+        self.assertEqual(percentile([7], 95), 7)
+        self.assertEqual(percentile([], 50), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+"""
+Tests for the Bumblebee recent-history window and its per-conversation cache.
+"""
+import os
+import sys
+from datetime import timedelta
+
+BUMBLEBEE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "vertical-agent", "Bumblebee")
+sys.path.insert(0, BUMBLEBEE_DIR)
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "chat_assistant.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.test import TestCase  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from chat_app.models import Conversation, Message  # noqa: E402
+from chat_app.utils.history_window import HistoryWindow  # noqa: E402
+
+
+class HistoryWindowTest(TestCase):
+
+    def setUp(self):
+        self.conversation = Conversation.objects.create()
+        self.started = timezone.now() - timedelta(hours=1)
+        for number in range(8):
+            self.add_message(number)
+
+    def add_message(self, number):
+        message = Message.objects.create(conversation=self.conversation, role="user" if number % 2 == 0 else "assistant",
+                                         content=f"message {number}")
+        # Distinct timestamps, so the window order does not depend on the clock resolution
+        Message.objects.filter(pk=message.pk).update(created_at=self.started + timedelta(seconds=number))
+        message.refresh_from_db()
+        return message
+
+    def contents(self, history):
+        return [message["content"] for message in history]
+
+    def test_loads_the_newest_messages_oldest_first(self):
+        history = HistoryWindow(size=3).load(self.conversation)
+
+        self.assertEqual(self.contents(history), ["message 5", "message 6", "message 7"])
+        self.assertEqual(history[0], {"role": "assistant", "content": "message 5"})
+
+    def test_without_cache_every_load_queries(self):
+        window = HistoryWindow(size=3)
+        window.load(self.conversation)
+
+        with self.assertNumQueries(1):
+            window.load(self.conversation)
+
+    def test_cached_tail_is_served_and_kept_current(self):
+        window = HistoryWindow(size=3, cache_enabled=True)
+        window.load(self.conversation)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.contents(window.load(self.conversation)), ["message 5", "message 6", "message 7"])
+
+        window.append(self.add_message(8))
+        # Appending a message twice (a load picked it up already) keeps one copy
+        window.append(Message.objects.get(content="message 8"))
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.contents(window.load(self.conversation)), ["message 6", "message 7", "message 8"])
+        self.assertEqual(window.stats()["hits"], 2)
+
+    def test_load_that_raced_with_an_append_is_not_cached(self):
+        window = HistoryWindow(size=3, cache_enabled=True)
+        conversation_id = str(self.conversation.pk)
+
+        history, generation = window._start_load(conversation_id)
+        self.assertIsNone(history)
+        stale = window._tail_entries(list(window._query(self.conversation)))
+        window.append(self.add_message(8))
+        window._finish_load(conversation_id, stale, generation)
+
+        self.assertEqual(window.stats()["conversations"], 0)
+        self.assertEqual(self.contents(window.load(self.conversation)), ["message 6", "message 7", "message 8"])
+
+    def test_saved_messages_reach_the_cache_on_commit(self):
+        window = HistoryWindow(size=3, cache_enabled=True)
+        window.load(self.conversation)
+
+        message = self.add_message(8)
+        with self.captureOnCommitCallbacks(execute=True):
+            window.on_message_saved(Message, message, created=True)
+        self.assertEqual(self.contents(window.load(self.conversation))[-1], "message 8")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            window.on_message_saved(Message, message, created=False)
+        self.assertEqual(window.stats()["conversations"], 0)
+
+    def test_cached_conversations_are_bounded(self):
+        window = HistoryWindow(size=3, cache_enabled=True, max_conversations=1)
+        other = Conversation.objects.create()
+        window.load(self.conversation)
+        window.load(other)
+
+        self.assertEqual(window.stats()["conversations"], 1)
+        with self.assertNumQueries(1):
+            window.load(self.conversation)
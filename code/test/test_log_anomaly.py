@@ -0,0 +1,166 @@
+"""
+Tests for the Bumblebee log rate anomaly detection: EWMA thresholds, warm-up, decay and the monitor.
+"""
+import math
+import os
+import sys
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+BUMBLEBEE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "vertical-agent", "Bumblebee")
+sys.path.insert(0, BUMBLEBEE_DIR)
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "chat_assistant.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.test import SimpleTestCase, TestCase  # noqa: E402
+
+from chat_app.models import Incident, Log, LogAnomaly  # noqa: E402
+from chat_app.utils.log_anomaly import EwmaRateDetector, LogAnomalyMonitor  # noqa: E402
+
+START = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def at(minute, number=0):
+    return START + timedelta(minutes=minute, milliseconds=number)
+
+
+class EwmaRateDetectorTest(SimpleTestCase):
+
+    def setUp(self):
+        self.detector = EwmaRateDetector()
+
+    def steady(self, key, per_bucket, buckets, first=0):
+        found = []
+        for minute in range(first, first + buckets):
+            for number in range(per_bucket):
+                anomaly = self.detector.observe(key, at(minute, number))
+                if anomaly:
+                    found.append(anomaly)
+        return found
+
+    def burst(self, key, minute, count):
+        return [anomaly for anomaly in (self.detector.observe(key, at(minute, number)) for number in range(count))
+                if anomaly]
+
+    def test_steady_rate_is_never_flagged(self):
+        self.assertEqual(self.steady("api", 30, 30), [])
+
+    def test_spike_is_flagged_once_when_it_crosses_the_threshold(self):
+        self.steady("api", 30, 30)
+        # The first log of the next bucket folds the previous one into the averages
+        self.detector.observe("api", at(30))
+        stats = self.detector._stats["api"]
+        mean, deviation = stats.mean, math.sqrt(max(stats.var, stats.mean, 1.0))
+        # First count whose z-score reaches the threshold
+        crossing = math.ceil(mean + self.detector.z_threshold * deviation)
+
+        found = self.burst("api", 30, 199)
+
+        self.assertEqual(len(found), 1)
+        anomaly = found[0]
+        self.assertEqual((anomaly["key"], anomaly["bucket_start"], anomaly["observed"]), ("api", at(30), crossing))
+        self.assertAlmostEqual(anomaly["expected"], mean)
+        self.assertGreaterEqual(anomaly["z_score"], self.detector.z_threshold)
+
+    def test_next_bucket_can_be_flagged_again(self):
+        self.steady("api", 30, 30)
+
+        self.assertEqual(len(self.burst("api", 30, 200)), 1)
+        self.assertEqual(len(self.burst("api", 31, 300)), 1)
+
+    def test_new_keys_warm_up_first(self):
+        self.steady("new", 1, 4)
+        self.steady("old", 1, 5)
+
+        self.assertEqual(self.burst("new", 4, 1000), [])
+        # Five buckets seen: the same spike counts
+        self.assertEqual(len(self.burst("old", 5, 1000)), 1)
+
+    def test_quiet_keys_need_min_count(self):
+        self.steady("cron", 1, 30)
+        self.steady("backup", 1, 30)
+
+        self.assertEqual(self.burst("cron", 30, 19), [])
+        self.assertEqual(len(self.burst("backup", 30, 20)), 1)
+
+    def test_empty_buckets_decay_the_mean(self):
+        self.steady("api", 30, 30)
+        before = self.detector._stats["api"].mean
+
+        self.detector.observe("api", at(40))
+
+        stats = self.detector._stats["api"]
+        # The open bucket of minute 29, then ten empty ones
+        self.assertEqual(stats.buckets, 40)
+        self.assertAlmostEqual(stats.mean, (before * 0.9 + 30 * 0.1) * 0.9 ** 10)
+
+    def test_late_logs_count_towards_the_open_bucket(self):
+        self.steady("api", 30, 30)
+        self.detector.observe("api", at(10))
+
+        stats = self.detector._stats["api"]
+        self.assertEqual((stats.bucket, stats.count), (int(at(29).timestamp() // 60), 31))
+
+    def test_least_recently_seen_keys_are_dropped(self):
+        detector = EwmaRateDetector(max_keys=2)
+        for key in ("a", "b", "a", "c"):
+            detector.observe(key, START)
+
+        self.assertEqual(list(detector._stats), ["a", "c"])
+
+
+class LogAnomalyMonitorTest(TestCase):
+
+    def setUp(self):
+        self.detector = EwmaRateDetector(warmup_buckets=1, min_count=5)
+
+    def logs(self, minute, count, level="error"):
+        return [Log(message="payment declined", level=level, source="payments", timestamp=at(minute, number))
+                for number in range(count)]
+
+    def feed(self, monitor):
+        monitor.process(self.logs(0, 1))
+        monitor.process(self.logs(1, 50))
+
+    def test_spike_is_recorded_and_listeners_are_called(self):
+        monitor = LogAnomalyMonitor(self.detector)
+        heard = []
+        monitor.listeners.append(lambda anomaly: 1 / 0)
+        monitor.listeners.append(heard.append)
+
+        self.feed(monitor)
+
+        anomaly = LogAnomaly.objects.get()
+        self.assertEqual((anomaly.source, anomaly.level, anomaly.bucket_start), ("payments", "error", at(1)))
+        self.assertIsNone(anomaly.incident)
+        # A failing listener does not keep the others from hearing about it
+        self.assertEqual(heard, [anomaly])
+        self.assertEqual(monitor.stats()["detected"], 1)
+
+    def test_incident_is_opened_once_per_cooldown(self):
+        monitor = LogAnomalyMonitor(self.detector, auto_incident=True)
+
+        self.feed(monitor)
+        monitor.process(self.logs(2, 500))
+
+        self.assertEqual(LogAnomaly.objects.count(), 2)
+        incident = Incident.objects.get()
+        self.assertEqual(incident.priority, 2)
+        self.assertIn("payments", incident.short_description)
+
+    def test_levels_without_incidents(self):
+        monitor = LogAnomalyMonitor(self.detector, auto_incident=True)
+        monitor.process(self.logs(0, 1, level="info"))
+        monitor.process(self.logs(1, 50, level="info"))
+
+        self.assertEqual(LogAnomaly.objects.count(), 1)
+        self.assertFalse(Incident.objects.exists())
+
+    def test_disabled_monitor_does_nothing(self):
+        monitor = LogAnomalyMonitor(self.detector, enabled=False)
+        self.feed(monitor)
+
+        self.assertFalse(LogAnomaly.objects.exists())
+        self.assertEqual(len(self.detector), 0)
@@ -0,0 +1,75 @@
+"""
+Tests for the Bumblebee batch log ingestion endpoint.
+"""
+import io
+import json
+import os
+import sys
+
+BUMBLEBEE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "vertical-agent", "Bumblebee")
+sys.path.insert(0, BUMBLEBEE_DIR)
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "chat_assistant.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.test import TestCase  # noqa: E402
+
+from chat_app.models import Log  # noqa: E402
+from chat_app.utils.log_ingest import LogIngestor, iter_ndjson, parse_timestamp  # noqa: E402
+
+
+def ndjson(*records):
+    return "\n".join(json.dumps(record) for record in records).encode()
+
+
+class ParseTimestampTest(TestCase):
+
+    def test_epoch_seconds_and_milliseconds(self):
+        self.assertEqual(parse_timestamp(1700000000), parse_timestamp(1700000000000))
+        self.assertEqual(parse_timestamp("2023-11-14T22:13:20Z"), parse_timestamp(1700000000))
+
+    def test_out_of_range_epoch_is_a_value_error(self):
+        for value in (2 ** 70, -2 ** 70, float("inf")):
+            with self.assertRaises(ValueError):
+                parse_timestamp(value)
+
+
+class LogIngestTest(TestCase):
+
+    def post(self, body, content_type="application/x-ndjson"):
+        return self.client.post("/api/logs/ingest/?source=test", data=body, content_type=content_type)
+
+    def test_out_of_range_timestamp_rejects_only_that_record(self):
+        records = [{"message": f"line {number}"} for number in range(5)]
+        records.insert(2, {"message": "far future", "timestamp": 2 ** 70})
+
+        ingestor = LogIngestor(chunk_size=2)
+        result = ingestor.ingest(iter_ndjson(io.BytesIO(ndjson(*records))), default_level="info", default_source="test")
+
+        self.assertNotIn("error", result)
+        self.assertEqual(result["accepted"], 5)
+        self.assertEqual(result["rejected"], 1)
+        self.assertEqual(result["errors"], [{"record": 3, "error": "timestamp is out of range"}])
+        self.assertEqual(Log.objects.count(), 5)
+
+    def test_endpoint_reports_bad_records_without_failing_the_batch(self):
+        response = self.post(ndjson(
+            {"message": "ok", "level": "error"},
+            {"message": "far future", "timestamp": 2 ** 70},
+            {"level": "info"},
+            {"message": "also ok"},
+        ))
+
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual((body["accepted"], body["rejected"]), (2, 2))
+        self.assertEqual([error["record"] for error in body["errors"]], [2, 3])
+        self.assertEqual(sorted(Log.objects.values_list("message", flat=True)), ["also ok", "ok"])
+
+    def test_unreadable_payload_is_a_bad_request(self):
+        response = self.post(b'[{"message": "ok"}, {"message": ', content_type="application/json")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("error", response.json())
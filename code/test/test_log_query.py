@@ -0,0 +1,119 @@
+"""
+Tests for the Bumblebee log query API: filters, keyset cursors and the NDJSON export.
+"""
+import base64
+import json
+import os
+import sys
+import uuid
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+BUMBLEBEE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "vertical-agent", "Bumblebee")
+sys.path.insert(0, BUMBLEBEE_DIR)
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "chat_assistant.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.test import TestCase  # noqa: E402
+
+from chat_app.models import Log  # noqa: E402
+from chat_app.utils.log_query import (  # noqa: E402
+    MAX_PAGE_SIZE, decode_cursor, encode_cursor, filter_logs, keyset_page, parse_page_size,
+)
+
+START = datetime(2024, 1, 1, 12, 0, tzinfo=dt_timezone.utc)
+
+
+class LogQueryTest(TestCase):
+
+    def setUp(self):
+        # Pairs of logs share a timestamp, so the id has to break the ties
+        Log.objects.bulk_create([
+            Log(message=f"log {number}", level="error" if number % 3 == 0 else "info",
+                source="payments" if number % 2 else "identity", timestamp=START + timedelta(seconds=number // 2))
+            for number in range(11)
+        ])
+
+    def keys(self, logs):
+        return [(log.timestamp, log.id) for log in logs]
+
+    def read_all(self, queryset, page_size, descending):
+        logs, cursor, pages = [], None, 0
+        while True:
+            page, cursor = keyset_page(queryset, cursor=cursor, page_size=page_size, descending=descending)
+            logs.extend(page)
+            pages += 1
+            if cursor is None:
+                return logs, pages
+
+    def test_cursor_round_trip(self):
+        log = Log.objects.first()
+        cursor = encode_cursor(log)
+
+        self.assertEqual(decode_cursor(cursor), (log.timestamp, log.id))
+        # URL-safe, so it can go in a query string as is
+        self.assertNotRegex(cursor, r"[+/]")
+
+    def test_malformed_cursors_are_value_errors(self):
+        for cursor in ("not base64!", base64.urlsafe_b64encode(b"[1]").decode(),
+                       base64.urlsafe_b64encode(json.dumps(["2024-01-01T00:00:00", "not-a-uuid"]).encode()).decode()):
+            with self.assertRaises(ValueError):
+                decode_cursor(cursor)
+
+    def test_pages_cover_every_log_once_in_both_orders(self):
+        for descending in (True, False):
+            logs, pages = self.read_all(Log.objects.all(), page_size=3, descending=descending)
+
+            expected = sorted(self.keys(Log.objects.all()), reverse=descending)
+            self.assertEqual(self.keys(logs), expected)
+            self.assertEqual(pages, 4)
+
+    def test_new_logs_do_not_shift_later_pages(self):
+        first, cursor = keyset_page(Log.objects.all(), page_size=4)
+        Log.objects.bulk_create([Log(message="newer", level="info", source="payments", timestamp=START + timedelta(hours=1))])
+
+        rest = []
+        while cursor:
+            page, cursor = keyset_page(Log.objects.all(), cursor=cursor, page_size=4)
+            rest.extend(page)
+
+        self.assertEqual(len(first) + len(rest), 11)
+        self.assertNotIn("newer", [log.message for log in rest])
+
+    def test_filters(self):
+        params = {"level": "ERROR,warning", "source": "payments", "start": START.isoformat(),
+                  "end": str((START + timedelta(seconds=4)).timestamp())}
+
+        messages = sorted(filter_logs(Log.objects.all(), params).values_list("message", flat=True))
+
+        self.assertEqual(messages, ["log 3"])
+
+    def test_invalid_parameters(self):
+        for params in ({"start": "yesterday"}, {"template": "42"}):
+            with self.assertRaises(ValueError):
+                filter_logs(Log.objects.all(), params)
+        with self.assertRaises(ValueError):
+            parse_page_size("0")
+        self.assertEqual(parse_page_size(str(MAX_PAGE_SIZE * 10)), MAX_PAGE_SIZE)
+
+    def test_list_endpoint_links_the_next_page(self):
+        response = self.client.get("/api/logs/?page_size=5&level=info&order=asc")
+        body = response.json()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(body["results"]), 5)
+        second = self.client.get(body["next"]).json()
+        self.assertEqual(len(second["results"]), 2)
+        self.assertIsNone(second["next"])
+        self.assertEqual(self.client.get("/api/logs/?cursor=bogus").status_code, 400)
+
+    def test_export_streams_every_matching_log_as_ndjson(self):
+        response = self.client.get("/api/logs/export/?source=identity")
+
+        self.assertTrue(response.streaming)
+        lines = [json.loads(line) for line in b"".join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([line["message"] for line in lines], [f"log {number}" for number in (0, 2, 4, 6, 8, 10)])
+        self.assertEqual(set(lines[0]), {"id", "timestamp", "level", "source", "message"})
+        uuid.UUID(lines[0]["id"])
@@ -0,0 +1,132 @@
+"""
+Tests for the Bumblebee log rollups: bucketing, incremental counts, histograms and pruning.
+"""
+import os
+import sys
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+BUMBLEBEE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "vertical-agent", "Bumblebee")
+sys.path.insert(0, BUMBLEBEE_DIR)
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "chat_assistant.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.test import SimpleTestCase, TestCase  # noqa: E402
+
+from chat_app.models import Log, LogRollup  # noqa: E402
+from chat_app.utils.log_rollups import (  # noqa: E402
+    add_to_rollups, bucket_start, choose_granularity, count_entries, histogram, prune_rollups, rebuild_rollups,
+)
+
+UTC = dt_timezone.utc
+START = datetime(2024, 1, 1, 12, 0, tzinfo=UTC)
+RETENTION = {"minute": 7, "hour": 90, "day": None}
+
+
+def log(minutes, level="info", source="api"):
+    return Log(message="request served", level=level, source=source, timestamp=START + timedelta(minutes=minutes))
+
+
+class BucketingTest(SimpleTestCase):
+
+    def test_buckets_start_in_utc(self):
+        # 01:30 at UTC+2 is still the previous day in UTC
+        timestamp = datetime(2024, 1, 1, 1, 30, 45, 500, tzinfo=dt_timezone(timedelta(hours=2)))
+
+        self.assertEqual(bucket_start(timestamp, "minute"), datetime(2023, 12, 31, 23, 30, tzinfo=UTC))
+        self.assertEqual(bucket_start(timestamp, "hour"), datetime(2023, 12, 31, 23, 0, tzinfo=UTC))
+        self.assertEqual(bucket_start(timestamp, "day"), datetime(2023, 12, 31, tzinfo=UTC))
+
+    def test_every_log_is_counted_once_per_granularity(self):
+        counts = count_entries([log(0.5), log(0.9), log(1), log(1, level="error")])
+
+        self.assertEqual(counts[("minute", START, "info", "api")], 2)
+        self.assertEqual(counts[("minute", START + timedelta(minutes=1), "info", "api")], 1)
+        self.assertEqual(counts[("hour", START, "info", "api")], 3)
+        self.assertEqual(counts[("day", datetime(2024, 1, 1, tzinfo=UTC), "error", "api")], 1)
+        self.assertEqual(sum(count for key, count in counts.items() if key[0] == "day"), 4)
+
+    def test_granularity_fits_the_range_and_the_retention(self):
+        now = START
+
+        self.assertEqual(choose_granularity(now - timedelta(hours=6), now, RETENTION, now), "minute")
+        # 500 minutes is the limit for minute buckets
+        self.assertEqual(choose_granularity(now - timedelta(minutes=501), now, RETENTION, now), "hour")
+        # Minute rows of eight days ago are pruned already, even for a short range
+        eight_days_ago = now - timedelta(days=8)
+        self.assertEqual(choose_granularity(eight_days_ago, eight_days_ago + timedelta(hours=1), RETENTION, now), "hour")
+        self.assertEqual(choose_granularity(now - timedelta(days=365), now, RETENTION, now), "day")
+
+
+class RollupTest(TestCase):
+
+    def save(self, entries):
+        Log.objects.bulk_create(entries)
+        add_to_rollups(entries)
+
+    def counts(self, granularity):
+        return {(row.bucket, row.level, row.source): row.count
+                for row in LogRollup.objects.filter(granularity=granularity)}
+
+    def test_counts_are_incremented_across_writes(self):
+        self.save([log(0), log(0, level="error")])
+        self.save([log(0.5), log(30, source="web")])
+
+        self.assertEqual(self.counts("minute"), {
+            (START, "info", "api"): 2,
+            (START, "error", "api"): 1,
+            (START + timedelta(minutes=30), "info", "web"): 1,
+        })
+        self.assertEqual(self.counts("hour")[(START, "info", "api")], 2)
+
+    def test_rebuild_matches_the_incremental_counts(self):
+        self.save([log(minutes, level="error" if minutes % 7 == 0 else "info") for minutes in range(0, 180, 5)])
+        incremental = {granularity: self.counts(granularity) for granularity in ("minute", "hour", "day")}
+
+        written = rebuild_rollups(START)
+
+        self.assertEqual(written, LogRollup.objects.count())
+        self.assertEqual({granularity: self.counts(granularity) for granularity in ("minute", "hour", "day")},
+                         incremental)
+
+    def test_histogram_fills_empty_buckets(self):
+        self.save([log(0), log(1), log(1), log(3, level="error")])
+
+        buckets = histogram(START + timedelta(seconds=30), START + timedelta(minutes=5), "minute")
+
+        self.assertEqual([(bucket["bucket"] - START, bucket["count"]) for bucket in buckets],
+                         [(timedelta(minutes=minutes), count) for minutes, count in enumerate([1, 2, 0, 1, 0])])
+
+    def test_histogram_filters_and_groups(self):
+        self.save([log(0), log(0, level="error"), log(0, level="error", source="web"), log(61, level="warning")])
+
+        buckets = histogram(START, START + timedelta(hours=2), "hour", levels=["error", "warning"], group_by="source")
+
+        self.assertEqual(buckets, [
+            {"bucket": START, "count": 2, "by": {"api": 1, "web": 1}},
+            {"bucket": START + timedelta(hours=1), "count": 1, "by": {"api": 1}},
+        ])
+
+    def test_pruning_minutes_keeps_the_coarser_histograms(self):
+        self.save([log(0), log(1)])
+
+        deleted = prune_rollups(RETENTION, now=START + timedelta(days=8))
+
+        self.assertEqual(deleted, {"minute": 2, "hour": 0})
+        self.assertEqual(histogram(START, START + timedelta(days=1), "day")[0]["count"], 2)
+
+    def test_histogram_endpoint(self):
+        self.save([log(0), log(2, level="error")])
+
+        params = {"start": START.isoformat(), "end": (START + timedelta(minutes=3)).isoformat()}
+
+        response = self.client.get("/api/logs/histogram/", {**params, "granularity": "minute"})
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual((body["granularity"], body["total"]), ("minute", 2))
+        self.assertEqual([bucket["count"] for bucket in body["buckets"]], [1, 0, 1])
+        # auto skips granularities whose rows for the range are past their retention
+        self.assertEqual(self.client.get("/api/logs/histogram/", params).json()["granularity"], "day")
+        self.assertEqual(self.client.get("/api/logs/histogram/", {"granularity": "week"}).status_code, 400)
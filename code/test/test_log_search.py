@@ -0,0 +1,114 @@
+"""
+Tests for the Bumblebee full-text log search: query sanitizing, phrases, prefixes and the index triggers.
+"""
+import os
+import sys
+from datetime import datetime, timezone as dt_timezone
+from unittest import mock
+
+BUMBLEBEE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "vertical-agent", "Bumblebee")
+sys.path.insert(0, BUMBLEBEE_DIR)
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "chat_assistant.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.test import SimpleTestCase, TestCase  # noqa: E402
+
+from chat_app.models import Log  # noqa: E402
+from chat_app.utils import log_search  # noqa: E402
+from chat_app.utils.log_search import (  # noqa: E402
+    ensure_fulltext_index, parse_search_query, postgres_tsquery, search_logs, sqlite_match_expression,
+)
+
+MESSAGES = [
+    "Connection reset by peer on db-01",
+    "connection to db-02 was reset",
+    "Request timeout after 30s",
+    "Timed out waiting for lock",
+    "Disk usage at 91% on /var",
+]
+
+
+class ParseSearchQueryTest(SimpleTestCase):
+
+    def test_words_phrases_and_prefixes(self):
+        self.assertEqual(parse_search_query('"Connection Reset" timeou* db-01'), [
+            (["connection", "reset"], False),
+            (["timeou"], True),
+            (["db", "01"], False),
+        ])
+
+    def test_query_syntax_is_reduced_to_words(self):
+        # FTS5 and tsquery operators are not passed through to the backend
+        terms = parse_search_query('disk OR NEAR(usage) -var ^col:x ) & | \'')
+
+        self.assertEqual([words for words, _ in terms], [["disk"], ["or"], ["near", "usage"], ["var"], ["col", "x"]])
+        self.assertEqual(sqlite_match_expression(terms), '"disk" AND "or" AND "near usage" AND "var" AND "col x"')
+        self.assertEqual(postgres_tsquery(parse_search_query('"a b" c*')), "('a' <-> 'b') & ('c':*)")
+
+    def test_queries_without_words(self):
+        self.assertEqual(parse_search_query('"" * -- ""*'), [])
+        self.assertEqual(parse_search_query(None), [])
+
+
+class SearchLogsTest(TestCase):
+
+    def setUp(self):
+        Log.objects.bulk_create([
+            Log(message=message, level="error", source="app", timestamp=datetime(2024, 1, 1, tzinfo=dt_timezone.utc))
+            for message in MESSAGES
+        ])
+
+    def search(self, text):
+        return sorted(search_logs(Log.objects.all(), text).values_list("message", flat=True))
+
+    def test_every_word_must_match(self):
+        self.assertEqual(self.search("reset connection"), [MESSAGES[0], MESSAGES[1]])
+        self.assertEqual(self.search("reset db 02"), [MESSAGES[1]])
+
+    def test_phrase_matches_words_in_order(self):
+        self.assertEqual(self.search('"connection reset"'), [MESSAGES[0]])
+
+    def test_trailing_star_matches_a_prefix(self):
+        self.assertEqual(self.search("time*"), [MESSAGES[2], MESSAGES[3]])
+        self.assertEqual(self.search("time"), [])
+
+    def test_hostile_queries_are_searched_not_parsed(self):
+        self.assertEqual(self.search('usage" OR "reset'), [])
+        self.assertEqual(self.search("NEAR(disk usage)"), [])
+        self.assertEqual(self.search("91%"), [MESSAGES[4]])
+
+    def test_query_without_words_is_rejected(self):
+        with self.assertRaises(ValueError):
+            search_logs(Log.objects.all(), '"*"')
+
+    def test_composes_with_other_filters(self):
+        Log.objects.filter(message=MESSAGES[0]).update(level="info")
+
+        self.assertEqual(list(search_logs(Log.objects.filter(level="error"), "reset").values_list("message", flat=True)),
+                         [MESSAGES[1]])
+
+    def test_updated_and_deleted_logs_leave_the_index(self):
+        Log.objects.filter(message=MESSAGES[4]).update(message="Disk usage back to normal")
+        Log.objects.filter(message=MESSAGES[0]).delete()
+
+        self.assertEqual(self.search("91"), [])
+        self.assertEqual(self.search("normal"), ["Disk usage back to normal"])
+        self.assertEqual(self.search("peer"), [])
+
+    def test_missing_triggers_are_reinstalled(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TRIGGER {log_search.FTS_TABLE}_ai")
+        Log.objects.create(message="Certificate expired", level="error", source="app")
+
+        self.assertTrue(ensure_fulltext_index(connection))
+        self.assertEqual(self.search("certificate"), ["Certificate expired"])
+        self.assertFalse(ensure_fulltext_index(connection))
+
+    def test_without_an_index_words_are_matched_with_like(self):
+        with mock.patch.object(log_search, "_is_ready", return_value=False):
+            self.assertEqual(self.search("RESET db"), [MESSAGES[0], MESSAGES[1]])
+            self.assertEqual(self.search('"reset by"'), [MESSAGES[0]])
@@ -0,0 +1,177 @@
+"""
+Tests for the Optimus indexed log store, against mongomock and, when MONGO_TEST_URI is set, a real mongod.
+"""
+import os
+import sys
+import unittest
+import uuid
+from datetime import datetime, timedelta
+from unittest import mock
+
+import mongomock
+
+OPTIMUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "optimus (Orchestration Agent)")
+sys.path.insert(0, OPTIMUS_DIR)
+
+import log_store  # noqa: E402
+
+START = datetime(2024, 1, 1, 12, 0)
+
+
+def sample_logs():
+    """
+    Six logs a minute for ten minutes: levels and sources alternate.
+    """
+    logs = []
+    for minute in range(10):
+        for second in range(0, 60, 10):
+            logs.append({
+                "timestamp": START + timedelta(minutes=minute, seconds=second),
+                "level": "error" if second == 0 else "info",
+                "source": "payments" if minute % 2 else "identity",
+                "message": f"event {minute}:{second}",
+                "stack": "x" * 100,
+            })
+    return logs
+
+
+class AggregateStub:
+    """
+    A mongomock collection whose aggregate() returns fixed $group rows (mongomock has no $dateTrunc).
+    """
+
+    def __init__(self, collection, rows):
+        self.collection = collection
+        self.rows = rows
+        self.pipelines = []
+
+    def aggregate(self, pipeline, **kwargs):
+        self.pipelines.append(pipeline)
+        return iter(self.rows)
+
+    def __getattr__(self, name):
+        return getattr(self.collection, name)
+
+
+class LogStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.collection = mongomock.MongoClient().platformManager.logs
+        self.collection.insert_many(sample_logs())
+
+    def test_iter_logs_returns_the_window_in_order_with_only_the_log_fields(self):
+        logs = list(log_store.iter_logs(START + timedelta(minutes=2), START + timedelta(minutes=3),
+                                        batch_size=4, collection=self.collection))
+
+        # Both bounds are included
+        self.assertEqual(len(logs), 7)
+        self.assertEqual(logs[0]["timestamp"], START + timedelta(minutes=2))
+        self.assertEqual(logs[-1]["timestamp"], START + timedelta(minutes=3))
+        self.assertEqual([log["timestamp"] for log in logs], sorted(log["timestamp"] for log in logs))
+        self.assertEqual(set(logs[0]), set(log_store.LOG_FIELDS))
+
+    def test_iter_logs_filters_newest_first_with_a_limit(self):
+        logs = list(log_store.iter_logs(START, START + timedelta(hours=1), source="payments", level=["error"],
+                                        limit=3, newest_first=True, fields=None, collection=self.collection))
+
+        self.assertEqual([log["message"] for log in logs], ["event 9:0", "event 7:0", "event 5:0"])
+        self.assertIn("_id", logs[0])
+        self.assertIn("stack", logs[0])
+
+    def test_count_logs(self):
+        self.assertEqual(log_store.count_logs(START, START + timedelta(hours=1), collection=self.collection), 60)
+        self.assertEqual(log_store.count_logs(START, START + timedelta(hours=1), source=["payments", "identity"],
+                                              level="error", collection=self.collection), 10)
+
+    def test_build_filter(self):
+        end = START + timedelta(hours=1)
+        self.assertEqual(log_store.build_filter(START, end, source=("a", "b"), level="error"), {
+            "timestamp": {"$gte": START, "$lte": end}, "source": {"$in": ["a", "b"]}, "level": "error",
+        })
+        self.assertEqual(log_store.build_filter(START, end), {"timestamp": {"$gte": START, "$lte": end}})
+
+    def test_indexes_are_created_once_per_collection(self):
+        client = mongomock.MongoClient()
+        with mock.patch.object(log_store, "get_client", return_value=client), \
+                mock.patch.object(log_store, "_indexed", set()), \
+                mock.patch.object(log_store, "ensure_log_indexes", wraps=log_store.ensure_log_indexes) as ensure:
+            collection = log_store.get_logs_collection()
+            log_store.get_logs_collection()
+
+        self.assertEqual(ensure.call_count, 1)
+        self.assertTrue({"timestamp_1", "source_1_timestamp_1", "level_1_timestamp_1"} <= set(collection.index_information()))
+
+    def test_histogram_merges_the_grouped_rows_per_bucket(self):
+        minute = START.replace(second=0)
+        collection = AggregateStub(self.collection, [
+            {"_id": {"bucket": minute + timedelta(minutes=1), "key": "error"}, "count": 1},
+            {"_id": {"bucket": minute, "key": "error"}, "count": 2},
+            {"_id": {"bucket": minute, "key": "info"}, "count": 5},
+        ])
+
+        histogram = log_store.log_histogram(START, START + timedelta(minutes=2), group_by="level", source="payments",
+                                            collection=collection)
+
+        self.assertEqual(histogram, [
+            {"bucket": minute, "count": 7, "by": {"error": 2, "info": 5}},
+            {"bucket": minute + timedelta(minutes=1), "count": 1, "by": {"error": 1}},
+        ])
+        match, group = collection.pipelines[0][:2]
+        self.assertEqual(match["$match"]["source"], "payments")
+        self.assertEqual(group["$group"]["_id"]["key"], "$level")
+
+    def test_histogram_rejects_unknown_units_and_groupings(self):
+        with self.assertRaises(ValueError):
+            log_store.log_histogram(START, START, unit="fortnight", collection=self.collection)
+        with self.assertRaises(ValueError):
+            log_store.log_histogram(START, START, group_by="message", collection=self.collection)
+
+    def test_incident_window_sums_levels_and_samples_the_newest_errors(self):
+        collection = AggregateStub(self.collection, [
+            {"_id": {"bucket": START, "key": "error"}, "count": 1},
+            {"_id": {"bucket": START, "key": "info"}, "count": 5},
+            {"_id": {"bucket": START + timedelta(minutes=1), "key": "error"}, "count": 1},
+        ])
+
+        window = log_store.incident_window(START + timedelta(minutes=5), minutes_before=5, minutes_after=0,
+                                           sample_size=2, collection=collection)
+
+        self.assertEqual((window["start"], window["end"]), (START, START + timedelta(minutes=5)))
+        self.assertEqual(window["levels"], {"error": 2, "info": 5})
+        self.assertEqual(window["total"], 7)
+        self.assertEqual([log["message"] for log in window["errors"]], ["event 5:0", "event 4:0"])
+
+
+@unittest.skipUnless(os.getenv("MONGO_TEST_URI"), "set MONGO_TEST_URI to run against a local mongod")
+class LogStoreMongodTest(unittest.TestCase):
+    """
+    The server-side parts mongomock cannot run: $dateTrunc histograms and index use.
+    """
+
+    def setUp(self):
+        from pymongo import MongoClient
+        self.client = MongoClient(os.getenv("MONGO_TEST_URI"), serverSelectionTimeoutMS=2000)
+        self.collection = self.client["optimus_test"][f"logs_{uuid.uuid4().hex}"]
+        self.collection.insert_many(sample_logs())
+        log_store.ensure_log_indexes(self.collection)
+
+    def tearDown(self):
+        self.collection.drop()
+        self.client.close()
+
+    def test_histogram_per_minute_by_level(self):
+        histogram = log_store.log_histogram(START, START + timedelta(minutes=2, seconds=59), group_by="level",
+                                            collection=self.collection)
+
+        self.assertEqual([bucket["bucket"] for bucket in histogram],
+                         [START, START + timedelta(minutes=1), START + timedelta(minutes=2)])
+        self.assertEqual(histogram[0]["by"], {"error": 1, "info": 5})
+
+    def test_source_window_uses_the_compound_index(self):
+        plan = self.collection.find(log_store.build_filter(START, START + timedelta(minutes=5), source="payments")).explain()
+
+        self.assertIn("source_1_timestamp_1", str(plan["queryPlanner"]["winningPlan"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,156 @@
+"""
+Tests for the Bumblebee MongoDB log sync: the (timestamp, _id) watermark, ties and replays, against mongomock.
+"""
+import os
+import sys
+import unittest
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+BUMBLEBEE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "vertical-agent", "Bumblebee")
+sys.path.insert(0, BUMBLEBEE_DIR)
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "chat_assistant.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.test import TestCase  # noqa: E402
+
+from chat_app.models import Log, LogSyncState  # noqa: E402
+from chat_app.utils.log_ingest import LogIngestor  # noqa: E402
+from chat_app.utils.log_sync import MongoLogSync  # noqa: E402
+
+try:
+    import mongomock
+    from bson import ObjectId
+except ImportError:
+    mongomock = None
+
+# Mongo keeps naive UTC datetimes with millisecond precision
+START = datetime(2024, 1, 1, 12, 0)
+
+
+def object_id(number):
+    return ObjectId(f"{number:024x}")
+
+
+def document(number, seconds=0, **fields):
+    return {"_id": object_id(number), "timestamp": START + timedelta(seconds=seconds),
+            "level": "INFO", "source": "payments", "message": f"document {number}", **fields}
+
+
+class FakeChangeStream:
+    """Yields the given changes, then None while the stream is quiet, for _consume."""
+
+    def __init__(self, changes, quiet_polls=1):
+        self.changes = list(changes)
+        self.quiet_polls = quiet_polls
+
+    @property
+    def alive(self):
+        return bool(self.changes) or self.quiet_polls > 0
+
+    def try_next(self):
+        if self.changes:
+            return self.changes.pop(0)
+        self.quiet_polls -= 1
+        return None
+
+
+@unittest.skipIf(mongomock is None, "mongomock is not installed")
+class MongoLogSyncTest(TestCase):
+
+    def setUp(self):
+        self.ingestor = LogIngestor()
+        self.sync = MongoLogSync(self.ingestor, uri="mongodb://unused", batch_size=2)
+        self.sync._collection = mongomock.MongoClient().platformManager.logs
+        self.documents = self.sync._collection
+
+    def messages(self):
+        return list(Log.objects.order_by("timestamp", "external_id").values_list("message", flat=True))
+
+    def test_ties_on_the_timestamp_are_split_by_id_across_batches(self):
+        # Five documents in one millisecond, inserted out of _id order
+        self.documents.insert_many([document(number) for number in (3, 1, 5, 2, 4)] + [document(6, seconds=1)])
+
+        result = self.sync.sync()
+
+        self.assertEqual((result["synced"], result["batches"]), (6, 3))
+        self.assertEqual(self.messages(), [f"document {number}" for number in range(1, 7)])
+        self.assertEqual(result["last_timestamp"], (START + timedelta(seconds=1)).replace(tzinfo=dt_timezone.utc))
+        self.assertEqual(result["last_id"], str(object_id(6)))
+
+    def test_next_sync_reads_only_after_the_watermark(self):
+        self.documents.insert_many([document(1), document(2)])
+        self.sync.sync()
+
+        # A later _id in the same millisecond, and a later timestamp with a smaller _id
+        self.documents.insert_many([document(3), document(0, seconds=5)])
+        result = self.sync.sync()
+
+        self.assertEqual(result["synced"], 2)
+        self.assertEqual(self.messages(), ["document 1", "document 2", "document 3", "document 0"])
+        self.assertEqual(self.sync.sync()["synced"], 0)
+        self.assertEqual(LogSyncState.objects.get(name="mongo-logs").synced, 4)
+
+    def test_max_batches_resumes_where_it_stopped(self):
+        self.documents.insert_many([document(number, seconds=number) for number in range(5)])
+
+        self.assertEqual(self.sync.sync(max_batches=1)["synced"], 2)
+        self.assertEqual(self.sync.sync()["synced"], 3)
+        self.assertEqual(Log.objects.count(), 5)
+
+    def test_replayed_documents_are_not_duplicated_and_the_watermark_never_moves_back(self):
+        self.documents.insert_many([document(1), document(2, seconds=1)])
+        self.sync.sync()
+        state = LogSyncState.objects.get(name="mongo-logs")
+
+        self.assertEqual(self.sync.save_documents([document(1), document(2, seconds=1)], state), 0)
+
+        state.refresh_from_db()
+        self.assertEqual(state.last_id, str(object_id(2)))
+        self.assertEqual(Log.objects.count(), 2)
+
+    def test_documents_are_converted_and_bad_ones_skipped(self):
+        state = LogSyncState.objects.create(name="mongo-logs")
+        documents = [
+            document(1, level="WARNING", source=None),
+            document(2, timestamp="2024-01-01T12:00:05Z"),
+            document(3, timestamp="yesterday"),
+        ]
+
+        self.assertEqual(self.sync.save_documents(documents, state), 2)
+
+        first, second = Log.objects.order_by("external_id")
+        self.assertEqual((first.level, first.source, first.timestamp.tzinfo), ("warning", "mongo", dt_timezone.utc))
+        self.assertEqual(second.timestamp, datetime(2024, 1, 1, 12, 0, 5, tzinfo=dt_timezone.utc))
+        # String timestamps do not move the watermark; only dates can be queried in order
+        self.assertEqual(state.last_id, str(object_id(1)))
+
+    def test_failed_batch_leaves_the_watermark_in_place(self):
+        self.documents.insert_many([document(1), document(2), document(3, seconds=1)])
+
+        def fail_on_third(entries):
+            if any(entry.message == "document 3" for entry in entries):
+                raise RuntimeError("database is locked")
+
+        self.ingestor.enrichers.append(fail_on_third)
+        with self.assertRaises(RuntimeError):
+            self.sync.sync()
+
+        state = LogSyncState.objects.get(name="mongo-logs")
+        self.assertEqual((state.last_id, state.synced), (str(object_id(2)), 2))
+        self.ingestor.enrichers.clear()
+        self.assertEqual(self.sync.sync()["synced"], 1)
+
+    def test_change_stream_events_are_saved_in_batches(self):
+        saved = []
+        self.ingestor.processors.append(lambda entries: saved.append(len(entries)))
+        changes = [{"operationType": "insert", "fullDocument": document(number, seconds=number)} for number in range(3)]
+        changes.insert(1, {"operationType": "insert", "fullDocument": {"_id": object_id(9)}})
+
+        self.sync._consume(FakeChangeStream(changes), should_stop=lambda: False)
+
+        # A full batch, then the rest once the stream goes quiet; the document without a timestamp is ignored
+        self.assertEqual(saved, [2, 1])
+        self.assertEqual(LogSyncState.objects.get(name="mongo-logs").last_id, str(object_id(2)))
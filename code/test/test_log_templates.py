@@ -0,0 +1,181 @@
+"""
+Tests for the Bumblebee Drain template miner and the LogTemplate rows it maintains.
+"""
+import os
+import sys
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest import mock
+
+BUMBLEBEE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "vertical-agent", "Bumblebee")
+sys.path.insert(0, BUMBLEBEE_DIR)
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "chat_assistant.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.test import SimpleTestCase, TestCase  # noqa: E402
+
+from chat_app.models import Log, LogTemplate  # noqa: E402
+from chat_app.utils.log_templates import DrainMiner, LogTemplateMiner, extract_params, render_template  # noqa: E402
+
+START = datetime(2024, 1, 1, 12, 0, tzinfo=dt_timezone.utc)
+
+
+class DrainMinerTest(SimpleTestCase):
+
+    def test_tokens_with_digits_are_parameters_up_front(self):
+        miner = DrainMiner()
+        first, params = miner.add("Connection to db-01 timed out after 30s")
+        second, other_params = miner.add("Connection to db-02 timed out after 45s")
+
+        self.assertIs(first, second)
+        self.assertEqual(first.template, "Connection to <*> timed out after <*>")
+        self.assertEqual((params, other_params), (["db-01", "30s"], ["db-02", "45s"]))
+        self.assertEqual(first.size, 2)
+
+    def test_similar_messages_merge_and_generalize(self):
+        miner = DrainMiner()
+        cluster, _ = miner.add("Session opened for alice")
+        self.assertEqual(miner.drain_changes(), [cluster])
+
+        merged, params = miner.add("Session opened for bob")
+
+        self.assertIs(merged, cluster)
+        self.assertEqual(cluster.template, "Session opened for <*>")
+        self.assertEqual(params, ["bob"])
+        self.assertEqual(miner.drain_changes(), [cluster])
+        # Another message of the template changes nothing
+        miner.add("Session opened for carol")
+        self.assertEqual(miner.drain_changes(), [])
+
+    def test_dissimilar_messages_start_new_templates(self):
+        miner = DrainMiner(similarity_threshold=0.8)
+        miner.add("Session opened for alice")
+        miner.add("Session closed by bob")
+        # Different token counts never share a template
+        miner.add("Session opened for alice again")
+
+        self.assertEqual(sorted(cluster.template for cluster in miner.clusters.values()),
+                         ["Session closed by bob", "Session opened for alice", "Session opened for alice again"])
+
+    def test_tie_goes_to_the_more_general_template(self):
+        miner = DrainMiner(similarity_threshold=0.5)
+        specific = miner.load("specific", "Job finished state done")
+        general = miner.load("general", "Job finished <*> <*>")
+
+        cluster, params = miner.add("Job finished mode failed")
+
+        self.assertIs(cluster, general)
+        self.assertEqual(params, ["mode", "failed"])
+        self.assertEqual(specific.template, "Job finished state done")
+
+    def test_seen_messages_skip_the_tree(self):
+        miner = DrainMiner()
+        miner.add("Cache warmed in 120ms")
+
+        with mock.patch.object(miner, "_match", wraps=miner._match) as match:
+            miner.add("Cache warmed in 95ms")
+            match.assert_not_called()
+
+    def test_wide_nodes_share_a_wildcard_branch(self):
+        miner = DrainMiner(max_children=2, similarity_threshold=0.9)
+        clusters = [miner.add(f"{word} service started")[0] for word in ("alpha", "beta", "gamma", "delta")]
+
+        self.assertEqual(len(miner.clusters), 4)
+        # gamma and delta went under <*> and are still found there
+        self.assertIs(miner.add("delta service started")[0], clusters[3])
+        self.assertEqual(len(miner.clusters), 4)
+
+    def test_least_recently_used_template_is_dropped(self):
+        miner = DrainMiner(max_clusters=2, similarity_threshold=0.9)
+        first, _ = miner.add("Backup started")
+        finished, _ = miner.add("Backup finished")
+        miner.add("Backup started")
+        miner.add("Backup failed")
+
+        self.assertEqual(sorted(cluster.template for cluster in miner.clusters.values()),
+                         ["Backup failed", "Backup started"])
+        self.assertIn(first, first.leaf)
+        self.assertNotIn(finished, finished.leaf)
+        # The dropped template is gone from the lookup table too: its messages make a new one
+        again, _ = miner.add("Backup finished")
+        self.assertIsNot(again, finished)
+        self.assertEqual(again.size, 1)
+
+
+class TemplateTextTest(SimpleTestCase):
+
+    def test_params_round_trip(self):
+        template = "Connection to <*> timed out after <*>"
+        message = "Connection to  db-01 timed out after 30s"
+
+        params = extract_params(template.split(), message)
+
+        self.assertEqual(params, ["db-01", "30s"])
+        self.assertEqual(render_template(template, params), "Connection to db-01 timed out after 30s")
+
+    def test_log_older_than_a_generalized_template_keeps_a_wildcard(self):
+        self.assertEqual(render_template("Session <*> for <*>", ["alice"]), "Session alice for <*>")
+
+
+class LogTemplateMinerTest(TestCase):
+
+    def logs(self, *messages, start=START):
+        return [Log(message=message, level="info", source="auth", timestamp=start + timedelta(seconds=number))
+                for number, message in enumerate(messages)]
+
+    def mine(self, miner, *messages, start=START):
+        entries = self.logs(*messages, start=start)
+        miner.enrich(entries)
+        Log.objects.bulk_create(entries)
+        return entries
+
+    def test_chunk_is_assigned_templates_and_params(self):
+        entries = self.mine(LogTemplateMiner(), "Session opened for alice", "Session opened for bob",
+                            "Disk 91% full")
+
+        template = LogTemplate.objects.get(template="Session opened for <*>")
+        self.assertEqual((template.count, template.token_count), (2, 4))
+        self.assertEqual((template.first_seen, template.last_seen), (START, START + timedelta(seconds=1)))
+        # Params follow the template as it stands at the end of the chunk, so the first log has one too
+        self.assertEqual([entry.params for entry in entries], [["alice"], ["bob"], ["91%"]])
+        self.assertEqual(Log.objects.filter(template=template).count(), 2)
+
+    def test_later_chunk_generalizes_and_counts(self):
+        miner = LogTemplateMiner()
+        first, = self.mine(miner, "Session opened for alice")
+        self.mine(miner, "Session opened for bob", start=START + timedelta(minutes=1))
+
+        template = LogTemplate.objects.get()
+        self.assertEqual(template.pk, first.template_id)
+        self.assertEqual((template.template, template.count), ("Session opened for <*>", 2))
+        self.assertEqual(template.last_seen, START + timedelta(minutes=1))
+
+    def test_templates_are_restored_from_the_database(self):
+        self.mine(LogTemplateMiner(), "Session opened for alice", "Session opened for bob")
+        template = LogTemplate.objects.get()
+
+        restarted = LogTemplateMiner()
+        entry, = self.mine(restarted, "Session opened for carol")
+
+        self.assertEqual(entry.template_id, template.pk)
+        self.assertEqual(LogTemplate.objects.get().count, 3)
+        self.assertTrue(restarted.stats()["loaded"])
+
+    def test_template_deleted_meanwhile_is_recreated(self):
+        miner = LogTemplateMiner()
+        first, = self.mine(miner, "Session opened for alice")
+        LogTemplate.objects.all().delete()
+
+        entry, = self.mine(miner, "Session opened for alice")
+
+        self.assertEqual(entry.template_id, first.template_id)
+        self.assertEqual(LogTemplate.objects.get().count, 1)
+
+    def test_disabled_miner_leaves_logs_alone(self):
+        entries = self.logs("Session opened for alice")
+        LogTemplateMiner(enabled=False).enrich(entries)
+
+        self.assertIsNone(entries[0].template_id)
+        self.assertFalse(LogTemplate.objects.exists())
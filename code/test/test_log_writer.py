@@ -0,0 +1,121 @@
+"""
+Tests for the Bumblebee buffered audit log writer.
+"""
+import os
+import sys
+import threading
+import time
+
+BUMBLEBEE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "vertical-agent", "Bumblebee")
+sys.path.insert(0, BUMBLEBEE_DIR)
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "chat_assistant.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.test import TransactionTestCase  # noqa: E402
+
+from chat_app.models import Log  # noqa: E402
+from chat_app.utils.log_writer import BufferedLogWriter  # noqa: E402
+
+
+class BufferedLogWriterTest(TransactionTestCase):
+    # The flush thread writes on its own connection, so the tests cannot run inside a transaction
+
+    def writer(self, **kwargs):
+        writer = BufferedLogWriter(**kwargs)
+        self.addCleanup(writer.close)
+        return writer
+
+    def messages(self):
+        return sorted(Log.objects.values_list("message", flat=True))
+
+    def test_batch_is_written_after_the_flush_interval(self):
+        writer = self.writer(batch_size=100, flush_interval=0.3)
+        started = time.monotonic()
+        for number in range(3):
+            writer.log(f"entry {number}")
+
+        writer.flush()
+
+        self.assertGreaterEqual(time.monotonic() - started, 0.25)
+        self.assertEqual(self.messages(), ["entry 0", "entry 1", "entry 2"])
+        stats = writer.stats()
+        self.assertEqual((stats["written"], stats["batches"], stats["sync_writes"]), (3, 1, 0))
+
+    def test_full_batch_is_written_without_waiting(self):
+        writer = self.writer(batch_size=2, flush_interval=30)
+        started = time.monotonic()
+        for number in range(4):
+            writer.log(f"entry {number}")
+
+        writer.flush()
+
+        self.assertLess(time.monotonic() - started, 10)
+        self.assertEqual(writer.stats()["batches"], 2)
+        self.assertEqual(len(self.messages()), 4)
+
+    def test_full_buffer_makes_the_caller_write_synchronously(self):
+        writer = self.writer(max_buffer=1, batch_size=1, flush_interval=0.01, put_timeout=0.1)
+        flushing = threading.Event()
+        release = threading.Event()
+
+        def hold_flush_thread(entries):
+            # Only the flush thread waits; the caller's own write must not
+            if threading.current_thread().name == "log-writer" and not release.is_set():
+                flushing.set()
+                release.wait(10)
+
+        writer.enrichers.append(hold_flush_thread)
+        writer.log("taken by the flush thread")
+        self.assertTrue(flushing.wait(5))
+        writer.log("fills the buffer")
+        started = time.monotonic()
+        writer.log("written by the caller")
+        waited = time.monotonic() - started
+
+        self.assertGreaterEqual(waited, 0.09)
+        self.assertEqual(self.messages(), ["written by the caller"])
+
+        release.set()
+        writer.flush()
+        self.assertEqual(self.messages(), ["fills the buffer", "taken by the flush thread", "written by the caller"])
+        stats = writer.stats()
+        self.assertEqual((stats["written"], stats["sync_writes"], stats["failed"]), (3, 1, 0))
+
+    def test_close_writes_the_buffer_and_later_records_synchronously(self):
+        writer = self.writer(batch_size=100, flush_interval=30)
+        for number in range(3):
+            writer.log(f"entry {number}")
+
+        writer.close()
+
+        self.assertFalse(writer._thread.is_alive())
+        self.assertEqual(len(self.messages()), 3)
+        writer.log("after close")
+        self.assertEqual(writer.stats()["sync_writes"], 1)
+        self.assertIn("after close", self.messages())
+
+    def test_failed_batch_is_written_record_by_record(self):
+        writer = self.writer(batch_size=3, flush_interval=30)
+
+        def reject_poison(entries):
+            if any(entry.message == "poison" for entry in entries):
+                raise ValueError("bad record")
+
+        written = []
+        writer.enrichers.append(reject_poison)
+        writer.listeners.append(written.extend)
+        with self.assertLogs("chat_app.utils.log_writer", level="ERROR") as logs:
+            for message in ("before", "poison", "after"):
+                writer.log(message)
+            writer.flush()
+
+        self.assertEqual(self.messages(), ["after", "before"])
+        self.assertEqual(sorted(entry.message for entry in written), ["after", "before"])
+        stats = writer.stats()
+        self.assertEqual((stats["written"], stats["failed"]), (2, 1))
+        lost = [line for line in logs.output if "Log entry lost" in line]
+        self.assertEqual(len(lost), 1)
+        self.assertIn("message='poison'", lost[0])
@@ -0,0 +1,227 @@
+"""
+Tests for the Optimus delivery outbox: idempotent queueing, step tracking, backoff and dead deliveries.
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+OPTIMUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "optimus (Orchestration Agent)")
+sys.path.insert(0, OPTIMUS_DIR)
+
+import agent  # noqa: E402
+import outbox as outbox_module  # noqa: E402
+from outbox import Outbox, idempotency_key  # noqa: E402
+
+
+def payload(number, group="Payments"):
+    return {
+        "assignment_group": group, "incident_number": f"INC{number}", "priority": "3", "short_description": "",
+        "long_description": "", "comments": "", "status": "1", "sys_id": f"sys-{number}",
+    }
+
+
+class OutboxTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, "outbox.sqlite3")
+        self.now = 1_700_000_000.0
+        # A fixed clock, and no jitter unless a test asks for it
+        for target, name, value in (
+            (outbox_module, "time", mock.Mock(time=lambda: self.now)),
+            (outbox_module.random, "uniform", lambda low, high: high),
+        ):
+            patcher = mock.patch.object(target, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.outbox = Outbox(path=self.path, max_attempts=4, retry_base=10, retry_max=60)
+        self.addCleanup(lambda: self.outbox.connection.close())
+
+    def enqueue(self, number, group="Payments"):
+        return self.outbox.enqueue(f"sys-{number}:v1", f"sys-{number}", f"INC{number}", group, payload(number, group))
+
+    def row(self, number):
+        return self.outbox.connection.execute(
+            "SELECT * FROM deliveries WHERE idempotency_key = ?", (f"sys-{number}:v1",)).fetchone()
+
+
+class OutboxTest(OutboxTestCase):
+
+    def test_an_incident_version_is_queued_once(self):
+        self.assertTrue(self.enqueue(1))
+        self.assertFalse(self.enqueue(1))
+        self.assertEqual(idempotency_key({"sys_id": "sys-1", "sys_updated_on": "2024-01-01 10:00:00"}),
+                         "sys-1:2024-01-01 10:00:00")
+
+        due, = self.outbox.due()
+        self.assertEqual((due["status"], due["attempts"], due["payload"]), ("pending", 0, payload(1)))
+
+    def test_retries_back_off_exponentially_up_to_the_cap(self):
+        self.enqueue(1)
+        delays = []
+        for _ in range(3):
+            self.outbox.record_attempt("sys-1:v1", error="agent down")
+            delays.append(self.row(1)["next_attempt_at"] - self.now)
+
+        self.assertEqual(delays, [10, 20, 40])
+        self.assertEqual(self.row(1)["last_error"], "agent down")
+        # Not due until the delay has passed
+        self.assertEqual(self.outbox.due(), [])
+        self.now += 40
+        self.assertEqual(len(self.outbox.due()), 1)
+
+        outbox = Outbox(path=self.path, max_attempts=10, retry_base=10, retry_max=60)
+        self.addCleanup(lambda: outbox.connection.close())
+        outbox.record_attempt("sys-1:v1")
+        self.assertEqual(self.row(1)["next_attempt_at"] - self.now, 60)
+
+    def test_jitter_shortens_the_delay_by_up_to_half(self):
+        self.enqueue(1)
+        with mock.patch.object(outbox_module.random, "uniform", lambda low, high: low):
+            self.outbox.record_attempt("sys-1:v1")
+
+        self.assertEqual(self.row(1)["next_attempt_at"] - self.now, 5)
+
+    def test_steps_done_are_kept_until_both_are(self):
+        self.enqueue(1)
+        self.outbox.record_attempt("sys-1:v1", assigned=True, error="agent down")
+        # A later attempt only reports the step it retried
+        self.outbox.record_attempt("sys-1:v1", sent=False, error="agent down")
+        self.assertEqual((self.row(1)["assigned"], self.row(1)["sent"], self.row(1)["status"]), (1, 0, "pending"))
+
+        self.outbox.record_attempt("sys-1:v1", sent=True)
+
+        row = self.row(1)
+        self.assertEqual((row["status"], row["attempts"], row["last_error"]), ("delivered", 3, ""))
+        self.assertFalse(self.enqueue(1))
+
+    def test_delivery_is_dead_after_max_attempts(self):
+        self.enqueue(1)
+        for _ in range(4):
+            self.now += 3600
+            self.outbox.record_attempt("sys-1:v1", error="agent down")
+
+        self.assertEqual(self.row(1)["status"], "dead")
+        self.now += 3600
+        self.assertEqual(self.outbox.due(), [])
+        self.assertEqual(self.outbox.stats(), {"dead": 1})
+
+    def test_unknown_key_is_ignored(self):
+        self.outbox.record_attempt("sys-9:v1", sent=True)
+        self.assertEqual(self.outbox.stats(), {})
+
+    def test_purge_keeps_pending_and_recent_deliveries(self):
+        for number in range(1, 5):
+            self.enqueue(number)
+        self.outbox.record_attempt("sys-1:v1", assigned=True, sent=True)
+        for _ in range(4):
+            self.outbox.record_attempt("sys-2:v1")
+        self.now += 8 * 86400
+        self.outbox.record_attempt("sys-3:v1", assigned=True, sent=True)
+
+        self.assertEqual(self.outbox.purge(keep_days=7), 2)
+        self.assertEqual(self.outbox.stats(), {"delivered": 1, "pending": 1})
+
+    def test_outbox_files_without_step_columns_are_upgraded(self):
+        connection = sqlite3.connect(self.path)
+        connection.execute(
+            "CREATE TABLE deliveries (idempotency_key TEXT PRIMARY KEY, sys_id TEXT NOT NULL, incident_number TEXT NOT NULL,"
+            " assignment_group TEXT NOT NULL, payload TEXT NOT NULL, status TEXT NOT NULL DEFAULT 'pending',"
+            " attempts INTEGER NOT NULL DEFAULT 0, next_attempt_at REAL NOT NULL, last_error TEXT NOT NULL DEFAULT '',"
+            " created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        connection.commit()
+        connection.close()
+
+        self.enqueue(1)
+        self.outbox.record_attempt("sys-1:v1", assigned=True)
+
+        self.assertEqual((self.row(1)["assigned"], self.row(1)["sent"]), (1, 0))
+
+
+class StubIncidentWriter:
+    """
+    Stands in for the batched ServiceNow writer; sys_ids in failing are rejected.
+    """
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.assigned = []
+        self._pending = []
+
+    def assign(self, sys_id, owner):
+        self._pending.append(sys_id)
+
+    def flush(self):
+        results = {sys_id: {"ok": sys_id not in self.failing, "status_code": 500 if sys_id in self.failing else 200,
+                            "error": "busy" if sys_id in self.failing else ""} for sys_id in self._pending}
+        self.assigned.extend(self._pending)
+        self._pending = []
+        return results
+
+
+class DeliverPendingTest(OutboxTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.writer = StubIncidentWriter()
+        self.sent = []
+        self.refusing = set()
+
+        def send_to_agent(idempotency_key=None, assign=True, **delivery):
+            self.sent.append(delivery["incident_number"])
+            return delivery["incident_number"] not in self.refusing
+
+        for target, value in (
+            ("outbox", self.outbox),
+            ("incident_writer", self.writer),
+            ("send_to_agent", send_to_agent),
+            ("get_agent_details", lambda group: {"platformOwner": "owner", "restURL": f"http://{group}"}),
+        ):
+            patcher = mock.patch.object(agent, target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch("builtins.print")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_only_the_failed_step_is_retried(self):
+        self.enqueue(1)
+        self.enqueue(2)
+        self.writer.failing.add("sys-2")
+        self.refusing.add("INC1")
+
+        agent.deliver_pending()
+
+        self.assertEqual((self.row(1)["assigned"], self.row(1)["sent"]), (1, 0))
+        self.assertEqual((self.row(2)["assigned"], self.row(2)["sent"]), (0, 1))
+        self.assertIn("assignment failed (500): busy", self.row(2)["last_error"])
+        self.assertEqual(self.row(1)["last_error"], "rejected by the agent")
+
+        self.writer.failing.clear()
+        self.refusing.clear()
+        self.now += 60
+        agent.deliver_pending()
+
+        # INC1 was assigned already and INC2 sent already: neither step runs twice
+        self.assertEqual(self.writer.assigned, ["sys-1", "sys-2", "sys-2"])
+        self.assertEqual(sorted(self.sent), ["INC1", "INC1", "INC2"])
+        self.assertEqual(self.outbox.stats(), {"delivered": 2})
+
+    def test_backed_off_deliveries_wait(self):
+        self.enqueue(1)
+        self.refusing.add("INC1")
+        agent.deliver_pending()
+
+        agent.deliver_pending()
+
+        self.assertEqual(self.sent, ["INC1"])
+        self.assertEqual(self.row(1)["attempts"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
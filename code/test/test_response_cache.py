@@ -0,0 +1,131 @@
+"""
+Tests for the Bumblebee response cache: exact and semantic hits, invalidation and expiry.
+"""
+import asyncio
+import os
+import sys
+import unittest
+from unittest import mock
+
+BUMBLEBEE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "vertical-agent", "Bumblebee")
+sys.path.insert(0, BUMBLEBEE_DIR)
+
+from chat_app.utils import response_cache as response_cache_module  # noqa: E402
+from chat_app.utils.response_cache import ResponseCache  # noqa: E402
+
+# Questions embed to fixed vectors: the two password questions are close, the VPN one is not
+EMBEDDINGS = {
+    "how do i reset my password": [1.0, 0.1, 0.0],
+    "how can i reset my password": [1.0, 0.15, 0.0],
+    "how do i connect to the vpn": [0.0, 0.2, 1.0],
+}
+
+
+def chunk(source_id, content, number=0):
+    return {"content": content, "metadata": {"document_id": source_id, "chunk": number}}
+
+
+PASSWORD_DOCS = [chunk("7", "Reset passwords from the self-service portal.")]
+VPN_DOCS = [chunk("9", "Install the VPN client, then sign in."), chunk("7", "Reset passwords from the self-service portal.", 1)]
+
+
+class ResponseCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.embedded = []
+        self.cache = ResponseCache(embed_fn=self.embed, similarity_threshold=0.95)
+
+    def embed(self, text):
+        self.embedded.append(text)
+        return EMBEDDINGS[text]
+
+    def test_exact_hit_ignores_case_and_punctuation(self):
+        self.cache.set("How do I reset my password?", PASSWORD_DOCS, "gpt", "Use the portal.", 1.5)
+
+        self.assertEqual(self.cache.get("how do i reset my password", PASSWORD_DOCS, "gpt"), "Use the portal.")
+        # Another model or another retrieval context is another entry
+        self.assertIsNone(self.cache.get("how do i reset my password", PASSWORD_DOCS, "llama"))
+        self.assertIsNone(self.cache.get("how do i reset my password", VPN_DOCS, "gpt"))
+        stats = self.cache.stats()
+        self.assertEqual((stats["exact_hits"], stats["misses"]), (1, 2))
+        self.assertEqual(stats["saved_latency_seconds"], 1.5)
+
+    def test_semantic_hit_embeds_each_question_once(self):
+        self.cache.set("How do I reset my password?", PASSWORD_DOCS, "gpt", "Use the portal.", 1.0)
+        self.assertEqual(self.embedded, ["how do i reset my password"])
+
+        self.assertEqual(self.cache.get("How can I reset my password?", PASSWORD_DOCS, "gpt"), "Use the portal.")
+        self.assertEqual(self.cache.stats()["semantic_hits"], 1)
+        self.assertEqual(len(self.embedded), 2)
+
+    def test_semantic_miss_reuses_the_lookup_embedding_in_set(self):
+        self.cache.set("How do I reset my password?", PASSWORD_DOCS, "gpt", "Use the portal.", 1.0)
+
+        self.assertIsNone(self.cache.get("How do I connect to the VPN?", PASSWORD_DOCS, "gpt"))
+        self.cache.set("How do I connect to the VPN?", PASSWORD_DOCS, "gpt", "Install the client.", 1.0)
+
+        self.assertEqual(self.embedded, ["how do i reset my password", "how do i connect to the vpn"])
+
+    def test_lookup_without_candidates_does_not_embed(self):
+        self.assertIsNone(self.cache.get("How do I reset my password?", PASSWORD_DOCS, "gpt"))
+        self.assertEqual(self.embedded, [])
+
+    def test_changed_source_invalidates_its_entries_only(self):
+        self.cache.set("How do I reset my password?", PASSWORD_DOCS, "gpt", "Use the portal.", 1.0)
+        self.cache.set("How do I connect to the VPN?", VPN_DOCS, "gpt", "Install the client.", 1.0)
+        self.cache.set("How do I connect to the VPN?", [chunk("9", "Install the VPN client.")], "gpt", "Client.", 1.0)
+
+        self.cache.invalidate_source(7)
+
+        self.assertIsNone(self.cache.get("How do I reset my password?", PASSWORD_DOCS, "gpt"))
+        self.assertIsNone(self.cache.get("How do I connect to the VPN?", VPN_DOCS, "gpt"))
+        self.assertEqual(self.cache.get("How do I connect to the VPN?", [chunk("9", "Install the VPN client.")], "gpt"),
+                         "Client.")
+        stats = self.cache.stats()
+        self.assertEqual((stats["invalidations"], stats["entries"]), (2, 1))
+
+    def test_edited_chunk_is_a_new_context(self):
+        self.cache.set("How do I reset my password?", PASSWORD_DOCS, "gpt", "Use the portal.", 1.0)
+
+        edited = [chunk("7", "Passwords are now reset at the service desk.")]
+        self.assertIsNone(self.cache.get("How do I reset my password?", edited, "gpt"))
+
+    def test_entries_expire_after_the_ttl(self):
+        clock = mock.Mock(monotonic=mock.Mock(return_value=100.0))
+        with mock.patch.object(response_cache_module, "time", clock):
+            cache = ResponseCache(ttl=60)
+            cache.set("How do I reset my password?", PASSWORD_DOCS, "gpt", "Use the portal.", 1.0)
+            clock.monotonic.return_value = 159.0
+            self.assertEqual(cache.get("How do I reset my password?", PASSWORD_DOCS, "gpt"), "Use the portal.")
+            clock.monotonic.return_value = 161.0
+            self.assertIsNone(cache.get("How do I reset my password?", PASSWORD_DOCS, "gpt"))
+        self.assertEqual(cache.stats()["entries"], 0)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = ResponseCache(max_entries=2)
+        cache.set("first", PASSWORD_DOCS, "gpt", "1", 1.0)
+        cache.set("second", PASSWORD_DOCS, "gpt", "2", 1.0)
+        cache.get("first", PASSWORD_DOCS, "gpt")
+        cache.set("third", PASSWORD_DOCS, "gpt", "3", 1.0)
+
+        self.assertEqual(cache.get("first", PASSWORD_DOCS, "gpt"), "1")
+        self.assertIsNone(cache.get("second", PASSWORD_DOCS, "gpt"))
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_async_lookup_awaits_the_async_embedding(self):
+        async def aembed(text):
+            self.embedded.append(("async", text))
+            return EMBEDDINGS[text]
+
+        cache = ResponseCache(embed_fn=self.embed, aembed_fn=aembed, similarity_threshold=0.95)
+
+        async def turn():
+            await cache.aset("How do I reset my password?", PASSWORD_DOCS, "gpt", "Use the portal.", 1.0)
+            return await cache.aget("How can I reset my password?", PASSWORD_DOCS, "gpt")
+
+        self.assertEqual(asyncio.run(turn()), "Use the portal.")
+        self.assertEqual(self.embedded, [("async", "how do i reset my password"), ("async", "how can i reset my password")])
+
+
+if __name__ == "__main__":
+    unittest.main()
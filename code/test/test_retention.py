@@ -0,0 +1,165 @@
+"""
+Tests for the Bumblebee retention purge: batches, archive-before-delete and per-source policies.
+"""
+import gzip
+import json
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+BUMBLEBEE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "vertical-agent", "Bumblebee")
+sys.path.insert(0, BUMBLEBEE_DIR)
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "chat_assistant.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.test import TestCase  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+
+from chat_app.models import Conversation, Log, Message  # noqa: E402
+from chat_app.utils.retention import NdjsonArchive, enforce_retention, purge_conversations, purge_logs  # noqa: E402
+
+NOW = datetime(2024, 6, 1, tzinfo=dt_timezone.utc)
+
+
+class RecordingArchive:
+    """Collects the batches an archive would receive; fails on demand."""
+
+    def __init__(self, fail_on=None):
+        self.batches = []
+        self.fail_on = fail_on
+
+    def write(self, rows):
+        if len(self.batches) == self.fail_on:
+            raise OSError("disk full")
+        self.batches.append(rows)
+
+
+def read_archive(path):
+    with gzip.open(path, "rt", encoding="utf-8") as archive:
+        return [json.loads(line) for line in archive]
+
+
+class RetentionTest(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def add_logs(self, count, days_old, source="api"):
+        Log.objects.bulk_create([
+            Log(message=f"{source} {days_old}d #{number}", level="info", source=source,
+                timestamp=NOW - timedelta(days=days_old, seconds=number))
+            for number in range(count)
+        ])
+
+    def add_conversation(self, messages, days_idle):
+        conversation = Conversation.objects.create(title=f"idle {days_idle}d")
+        Message.objects.bulk_create([
+            Message(conversation=conversation, role="user", content=f"message {number}") for number in range(messages)
+        ])
+        Conversation.objects.filter(pk=conversation.pk).update(updated_at=NOW - timedelta(days=days_idle))
+        return conversation
+
+    def test_logs_are_purged_oldest_first_in_batches(self):
+        self.add_logs(7, days_old=40)
+        self.add_logs(2, days_old=1)
+        archive = RecordingArchive()
+
+        deleted = purge_logs(Log.objects.filter(timestamp__lt=NOW - timedelta(days=30)), batch_size=3, archive=archive)
+
+        self.assertEqual(deleted, 7)
+        self.assertEqual([len(batch) for batch in archive.batches], [3, 3, 1])
+        timestamps = [row["timestamp"] for batch in archive.batches for row in batch]
+        self.assertEqual(timestamps, sorted(timestamps))
+        self.assertEqual(Log.objects.count(), 2)
+
+    def test_batch_that_cannot_be_archived_is_not_deleted(self):
+        self.add_logs(5, days_old=40)
+        archive = RecordingArchive(fail_on=1)
+
+        with self.assertRaises(OSError):
+            purge_logs(Log.objects.all(), batch_size=2, archive=archive)
+
+        # The first batch was archived and deleted, the rest is still there
+        self.assertEqual(Log.objects.count(), 3)
+        self.assertFalse(Log.objects.filter(id__in=[row["id"] for row in archive.batches[0]]).exists())
+
+    def test_conversations_are_archived_with_their_messages(self):
+        long = self.add_conversation(25, days_idle=100)
+        short = self.add_conversation(1, days_idle=100)
+        empty = self.add_conversation(0, days_idle=100)
+        kept = self.add_conversation(3, days_idle=1)
+        archive = RecordingArchive()
+
+        # Ten messages per transaction, one conversation per batch
+        deleted = purge_conversations(Conversation.objects.exclude(pk=kept.pk), batch_size=10, archive=archive)
+
+        self.assertEqual(deleted, 3)
+        archived = {row["id"]: row for batch in archive.batches for row in batch}
+        self.assertEqual([len(batch) for batch in archive.batches], [1, 1, 1])
+        self.assertEqual(len(archived[long.pk]["messages"]), 25)
+        self.assertEqual(archived[short.pk]["messages"][0]["content"], "message 0")
+        self.assertEqual(archived[empty.pk]["messages"], [])
+        self.assertEqual(list(Conversation.objects.all()), [kept])
+        self.assertEqual(Message.objects.count(), 3)
+
+    def test_long_conversation_is_emptied_over_several_transactions(self):
+        self.add_conversation(25, days_idle=100)
+
+        with CaptureQueriesContext(connection) as queries:
+            purge_conversations(Conversation.objects.all(), batch_size=10)
+
+        # Deletes by message id; the conversation's own cascade finds nothing left
+        message_deletes = [query for query in queries
+                           if query["sql"].startswith('DELETE FROM "chat_app_message" WHERE "chat_app_message"."id" IN')]
+        self.assertEqual(len(message_deletes), 3)
+        self.assertFalse(Message.objects.exists())
+
+    def test_source_overrides_and_archive_files(self):
+        self.add_logs(3, days_old=40)
+        self.add_logs(2, days_old=10, source="audit")
+        self.add_logs(2, days_old=400, source="audit")
+        self.add_conversation(2, days_idle=100)
+        self.add_conversation(2, days_idle=5)
+
+        result = enforce_retention(30, {"audit": 365}, 90, batch_size=2, archive_dir=self.directory.name, now=NOW)
+
+        self.assertEqual(result["purged"], {"logs:audit": 2, "logs": 3, "conversations": 1})
+        self.assertEqual(sorted(Log.objects.values_list("source", flat=True)), ["audit", "audit"])
+        log_archive, conversation_archive = result["archives"]
+        self.assertEqual(len(read_archive(log_archive)), 5)
+        self.assertEqual([len(row["messages"]) for row in read_archive(conversation_archive)], [2])
+
+    def test_dry_run_only_counts(self):
+        self.add_logs(3, days_old=40)
+        self.add_conversation(1, days_idle=100)
+
+        result = enforce_retention(30, {}, 90, archive_dir=self.directory.name, now=NOW, dry_run=True)
+
+        self.assertEqual(result["purged"], {"logs": 3, "conversations": 1})
+        self.assertEqual((Log.objects.count(), Conversation.objects.count()), (3, 1))
+        self.assertEqual((result["archives"], os.listdir(self.directory.name)), ([], []))
+
+    def test_zero_days_keeps_forever_and_no_archive_is_left_empty(self):
+        self.add_logs(3, days_old=4000)
+
+        result = enforce_retention(0, {}, 0, archive_dir=self.directory.name, now=NOW)
+
+        self.assertEqual(result["purged"], {})
+        self.assertEqual(Log.objects.count(), 3)
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+    def test_archive_file_is_created_on_first_write(self):
+        archive = NdjsonArchive(os.path.join(self.directory.name, "nested"), "logs")
+        self.assertFalse(os.path.exists(archive.path))
+        archive.write([{"id": 1, "at": NOW}])
+        archive.write([{"id": 2}])
+        archive.close()
+
+        self.assertEqual(read_archive(archive.path), [{"id": 1, "at": str(NOW)}, {"id": 2}])
+        self.assertEqual(archive.rows, 2)
@@ -0,0 +1,169 @@
+"""
+Tests for the Optimus ServiceNow batch writer against a local stub of the Batch API.
+"""
+import base64
+import json
+import os
+import sys
+import threading
+import unittest
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+OPTIMUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "optimus (Orchestration Agent)")
+sys.path.insert(0, OPTIMUS_DIR)
+
+from servicenow_batch import IncidentBatchWriter  # noqa: E402
+
+
+class StubServiceNow(BaseHTTPRequestHandler):
+    """
+    Imitates /api/now/v1/batch and the incident Table API.
+
+    Behaviour is set on the server: batch_status answers the batch endpoint
+    as a whole, unserviced sys_ids are left out of serviced_requests and
+    missing sys_ids get a per-item 404.
+    """
+    protocol_version = "HTTP/1.1"
+
+    def _reply(self, status_code, body):
+        data = json.dumps(body).encode()
+        self.send_response(status_code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _body(self):
+        return json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+
+    def do_POST(self):
+        body = self._body()
+        server = self.server
+        server.calls.append(("POST", self.path, body))
+        if self.path != "/api/now/v1/batch" or server.batch_status != 200:
+            return self._reply(server.batch_status, {"error": {"message": "batch failed"}})
+
+        serviced, unserviced = [], []
+        for request in body["rest_requests"]:
+            sys_id = request["url"].rsplit("/", 1)[1]
+            if sys_id in server.unserviced:
+                unserviced.append(request["id"])
+                continue
+            fields = json.loads(base64.b64decode(request["body"]))
+            if sys_id in server.missing:
+                status_code, result = 404, {"error": {"message": "No Record found"}}
+            else:
+                status_code, result = 200, {"result": dict(fields, sys_id=sys_id)}
+            serviced.append({
+                "id": request["id"],
+                "status_code": status_code,
+                "body": base64.b64encode(json.dumps(result).encode()).decode(),
+            })
+        self._reply(200, {"batch_request_id": body["batch_request_id"],
+                          "serviced_requests": serviced, "unserviced_requests": unserviced})
+
+    def do_PATCH(self):
+        fields = self._body()
+        sys_id = self.path.rsplit("/", 1)[1]
+        self.server.calls.append(("PATCH", self.path, fields))
+        self._reply(200, {"result": dict(fields, sys_id=sys_id)})
+
+    def log_message(self, *args):
+        pass
+
+
+class IncidentBatchWriterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubServiceNow)
+        self.server.calls = []
+        self.server.batch_status = 200
+        self.server.unserviced = set()
+        self.server.missing = set()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.writer = IncidentBatchWriter(
+            batch_size=3, workers=4, instance=f"127.0.0.1:{self.server.server_port}", scheme="http"
+        )
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def calls(self, method):
+        return [call for call in self.server.calls if call[0] == method]
+
+    def test_serviced_items_map_back_to_incidents(self):
+        for number in range(5):
+            self.writer.assign(f"inc{number}", "owner")
+        self.writer.move_status("inc0", 3)
+
+        results = self.writer.flush()
+
+        self.assertEqual(len(self.calls("POST")), 2)
+        self.assertEqual(self.calls("PATCH"), [])
+        self.assertEqual(set(results), {f"inc{number}" for number in range(5)})
+        self.assertTrue(all(result["ok"] for result in results.values()))
+        # Updates of the same incident are merged into one request
+        self.assertEqual(results["inc0"]["result"], {"assigned_to": "owner", "state": 3, "sys_id": "inc0"})
+        self.assertEqual(results["inc1"]["result"]["state"], 2)
+
+    def test_unserviced_items_are_patched_individually(self):
+        self.server.unserviced = {"inc1"}
+        self.writer.assign("inc0", "owner")
+        self.writer.assign("inc1", "owner")
+
+        results = self.writer.flush()
+
+        self.assertEqual([call[1] for call in self.calls("PATCH")], ["/api/now/table/incident/inc1"])
+        self.assertTrue(results["inc0"]["ok"])
+        self.assertTrue(results["inc1"]["ok"])
+        self.assertEqual(results["inc1"]["result"]["assigned_to"], "owner")
+
+    def test_item_not_found_is_reported_without_retry(self):
+        self.server.missing = {"gone"}
+        self.writer.assign("inc0", "owner")
+        self.writer.assign("gone", "owner")
+
+        results = self.writer.flush()
+
+        self.assertTrue(results["inc0"]["ok"])
+        self.assertFalse(results["gone"]["ok"])
+        self.assertEqual(results["gone"]["status_code"], 404)
+        self.assertEqual(self.calls("PATCH"), [])
+
+    def test_missing_endpoint_falls_back_to_concurrent_patches(self):
+        self.server.batch_status = 404
+        for number in range(7):
+            self.writer.assign(f"inc{number}", "owner")
+
+        results = self.writer.flush()
+
+        # One probe of the endpoint, then every update on its own
+        self.assertEqual(len(self.calls("POST")), 1)
+        self.assertEqual(len(self.calls("PATCH")), 7)
+        self.assertTrue(all(result["ok"] for result in results.values()))
+        self.assertFalse(self.writer.use_batch_api)
+
+        self.writer.assign("inc7", "owner")
+        self.writer.flush()
+        self.assertEqual(len(self.calls("POST")), 1)
+
+    def test_bad_request_only_affects_that_batch(self):
+        self.server.batch_status = 400
+        self.writer.assign("inc0", "owner")
+
+        results = self.writer.flush()
+
+        self.assertTrue(results["inc0"]["ok"])
+        self.assertEqual(len(self.calls("PATCH")), 1)
+        self.assertTrue(self.writer.use_batch_api)
+
+        self.server.batch_status = 200
+        self.writer.assign("inc1", "owner")
+        self.writer.flush()
+        self.assertEqual(len(self.calls("POST")), 2)
+        self.assertEqual(len(self.calls("PATCH")), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
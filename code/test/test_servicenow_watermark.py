@@ -0,0 +1,185 @@
+"""
+Tests for the Optimus incremental incident polling: keyset pages and the sys_updated_on watermark.
+"""
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+OPTIMUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "optimus (Orchestration Agent)")
+sys.path.insert(0, OPTIMUS_DIR)
+
+import servicenow  # noqa: E402
+
+
+def matches(incident, term):
+    """
+    Evaluate one condition of an encoded query (the subset fetch_updated_incidents uses).
+    """
+    if term == "assigned_toISEMPTY":
+        return not incident.get("assigned_to")
+    for operator, compare in ((">=", str.__ge__), (">", str.__gt__), ("=", str.__eq__)):
+        if operator in term:
+            field, value = term.split(operator, 1)
+            return compare(incident[field], value)
+    raise AssertionError(f"unexpected query term {term}")
+
+
+class StubTableApi:
+    """
+    Imitates requests.Session against the incident Table API.
+
+    after_page(incidents) is called with each page served, so a test can
+    change the table while the caller is still paging.
+    """
+
+    def __init__(self, incidents, after_page=None):
+        self.incidents = incidents
+        self.after_page = after_page
+        self.queries = []
+        self.auth = None
+        self.headers = {}
+
+    def __call__(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def get(self, url, params=None, timeout=None):
+        self.queries.append(params)
+        # ^NQ separates queries whose results are ORed; the ORDERBY terms sort the whole result
+        queries = [query.split("^") for query in params["sysparm_query"].split("^NQ")]
+        order = [term[len("ORDERBY"):] for terms in queries for term in terms if term.startswith("ORDERBY")]
+        queries = [[term for term in terms if not term.startswith("ORDERBY")] for terms in queries]
+        rows = [incident for incident in self.incidents
+                if any(all(matches(incident, term) for term in terms) for terms in queries)]
+        rows.sort(key=lambda incident: [incident[field] for field in order])
+        rows = rows[int(params.get("sysparm_offset", 0)):][:params["sysparm_limit"]]
+        page = [dict(row) for row in rows]
+        if self.after_page:
+            self.after_page(page)
+        return mock.Mock(status_code=200, json=lambda: {"result": page})
+
+
+def incident(sys_id, updated_on):
+    return {"sys_id": sys_id, "number": f"INC-{sys_id}", "sys_updated_on": updated_on, "assigned_to": ""}
+
+
+class FetchUpdatedIncidentsTest(unittest.TestCase):
+
+    def setUp(self):
+        for name, value in (("SERVICENOW_PAGE_SIZE", 2), ("SERVICENOW_MAX_PAGES", 50)):
+            patcher = mock.patch.object(servicenow, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def fetch(self, table, watermark):
+        with mock.patch.object(servicenow.requests, "Session", table):
+            return [incident["sys_id"] for incident in servicenow.fetch_updated_incidents(watermark)]
+
+    def test_incidents_assigned_while_paging_do_not_shift_later_pages(self):
+        incidents = [
+            incident("a", "2024-01-01 10:00:00"),
+            incident("b", "2024-01-01 10:00:01"),
+            incident("c", "2024-01-01 10:00:01"),
+            incident("d", "2024-01-01 10:00:01"),
+            incident("e", "2024-01-01 10:00:02"),
+        ]
+        by_id = {row["sys_id"]: row for row in incidents}
+
+        def assign(page):
+            # The delivery worker assigns what this cycle already fetched
+            for row in page:
+                by_id[row["sys_id"]]["assigned_to"] = "owner"
+
+        table = StubTableApi(incidents, after_page=assign)
+
+        self.assertEqual(self.fetch(table, {}), ["a", "b", "c", "d", "e"])
+        self.assertTrue(all("sysparm_offset" not in params for params in table.queries))
+
+    def test_ties_across_a_page_boundary_are_read_once(self):
+        incidents = [incident(sys_id, "2024-01-01 10:00:00") for sys_id in "abcde"] + [incident("f", "2024-01-01 10:00:05")]
+        table = StubTableApi(incidents)
+
+        self.assertEqual(self.fetch(table, {}), ["a", "b", "c", "d", "e", "f"])
+        self.assertEqual(table.queries[1]["sysparm_query"],
+                         "assigned_toISEMPTY^sys_updated_on>2024-01-01 10:00:00"
+                         "^NQassigned_toISEMPTY^sys_updated_on=2024-01-01 10:00:00^sys_id>b"
+                         "^ORDERBYsys_updated_on^ORDERBYsys_id")
+        # Three full pages, then an empty one
+        self.assertEqual(len(table.queries), 4)
+
+    def test_incidents_already_processed_at_the_watermark_are_left_out(self):
+        incidents = [
+            incident("old", "2024-01-01 09:59:59"),
+            incident("a", "2024-01-01 10:00:00"),
+            incident("b", "2024-01-01 10:00:00"),
+            incident("c", "2024-01-01 10:00:01"),
+        ]
+        watermark = {"sys_updated_on": "2024-01-01 10:00:00", "sys_ids": ["a"]}
+
+        self.assertEqual(self.fetch(StubTableApi(incidents), watermark), ["b", "c"])
+
+    def test_max_pages_bounds_a_cycle(self):
+        incidents = [incident(f"i{number}", f"2024-01-01 10:00:{number:02d}") for number in range(10)]
+        with mock.patch.object(servicenow, "SERVICENOW_MAX_PAGES", 2):
+            self.assertEqual(self.fetch(StubTableApi(incidents), {}), ["i0", "i1", "i2", "i3"])
+
+
+class WatermarkTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.state_file = os.path.join(self.directory.name, "state.json")
+        for name, value in (("SERVICENOW_STATE_FILE", self.state_file), ("SERVICENOW_INCREMENTAL", True)):
+            patcher = mock.patch.object(servicenow, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_watermark_keeps_the_sys_ids_of_its_second(self):
+        servicenow.mark_incidents_processed([incident("a", "2024-01-01 10:00:00"), incident("b", "2024-01-01 10:00:01")])
+        self.assertEqual(servicenow.load_watermark(), {"sys_updated_on": "2024-01-01 10:00:01", "sys_ids": ["b"]})
+
+        # More incidents of the same second are added to it
+        servicenow.mark_incidents_processed([incident("c", "2024-01-01 10:00:01")])
+        self.assertEqual(servicenow.load_watermark(), {"sys_updated_on": "2024-01-01 10:00:01", "sys_ids": ["b", "c"]})
+
+        # A later second starts a new list
+        servicenow.mark_incidents_processed([incident("d", "2024-01-01 10:00:02")])
+        self.assertEqual(servicenow.load_watermark(), {"sys_updated_on": "2024-01-01 10:00:02", "sys_ids": ["d"]})
+
+    def test_watermark_never_moves_back(self):
+        servicenow.mark_incidents_processed([incident("b", "2024-01-01 10:00:01")])
+        servicenow.mark_incidents_processed([incident("a", "2024-01-01 10:00:00")])
+        servicenow.mark_incidents_processed([])
+
+        self.assertEqual(servicenow.load_watermark(), {"sys_updated_on": "2024-01-01 10:00:01", "sys_ids": ["b"]})
+
+    def test_unreadable_state_file_starts_over(self):
+        with open(self.state_file, "w") as state_file:
+            state_file.write("{not json")
+
+        self.assertEqual(servicenow.load_watermark(), {})
+
+    def test_next_cycle_fetches_only_what_changed(self):
+        incidents = [incident("a", "2024-01-01 10:00:00"), incident("b", "2024-01-01 10:00:01")]
+        table = StubTableApi(incidents)
+        with mock.patch.object(servicenow.requests, "Session", table):
+            servicenow.mark_incidents_processed(servicenow.fetch_unassigned_incidents())
+            incidents.append(incident("c", "2024-01-01 10:00:01"))
+            fetched = servicenow.fetch_unassigned_incidents()
+
+        self.assertEqual([row["sys_id"] for row in fetched], ["c"])
+        with open(self.state_file) as state_file:
+            self.assertEqual(json.load(state_file)["sys_ids"], ["b"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+"""
+Tests for the Bumblebee single-flight coalescing of identical searches and generations.
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+import unittest
+
+BUMBLEBEE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "vertical-agent", "Bumblebee")
+sys.path.insert(0, BUMBLEBEE_DIR)
+
+from chat_app.utils.single_flight import AsyncSingleFlight, SingleFlight  # noqa: E402
+
+
+def wait_for(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not met in time")
+        time.sleep(0.01)
+
+
+class SingleFlightTest(unittest.TestCase):
+
+    def setUp(self):
+        self.flight = SingleFlight("test")
+        self.release = threading.Event()
+        self.calls = 0
+
+    def slow(self, value):
+        self.calls += 1
+        self.release.wait(5)
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+    def run_concurrently(self, key, value, followers=3):
+        outcomes = []
+
+        def call():
+            try:
+                outcomes.append(self.flight.do(key, self.slow, value))
+            except Exception as e:
+                outcomes.append(e)
+
+        threads = [threading.Thread(target=call)]
+        threads[0].start()
+        wait_for(lambda: key in self.flight._calls)
+        for _ in range(followers):
+            threads.append(threading.Thread(target=call))
+            threads[-1].start()
+        wait_for(lambda: self.flight._calls[key].followers == followers)
+        self.release.set()
+        for thread in threads:
+            thread.join(5)
+        return outcomes
+
+    def test_concurrent_callers_share_one_call(self):
+        outcomes = self.run_concurrently("question", "answer")
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(sorted(outcomes), [("answer", False)] + [("answer", True)] * 3)
+        self.assertEqual(self.flight.stats(), {"upstream_calls": 1, "shared_results": 3, "in_flight": 0})
+
+    def test_error_reaches_every_caller_and_is_not_cached(self):
+        error = RuntimeError("LLM unavailable")
+
+        outcomes = self.run_concurrently("question", error)
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(outcomes, [error] * 4)
+        # The failed call is forgotten, so the next caller tries again
+        self.assertEqual(self.flight.do("question", lambda: "answer"), ("answer", False))
+
+    def test_different_keys_run_separately(self):
+        self.release.set()
+        self.assertEqual(self.flight.do("a", self.slow, 1), (1, False))
+        self.assertEqual(self.flight.do("b", self.slow, 2), (2, False))
+        self.assertEqual(self.calls, 2)
+
+
+class AsyncSingleFlightTest(unittest.TestCase):
+
+    def test_concurrent_coroutines_share_one_call(self):
+        flight = AsyncSingleFlight("test")
+        calls = []
+
+        async def generate(value):
+            calls.append(value)
+            await asyncio.sleep(0.05)
+            return value
+
+        async def main():
+            return await asyncio.gather(*(flight.do("question", generate, "answer") for _ in range(4)))
+
+        outcomes = asyncio.run(main())
+
+        self.assertEqual(calls, ["answer"])
+        self.assertEqual(outcomes, [("answer", False)] + [("answer", True)] * 3)
+        self.assertEqual(flight.stats()["in_flight"], 0)
+
+    def test_error_reaches_every_coroutine(self):
+        flight = AsyncSingleFlight("test")
+
+        async def fail():
+            await asyncio.sleep(0.05)
+            raise RuntimeError("LLM unavailable")
+
+        async def main():
+            return await asyncio.gather(*(flight.do("question", fail) for _ in range(3)), return_exceptions=True)
+
+        outcomes = asyncio.run(main())
+
+        self.assertEqual([str(outcome) for outcome in outcomes], ["LLM unavailable"] * 3)
+        self.assertEqual(flight.stats(), {"upstream_calls": 1, "shared_results": 2, "in_flight": 0})
+
+    def test_cancelled_follower_does_not_cancel_the_leader(self):
+        flight = AsyncSingleFlight("test")
+
+        async def generate():
+            await asyncio.sleep(0.1)
+            return "answer"
+
+        async def main():
+            leader = asyncio.ensure_future(flight.do("question", generate))
+            await asyncio.sleep(0)
+            follower = asyncio.ensure_future(flight.do("question", generate))
+            await asyncio.sleep(0.01)
+            follower.cancel()
+            return await leader, follower.cancelled()
+
+        self.assertEqual(asyncio.run(main()), (("answer", False), True))
+
+
+if __name__ == "__main__":
+    unittest.main()